@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    Solution,
+    SearchStats,
+    StatsProblem,
+    get_canonical,
+    parent_path,
+    replay_path,
+)
+from memory_budget import MemoryBudget, BudgetExceeded
+from search_tracer import SearchTracer
+from heapq import heappush, heappop, heapify
+from itertools import count
+from time import perf_counter
+from typing import Callable, Optional
+
+# callback(solution, suboptimality bound), return True to stop the search
+SolutionCallback = Callable[[Solution, float], Optional[bool]]
+
+
+class _RepairingSearch:
+    """
+    Weighted A* search that can be resumed with smaller weight,
+    reusing already found path costs (as in ARA*).
+
+    Nodes are ordered by g + weight * h, states with improved path cost
+    that were already expanded in the current iteration are kept
+    in incons and returned to open in the next one.
+
+    Generated states are replaced by their canonical states
+    (Problem.canonical), path to the goal is then replayed
+    from the initial state.
+    """
+
+    def __init__(
+        self,
+        prob: HeuristicProblem,
+        weight: float,
+        budget: Optional[MemoryBudget],
+        stats: Optional[SearchStats],
+        tracer: Optional[SearchTracer],
+    ) -> None:
+        self.incremental = isinstance(prob, IncrementalEstimate)
+        self.canonical = get_canonical(prob)
+        # unwrapped problem, solution path is replayed by it
+        self.original = prob
+        if stats is not None:
+            prob = StatsProblem(prob, stats)
+        self.prob = prob
+        self.stats = stats
+        self.budget = budget
+        self.tracer = tracer
+        self.weight = weight
+
+        start = prob.initial_state()
+        if self.canonical is not None:
+            start = self.canonical(start)
+        self.tie = count()
+        self.g = {start: 0}
+        self.h = {start: prob.estimate(start)}
+        # parent: state -> (parent state, action, cost), when tracing
+        # followed by record id of the parent and index of the action
+        self.parent = {start: None}
+        self.open = [(weight * self.h[start], next(self.tie), 0, start)]
+        self.closed = set()
+        self.incons = set()
+
+        self.goal = start if prob.is_goal(start) else None
+        self.goal_g = 0 if self.goal is not None else float("inf")
+
+        self.deadline: Optional[float] = None
+        self.timed_out = False
+
+    def improve_path(self) -> bool:
+        """
+        Expand nodes until goal path cost is not greater than
+        the minimal key in open.
+
+        Return False if interrupted by deadline.
+        Raise BudgetExceeded if number of known states
+        or size of open exceeds the budget.
+        """
+        prob = self.prob
+        stats = self.stats
+        budget = self.budget
+        g, h, parent = self.g, self.h, self.parent
+        open, closed, incons = self.open, self.closed, self.incons
+        w = self.weight
+        tie = self.tie
+        tracer = self.tracer
+        canonical = self.canonical
+        expansions = 0
+
+        while open and self.goal_g > open[0][0]:
+            _, _, sg, state = heappop(open)
+            if sg != g[state] or state in closed:
+                # stale entry
+                continue
+            closed.add(state)
+
+            expansions += 1
+            if (
+                self.deadline is not None
+                and expansions & 0xFF == 0
+                and perf_counter() > self.deadline
+            ):
+                self.timed_out = True
+                return False
+
+            sh = h[state]
+            if tracer is not None:
+                p = parent[state]
+                if p is None:
+                    tid = tracer.expand(state, sg, sh, -1, -1)
+                else:
+                    tid = tracer.expand(state, sg, sh, p[3], p[4])
+            for i, action in enumerate(prob.actions(state)):
+                c = prob.cost(state, action)
+                child = prob.result(state, action)
+                if canonical is not None:
+                    child = canonical(child)
+                cg = sg + c
+                old = g.get(child)
+                if old is not None and old <= cg:
+                    if stats is not None:
+                        stats.duplicate()
+                    continue
+
+                g[child] = cg
+                if tracer is None:
+                    parent[child] = (state, action, c)
+                else:
+                    parent[child] = (state, action, c, tid, i)
+                if old is None:
+                    if self.incremental:
+                        h[child] = prob.estimate_delta(state, action, sh)
+                    else:
+                        h[child] = prob.estimate(child)
+
+                if prob.is_goal(child):
+                    if cg < self.goal_g:
+                        self.goal = child
+                        self.goal_g = cg
+                    # goals are never expanded
+                    continue
+
+                if child in closed:
+                    incons.add(child)
+                else:
+                    heappush(open, (cg + w * h[child], next(tie), cg, child))
+
+            if stats is not None:
+                stats.frontier(len(open))
+                stats.closed(len(closed))
+            if budget is not None:
+                budget.check_states(len(g))
+                budget.check_frontier(len(open))
+        return True
+
+    def solution(self) -> Optional[Solution]:
+        if self.goal is None:
+            return None
+        if self.canonical is None:
+            solution = Solution.from_path(
+                *parent_path(self.parent, self.goal), self.goal
+            )
+        else:
+            solution = Solution.from_path(
+                *replay_path(self.original, self.parent, self.goal)
+            )
+        if self.tracer is not None:
+            self.tracer.solution(solution.path_cost)
+        return solution
+
+    def bound(self) -> float:
+        """Return suboptimality bound of the current solution."""
+        g, h = self.g, self.h
+        lower = self.goal_g
+        for _, _, sg, state in self.open:
+            if sg == g[state] and sg + h[state] < lower:
+                lower = sg + h[state]
+        for state in self.incons:
+            if g[state] + h[state] < lower:
+                lower = g[state] + h[state]
+        if lower <= 0:
+            return 1.0 if self.goal_g <= 0 else self.weight
+        return min(self.weight, self.goal_g / lower)
+
+    def decrease_weight(self, weight: float) -> None:
+        """Move incons to open, reorder it by the new weight, clear closed."""
+        self.weight = weight
+        g, h = self.g, self.h
+        states = {
+            state for _, _, sg, state in self.open if sg == g[state]
+        }
+        states |= self.incons
+        self.open = [
+            (g[s] + weight * h[s], next(self.tie), g[s], s) for s in states
+        ]
+        heapify(self.open)
+        self.incons = set()
+        self.closed = set()
+
+
+def WeightedAStar(
+    prob: HeuristicProblem,
+    weight: float = 2.0,
+    *,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+    tracer: Optional[SearchTracer] = None,
+) -> Optional[Solution]:
+    """
+    Return Solution of the problem solved by weighted A* search
+    (f = g + weight * h), weight 1 gives A*.
+
+    Cost of the solution is at most weight times the optimal cost
+    (given admissible heuristic).
+    Raise BudgetExceeded if budget (of known states and open size)
+    is exceeded.
+    If tracer is given, expansions are recorded to it.
+    """
+    if weight < 1:
+        raise ValueError("weight has to be at least 1")
+    search = _RepairingSearch(prob, weight, budget, stats, tracer)
+    search.improve_path()
+    return search.solution()
+
+
+def ARAStar(
+    prob: HeuristicProblem,
+    weight: float = 3.0,
+    step: float = 0.5,
+    *,
+    time_limit: Optional[float] = None,
+    callback: Optional[SolutionCallback] = None,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+    tracer: Optional[SearchTracer] = None,
+) -> Optional[Solution]:
+    """
+    Return the best Solution found by anytime repairing A* search.
+
+    The search starts as weighted A* with the given weight,
+    after each found solution the weight is decreased by step,
+    and the search continues reusing previous effort.
+    Search stops after time_limit (seconds),
+    when suboptimality bound of the solution reaches 1 (optimal),
+    or when callback returns True.
+    When budget (of known states and open size) is exceeded,
+    the best solution so far is returned (stats.budget_exceeded is set),
+    if there is none BudgetExceeded is raised.
+
+    :param callback: called with every improved solution
+        and its suboptimality bound
+    :param tracer: if given, expansions of all iterations are recorded
+    """
+    if weight < 1:
+        raise ValueError("weight has to be at least 1")
+    search = _RepairingSearch(prob, weight, budget, stats, tracer)
+    if time_limit is not None:
+        search.deadline = perf_counter() + time_limit
+
+    best: Optional[Solution] = None
+    while True:
+        try:
+            improved = search.improve_path()
+        except BudgetExceeded:
+            if search.goal is None:
+                raise
+            if stats is not None:
+                stats.budget_exceeded = True
+            if best is None or search.goal_g < best.path_cost:
+                best = search.solution()
+                if callback is not None:
+                    callback(best, search.bound())
+            return best
+
+        if not improved and search.goal is None:
+            return best
+
+        if search.goal is not None and (
+            best is None or search.goal_g < best.path_cost
+        ):
+            best = search.solution()
+            bound = search.bound()
+            if callback is not None and callback(best, bound):
+                return best
+        else:
+            bound = search.bound()
+
+        if search.timed_out or bound <= 1 or search.weight <= 1:
+            return best
+        if search.goal is None:
+            # open is exhausted - there is no solution
+            return None
+
+        search.decrease_weight(max(1.0, min(search.weight - step, bound)))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+from search_templates import HeuristicProblem, Solution, search_with_stats
+from anytime_astar import WeightedAStar, ARAStar
+from problems import Cube, OptNPuzzle, OptPackedNPuzzle, PuzzleState
+from time import perf_counter
+from typing import Tuple, Union
+
+
+def run_test(
+    prob: HeuristicProblem, *, verbose: bool = True, **kwargs
+) -> Tuple[bool, float, Union[None, bool]]:
+    """
+    Run ARA* and return validity, time and optimality (None for unknown)
+    of the best solution.
+
+    Every improved solution is reported.
+    Call with verbose=False to turn off prints.
+    Other keyword arguments are passed to ARAStar.
+    """
+    start = perf_counter()
+    valid = True
+
+    def report(solution: Solution, bound: float) -> None:
+        nonlocal valid
+        if not solution.is_valid(prob):
+            valid = False
+        if verbose:
+            print(
+                "found cost {} (bound {:.3f}) in {:.4f} s".format(
+                    solution.path_cost, bound, perf_counter() - start
+                )
+            )
+
+    solution, stats = search_with_stats(
+        ARAStar, prob, callback=report, **kwargs
+    )
+    elapsed = perf_counter() - start
+
+    if solution is None:
+        if verbose:
+            print("found no solution in {:.4f} s".format(elapsed))
+        return False, elapsed, False
+
+    if verbose and solution.report(prob):
+        print("finished in {:.4f} s".format(elapsed))
+        stats.report()
+
+    return valid, elapsed, solution.is_optimal(prob)
+
+
+if __name__ == "__main__":
+    print("Testing Cube")
+    run_test(Cube())
+    print()
+
+    puzzles = [
+        # shortest solution = 28 steps
+        (PuzzleState.reversed(3), 28),
+        # shortest solution = 46 steps
+        (
+            PuzzleState(
+                [2, 11, 14, 3, 8, 6, 7, 13, 0, 5, 4, 15, 1, 9, 10, 12]
+            ),
+            46,
+        ),
+        # shortest solution = 44 steps
+        (
+            PuzzleState(
+                [12, 9, 6, 2, 10, 5, 4, 3, 1, 8, 11, 14, 7, 0, 13, 15]
+            ),
+            44,
+        ),
+    ]
+
+    print("Testing weighted A* on NPuzzle")
+    for state, optimal_cost in puzzles:
+        print(state)
+        prob = OptPackedNPuzzle(state, optimal_cost)
+        solution, stats = search_with_stats(WeightedAStar, prob, 2.0)
+        solution.report(prob)
+        stats.report()
+        print()
+
+    print("Testing A* on symmetric NPuzzle (path is replayed)")
+    state, optimal_cost = puzzles[0]
+    for prob in [
+        OptNPuzzle(state, optimal_cost, symmetric=True),
+        OptPackedNPuzzle(state, optimal_cost, symmetric=True),
+    ]:
+        solution, stats = search_with_stats(WeightedAStar, prob, 1.0)
+        solution.report(prob)
+        stats.report()
+        print()
+
+    print("Testing ARA* on NPuzzle")
+    for state, optimal_cost in puzzles:
+        print(state)
+        run_test(OptNPuzzle(state, optimal_cost), time_limit=10)
+        print()
@@ -1,21 +1,49 @@
 #!/usr/bin/env python3
-from search_templates import Problem
+from search_templates import (
+    IncrementalEstimate,
+    Problem,
+    Solution,
+    search_with_stats,
+)
 from astar import AStar
 from problems import Unsolvable, Cube, OptNPuzzle, PuzzleState
 from time import perf_counter
 from typing import Tuple, Union
 
 
+def check_estimate_delta(prob: Problem, solution: Solution) -> bool:
+    """
+    Return whether estimate_delta matches estimate along the solution
+    (True if the problem does not implement IncrementalEstimate).
+    """
+    if not isinstance(prob, IncrementalEstimate):
+        return True
+    state = prob.initial_state()
+    h = prob.estimate(state)
+    for action in solution.actions:
+        h = prob.estimate_delta(state, action, h)
+        state = prob.result(state, action)
+        if h != prob.estimate(state):
+            print("estimate_delta does not match estimate")
+            return False
+    return True
+
+
 def run_test(
-    prob: Problem, *, verbose: bool = True
+    prob: Problem, *, verbose: bool = True, stats: bool = False
 ) -> Tuple[bool, float, Union[None, bool]]:
     """
     Run test and return validity, time and optimality (None for unknown).
 
-    Call with verbose=False to turn off prints.
+    Call with verbose=False to turn off prints,
+    with stats=True to print SearchStats of the run
+    (counting slows the search down a bit).
     """
     start = perf_counter()
-    solution = AStar(prob)
+    if stats:
+        solution, search_stats = search_with_stats(AStar, prob)
+    else:
+        solution = AStar(prob)
     elapsed = perf_counter() - start
 
     if solution is None:
@@ -31,9 +59,12 @@ def run_test(
     valid = None
     if verbose and (valid := solution.report(prob)):
         print("solved in {:.4f} s".format(elapsed))
+        if stats:
+            search_stats.report()
+        check_estimate_delta(prob, solution)
 
     return (
-        valid if valid is not None else solution.is_valid(),
+        valid if valid is not None else solution.is_valid(prob),
         elapsed,
         solution.is_optimal(prob),
     )
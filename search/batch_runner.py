@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+from search_templates import Problem, Solution, search_with_stats
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, fields
+from functools import partial
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence
+import csv
+import json
+import random
+import signal
+import sys
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SearchFunction = Callable[..., Optional[Solution]]
+
+
+@dataclass
+class Task:
+    """
+    Single search task of the batch.
+
+    factory has to be picklable (module level function, class or partial),
+    it is called in the worker after seeding random with seed.
+    """
+
+    name: str
+    factory: Callable[[], Problem]
+    seed: int = 0
+
+
+@dataclass
+class TaskResult:
+    """Result of a single search task."""
+
+    name: str
+    seed: int
+    solved: bool = False
+    valid: Optional[bool] = None
+    optimal: Optional[bool] = None
+    path_cost: Optional[float] = None
+    length: Optional[int] = None
+    time: float = 0  # seconds
+    expanded: int = 0
+    generated: int = 0
+    max_frontier: int = 0
+    max_closed: int = 0
+    budget_exceeded: bool = False
+    peak_rss: int = 0  # bytes, peak of the worker process (0 if unknown)
+    error: str = ""
+
+
+class TimeLimitExceeded(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise TimeLimitExceeded()
+
+
+def run_task(
+    task: Task,
+    search: SearchFunction,
+    search_kwargs: Dict,
+    time_limit: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+) -> TaskResult:
+    """
+    Run the task and return its result.
+
+    Time limit (seconds) is enforced by interval timer and
+    memory limit (bytes) by limiting address space of the process,
+    both only where available (POSIX).
+    Peak RSS is the peak of the whole process, so it is the peak
+    of the task only in a fresh process.
+    """
+    result = TaskResult(task.name, task.seed)
+    random.seed(task.seed)
+
+    if memory_limit is not None and resource is not None:
+        limits = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, limits[1]))
+    timer = time_limit is not None and hasattr(signal, "setitimer")
+    if timer:
+        signal.signal(signal.SIGALRM, _alarm)
+
+    start = perf_counter()
+    try:
+        prob = task.factory()
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, time_limit)
+        try:
+            solution, stats = search_with_stats(search, prob, **search_kwargs)
+        finally:
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        result.time = stats.wall_time
+        result.expanded = stats.expanded
+        result.generated = stats.generated
+        result.max_frontier = stats.max_frontier
+        result.max_closed = stats.max_closed
+        result.budget_exceeded = stats.budget_exceeded
+
+        if solution is not None:
+            result.solved = True
+            result.valid = solution.is_valid(prob)
+            result.optimal = solution.is_optimal(prob)
+            result.path_cost = solution.path_cost
+            result.length = len(solution.actions)
+    except TimeLimitExceeded:
+        result.time = perf_counter() - start
+        result.error = "time limit exceeded"
+    except MemoryError:
+        result.time = perf_counter() - start
+        result.error = "memory limit exceeded"
+    finally:
+        if memory_limit is not None and resource is not None:
+            resource.setrlimit(resource.RLIMIT_AS, limits)
+    if resource is not None:
+        result.peak_rss = _peak_rss()
+    return result
+
+
+def _peak_rss() -> int:
+    """Return peak resident set size of this process in bytes."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_batch(
+    tasks: Sequence[Task],
+    search: SearchFunction,
+    *,
+    workers: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+    **search_kwargs,
+) -> List[TaskResult]:
+    """
+    Run all tasks in process pool and return their results in order.
+
+    search and search_kwargs have to be picklable.
+    Tasks that raise exception (or crash the worker) get the error recorded.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                run_task, t, search, search_kwargs, time_limit, memory_limit
+            )
+            for t in tasks
+        ]
+        for task, future in zip(tasks, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(
+                    TaskResult(task.name, task.seed, error=repr(e))
+                )
+    return results
+
+
+def seeded_tasks(
+    name: str, factory: Callable[[], Problem], count: int, seed: int = 0
+) -> List[Task]:
+    """Return count tasks of the same factory with seeds derived from seed."""
+    rng = random.Random(seed)
+    return [
+        Task(f"{name}-{i}", factory, rng.randrange(2**32))
+        for i in range(count)
+    ]
+
+
+def write_report(results: Sequence[TaskResult], file_name: str) -> None:
+    """Write results into CSV or JSON file (by extension)."""
+    rows = [asdict(r) for r in results]
+    if file_name.endswith(".json"):
+        with open(file_name, "w") as file:
+            json.dump(rows, file, indent=2)
+    else:
+        with open(file_name, "w", newline="") as file:
+            writer = csv.DictWriter(
+                file, fieldnames=[f.name for f in fields(TaskResult)]
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def summary(results: Sequence[TaskResult]) -> str:
+    solved = sum(r.solved for r in results)
+    invalid = sum(r.valid is False for r in results)
+    non_optimal = sum(r.optimal is False for r in results)
+    total = sum(r.time for r in results)
+    return (
+        f"Solved {solved}/{len(results)}, invalid: {invalid},"
+        f" non-optimal: {non_optimal}, total search time {total:.2f} s"
+    )
+
+
+# ================
+# EXAMPLE PROBLEMS
+# ================
+
+
+def random_npuzzle(size: int, moves: int) -> Problem:
+    """Return NPuzzle with random initial state (seeded by run_task)."""
+    from problems import NPuzzle, PuzzleState
+
+    return NPuzzle(PuzzleState.random(size, moves))
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        description="Solve random NPuzzle instances by IDA* in parallel."
+    )
+    parser.add_argument("-n", "--count", type=int, default=20)
+    parser.add_argument("-s", "--size", type=int, default=3)
+    parser.add_argument(
+        "-m", "--moves", type=int, default=50, help="Random moves from goal."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument(
+        "-t", "--time_limit", type=float, help="Seconds per problem."
+    )
+    parser.add_argument(
+        "--memory_limit", type=int, help="Megabytes per worker process."
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, help="Report file (.csv or .json)."
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    from idastar import IDAStar
+    from problems import NPuzzle
+
+    args = get_parser().parse_args()
+    tasks = seeded_tasks(
+        f"npuzzle{args.size}",
+        partial(random_npuzzle, args.size, args.moves),
+        args.count,
+        args.seed,
+    )
+    results = run_batch(
+        tasks,
+        IDAStar,
+        workers=args.workers,
+        time_limit=args.time_limit,
+        memory_limit=args.memory_limit and args.memory_limit * 2**20,
+        prune=NPuzzle.undoes,
+    )
+    print(summary(results))
+    if args.output:
+        write_report(results, args.output)
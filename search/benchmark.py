@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+from batch_runner import (
+    SearchFunction,
+    Task,
+    TaskResult,
+    random_npuzzle,
+    run_task,
+)
+from problems import Cube, Grid, Line, NPuzzle
+from ucs import ucs
+from astar import AStar
+from bidirectional_ucs import bidirectional_ucs
+from idastar import IDAStar
+from anytime_astar import WeightedAStar
+from bfhs import BFHS
+from search_templates import Problem
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from functools import partial
+from os.path import dirname, exists, join
+from platform import python_version
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import subprocess
+import sys
+
+DIR = dirname(__file__)
+SOKOBAN_DIR = join(DIR, "sokoban")
+LEVELS_DIR = join(SOKOBAN_DIR, "game", "levels")
+RESULTS_FILE = join(DIR, "benchmark_results.json")
+
+# engine name -> (search function, default keyword arguments)
+ENGINES: Dict[str, Tuple[Callable, Dict]] = {
+    "ucs": (ucs, {}),
+    "AStar": (AStar, {}),
+    "bidirectional_ucs": (bidirectional_ucs, {}),
+    "IDAStar": (IDAStar, {}),
+    "WeightedAStar": (WeightedAStar, {"weight": 1.0}),
+    "BFHS": (BFHS, {}),
+}
+
+# metric -> 1 if higher value is worse, -1 if lower value is worse
+METRICS = {"time": 1, "nodes_per_sec": -1, "peak_rss": 1, "expanded": 1}
+# time and nodes/sec of shorter runs are not compared (too noisy)
+MIN_TIME = 0.05
+
+
+def sokoban_level(file_name: str, level: int) -> Problem:
+    """Return SokobanProblem of the level of the file in game/levels."""
+    if SOKOBAN_DIR not in sys.path:
+        sys.path.append(SOKOBAN_DIR)
+    from game.board import Board
+    from agents.myagent import SokobanProblem
+
+    board, _, _ = Board.from_file(join(LEVELS_DIR, file_name), level)
+    return SokobanProblem(board)
+
+
+def sokoban_pushes(file_name: str, level: int) -> Problem:
+    """Return PushProblem of the level of the file in game/levels."""
+    if SOKOBAN_DIR not in sys.path:
+        sys.path.append(SOKOBAN_DIR)
+    from game.board import Board
+    from push_problem import PushProblem
+
+    board, _, _ = Board.from_file(join(LEVELS_DIR, file_name), level)
+    return PushProblem(board)
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    Problem of the benchmark with engines it is solved by.
+
+    factory is called after seeding random with seed,
+    engines maps engine names (of ENGINES) to additional keyword
+    arguments of the search.
+    """
+
+    name: str
+    factory: Callable[[], Problem]
+    engines: Dict[str, Dict]
+    seed: int = 0
+
+
+CASES: List[BenchmarkCase] = [
+    BenchmarkCase(
+        "cube", Cube, {"AStar": {}, "IDAStar": {}, "WeightedAStar": {}}
+    ),
+    BenchmarkCase("grid", Grid, {"ucs": {}, "bidirectional_ucs": {}}),
+    BenchmarkCase("line", Line, {"ucs": {}, "bidirectional_ucs": {}}),
+    # shortest solution = 26 steps
+    BenchmarkCase(
+        "npuzzle3",
+        partial(random_npuzzle, 3, 300),
+        {
+            "AStar": {},
+            "IDAStar": {"prune": NPuzzle.undoes},
+            "WeightedAStar": {},
+            "BFHS": {},
+        },
+        seed=1,
+    ),
+    # shortest solution = 40 steps
+    BenchmarkCase(
+        "npuzzle4",
+        partial(random_npuzzle, 4, 200),
+        {
+            "AStar": {},
+            "IDAStar": {"prune": NPuzzle.undoes},
+            "WeightedAStar": {},
+            "BFHS": {},
+        },
+        seed=0,
+    ),
+] + [
+    BenchmarkCase(
+        f"sokoban-easy-{level}",
+        partial(sokoban_level, "easy.sok", level),
+        {"AStar": {}, "WeightedAStar": {}},
+    )
+    for level in (5, 6, 8, 10)
+] + [
+    BenchmarkCase(
+        f"sokoban-pushes-{name}-{level}",
+        partial(sokoban_pushes, f"{file_name}.sok", level),
+        {"WeightedAStar": {}, "BFHS": {}},
+    )
+    for name, file_name, level in (
+        ("easy", "easy", 9),
+        ("medium", "Aymeric_Medium", 1),
+        ("medium", "Aymeric_Medium", 4),
+    )
+]
+
+
+@dataclass
+class Measurement:
+    """Result of one engine on one case (the fastest of repeated runs)."""
+
+    solved: bool = False
+    path_cost: Optional[float] = None
+    time: float = 0  # seconds
+    expanded: int = 0
+    nodes_per_sec: float = 0
+    peak_rss: int = 0  # bytes
+    error: str = ""
+
+    @staticmethod
+    def from_results(results: List[TaskResult]) -> "Measurement":
+        # runs that failed with an error (time limit...) count only
+        # if all failed
+        results = [r for r in results if not r.error] or results
+        best = min(results, key=lambda r: r.time)
+        return Measurement(
+            best.solved,
+            best.path_cost,
+            best.time,
+            best.expanded,
+            best.expanded / best.time if best.time else 0,
+            min(r.peak_rss for r in results),
+            best.error,
+        )
+
+
+@dataclass
+class Regression:
+    key: str  # case/engine
+    metric: str
+    old: object
+    new: object
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.metric} {self.old} -> {self.new}"
+
+
+def git_revision() -> str:
+    """Return short hash of HEAD ('-dirty' if tracked files changed)."""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=DIR or ".",
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=DIR or ".",
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return rev + "-dirty" if status.strip() else rev
+
+
+def run_benchmark(
+    cases: List[BenchmarkCase],
+    *,
+    repeat: int = 1,
+    workers: int = 1,
+    time_limit: Optional[float] = None,
+    only: str = "",
+    verbose: bool = True,
+) -> Dict[str, Measurement]:
+    """
+    Run every engine of every case repeat times and return measurements
+    keyed by 'case/engine' (only keys containing only).
+
+    Every run gets a fresh worker process, so the peak RSS is the peak
+    of the run. Runs are sequential by default, parallel runs
+    disturb each other's timings.
+    """
+    runs = []
+    for case in cases:
+        for engine, kwargs in case.engines.items():
+            key = f"{case.name}/{engine}"
+            if only not in key:
+                continue
+            search, defaults = ENGINES[engine]
+            task = Task(key, case.factory, case.seed)
+            runs.append((key, task, search, {**defaults, **kwargs}))
+
+    measurements = {}
+    # threads only wait for their processes
+    with ThreadPoolExecutor(workers) as pool:
+        futures = [
+            [
+                pool.submit(run_fresh, task, search, kwargs, time_limit)
+                for _ in range(repeat)
+            ]
+            for _, task, search, kwargs in runs
+        ]
+        for (key, task, _, _), repeats in zip(runs, futures):
+            results = []
+            for future in repeats:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(
+                        TaskResult(task.name, task.seed, error=repr(e))
+                    )
+            m = measurements[key] = Measurement.from_results(results)
+            if verbose:
+                print(format_measurement(key, m), flush=True)
+    return measurements
+
+
+def run_fresh(
+    task: Task,
+    search: SearchFunction,
+    kwargs: Dict,
+    time_limit: Optional[float],
+) -> TaskResult:
+    """Return run_task of the task run in a new worker process."""
+    with ProcessPoolExecutor(1) as pool:
+        return pool.submit(run_task, task, search, kwargs, time_limit).result()
+
+
+def format_measurement(key: str, m: Measurement) -> str:
+    if m.error:
+        return f"{key:36} {m.error}"
+    return "{:36} {:>6} {:9.3f} s {:10d} {:10.0f}/s {:8.1f} MB".format(
+        key,
+        "solved" if m.solved else "failed",
+        m.time,
+        m.expanded,
+        m.nodes_per_sec,
+        m.peak_rss / 2**20,
+    )
+
+
+def load_results(file_name: str) -> Dict[str, Dict]:
+    """Return recorded benchmarks: revision -> entry (oldest first)."""
+    if not exists(file_name):
+        return {}
+    with open(file_name) as file:
+        return json.load(file)
+
+
+def save_results(
+    file_name: str, revision: str, measurements: Dict[str, Measurement]
+) -> None:
+    """Record measurements of the revision (replacing its older record)."""
+    results = load_results(file_name)
+    results.pop(revision, None)
+    results[revision] = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": python_version(),
+        "results": {key: vars(m) for key, m in measurements.items()},
+    }
+    with open(file_name, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def compare(
+    old: Dict[str, Dict], new: Dict[str, Dict], threshold: float
+) -> List[Regression]:
+    """
+    Return regressions of new results (case/engine -> measurement dict)
+    against old ones - metrics worse by more than threshold (relative)
+    and cases that are no longer solved.
+    """
+    regressions = []
+    for key, n in new.items():
+        o = old.get(key)
+        if o is None or not o["solved"]:
+            continue
+        if not n["solved"]:
+            regressions.append(
+                Regression(key, "solved", True, n["error"] or False)
+            )
+            continue
+        for metric, sign in METRICS.items():
+            if metric in ("time", "nodes_per_sec") and (
+                o["time"] < MIN_TIME or n["time"] < MIN_TIME
+            ):
+                continue
+            if not o[metric]:
+                continue
+            change = (n[metric] - o[metric]) / o[metric]
+            if sign * change > threshold:
+                regressions.append(
+                    Regression(key, metric, o[metric], n[metric])
+                )
+    return regressions
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        description="Benchmark search engines, record results by git"
+        " revision and fail on regression against a baseline."
+    )
+    parser.add_argument(
+        "-o", "--output", default=RESULTS_FILE, help="JSON results file."
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help="Revision to compare with (default: the last recorded one).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative worsening of a metric.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=1, help="Runs per benchmark."
+    )
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument(
+        "-t",
+        "--time_limit",
+        type=float,
+        default=300,
+        help="Seconds per run.",
+    )
+    parser.add_argument(
+        "-k", "--only", default="", help="Run only case/engine containing it."
+    )
+    parser.add_argument(
+        "--no_save", action="store_true", help="Do not record the results."
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    revision = git_revision()
+    recorded = load_results(args.output)
+    baseline = args.baseline
+    if baseline is None:
+        older = [r for r in recorded if r != revision]
+        baseline = older[-1] if older else None
+    elif baseline not in recorded:
+        sys.exit(f"revision {baseline} is not recorded in {args.output}")
+
+    print(f"Benchmarking revision {revision}")
+    measurements = run_benchmark(
+        CASES,
+        repeat=args.repeat,
+        workers=args.workers,
+        time_limit=args.time_limit,
+        only=args.only,
+    )
+    if not args.no_save:
+        save_results(args.output, revision, measurements)
+
+    if baseline is None:
+        print("no baseline to compare with")
+        sys.exit(0)
+    regressions = compare(
+        recorded[baseline]["results"],
+        {key: vars(m) for key, m in measurements.items()},
+        args.threshold,
+    )
+    print()
+    if regressions:
+        print(f"{len(regressions)} regressions against {baseline}:")
+        for r in regressions:
+            print(f"  {r}")
+        sys.exit(1)
+    print(f"no regressions against {baseline}")
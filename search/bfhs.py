@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    Solution,
+    SearchStats,
+    StatsProblem,
+)
+from anytime_astar import WeightedAStar
+from memory_budget import MemoryBudget, BudgetExceeded
+from collections import deque
+from typing import List, Optional, Tuple
+
+# weight of the weighted A* run giving the upper bound
+GREEDY_WEIGHT = 2.0
+# maximal number of states of that run (also with no budget)
+GREEDY_STATES = 100_000
+
+
+def BFHS(
+    prob: HeuristicProblem,
+    *,
+    upper_bound: Optional[int] = None,
+    keep_layers: int = 1,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+) -> Optional[Solution]:
+    """
+    Return Solution of the problem with unit action costs
+    solved by breadth-first heuristic search.
+
+    Search proceeds in breadth-first layers and prunes nodes
+    with g + h above the bound. Bound starts at the estimate
+    of the initial state and is increased to the minimal pruned f-cost
+    after each unsuccessful iteration (as in IDA*), up to the upper
+    bound (cost of weighted A* solution if not given, no bound if
+    the weighted A* stores more than GREEDY_STATES states or exceeds
+    the budget), so the solution is optimal
+    (given admissible heuristic).
+    Only the current and the next layer are stored with keep_layers
+    previous layers for duplicate detection (1 is enough for undirected
+    state spaces, as NPuzzle, older duplicates are only expanded again).
+    Path is rebuilt by divide and conquer - nodes remember their
+    ancestor in the middle (relay) layer, and paths to the relay
+    and from it are found by recursive searches.
+
+    Raise ValueError if an action does not cost 1,
+    BudgetExceeded if number of stored states (of all kept layers)
+    or size of the next layer exceeds the budget.
+    """
+    greedy = None
+    if upper_bound is None:
+        # greedy run stores all seen states, so it is always limited
+        max_states = GREEDY_STATES
+        max_frontier = None
+        if budget is not None:
+            if budget.max_states is not None:
+                max_states = min(max_states, budget.max_states)
+            max_frontier = budget.max_frontier
+        # greedy run is counted in stats too
+        try:
+            greedy = WeightedAStar(
+                prob,
+                GREEDY_WEIGHT,
+                budget=MemoryBudget(max_states, max_frontier),
+                stats=stats,
+            )
+        except BudgetExceeded:
+            # search without the bound
+            upper_bound = float("inf")
+        else:
+            if greedy is None:
+                return None
+            upper_bound = greedy.path_cost
+
+    search = _LayeredSearch(prob, keep_layers, budget, stats)
+    start = search.prob.initial_state()
+    if search.prob.is_goal(start):
+        return Solution([], start, 0)
+
+    bound = search.prob.estimate(start)
+    while True:
+        if bound >= upper_bound:
+            if greedy is not None:
+                # nothing cheaper exists
+                return greedy
+            bound = upper_bound
+        relay_depth = bound // 2
+        found, next_bound = search.search(
+            start, 0, None, bound, relay_depth
+        )
+        if found is not None:
+            break
+        if bound >= upper_bound or next_bound == float("inf"):
+            return None
+        bound = next_bound
+    goal, length, relay = found
+
+    if relay is None:
+        # goal is shallower than the relay layer
+        actions = search.solve(start, 0, goal, length, length)
+    else:
+        actions = search.solve(
+            start, 0, relay, relay_depth, length
+        ) + search.solve(
+            relay, relay_depth, goal, length - relay_depth, length
+        )
+    return Solution(actions, goal, length)
+
+
+class _LayeredSearch:
+    """Breadth-first heuristic search between two states."""
+
+    def __init__(
+        self,
+        prob: HeuristicProblem,
+        keep_layers: int,
+        budget: Optional[MemoryBudget],
+        stats: Optional[SearchStats],
+    ) -> None:
+        self.incremental = isinstance(prob, IncrementalEstimate)
+        if stats is not None:
+            prob = StatsProblem(prob, stats)
+        self.prob = prob
+        self.keep_layers = keep_layers
+        self.budget = budget
+        self.stats = stats
+
+    def search(
+        self,
+        source: object,
+        offset: int,
+        target: Optional[object],
+        bound: int,
+        relay_depth: int,
+    ) -> Tuple[Optional[Tuple[object, int, Optional[object]]], float]:
+        """
+        Search from the source (offset actions from the initial state)
+        to the target (or to a goal if target is None).
+
+        Return (reached state, its depth, its ancestor in relay_depth
+        or None) or None if there is no path within the bound,
+        and minimal f-cost of pruned nodes.
+        Nodes with offset + depth + h greater than bound are pruned.
+        """
+        prob = self.prob
+        stats = self.stats
+        budget = self.budget
+        incremental = self.incremental
+
+        next_bound = float("inf")
+        h = prob.estimate(source)
+        if offset + h > bound:
+            return None, offset + h
+        # layer: state -> (h, relay)
+        current = {source: (h, source if relay_depth == 0 else None)}
+        previous = deque()
+        stored = 0  # states in previous layers
+        depth = 0
+
+        while current:
+            next = {}
+            for state, (h, relay) in current.items():
+                for action in prob.actions(state):
+                    if prob.cost(state, action) != 1:
+                        raise ValueError("BFHS requires unit action costs")
+                    child = prob.result(state, action)
+                    if (
+                        child in next
+                        or child in current
+                        or any(child in layer for layer in previous)
+                    ):
+                        if stats is not None:
+                            stats.duplicate()
+                        continue
+
+                    if incremental:
+                        ch = prob.estimate_delta(state, action, h)
+                    else:
+                        ch = prob.estimate(child)
+                    f = offset + depth + 1 + ch
+                    if f > bound:
+                        if f < next_bound:
+                            next_bound = f
+                        continue
+
+                    crelay = child if depth + 1 == relay_depth else relay
+                    if (
+                        prob.is_goal(child)
+                        if target is None
+                        else child == target
+                    ):
+                        return (child, depth + 1, crelay), next_bound
+                    next[child] = (ch, crelay)
+
+                if stats is not None:
+                    stats.frontier(len(next))
+                    stats.closed(stored + len(current))
+                if budget is not None:
+                    budget.check_states(stored + len(current) + len(next))
+                    budget.check_frontier(len(next))
+
+            # only states of the expanded layer are kept
+            if self.keep_layers:
+                previous.append(set(current))
+                stored += len(current)
+                if len(previous) > self.keep_layers:
+                    stored -= len(previous.popleft())
+            current = next
+            depth += 1
+        return None, next_bound
+
+    def solve(
+        self,
+        source: object,
+        offset: int,
+        target: object,
+        length: int,
+        bound: int,
+    ) -> List[object]:
+        """
+        Return actions of a path of the given length from the source
+        (offset actions from the initial state) to the target,
+        that is a part of a solution of cost bound.
+        """
+        if length == 0:
+            return []
+        if length == 1:
+            prob = self.prob
+            for action in prob.actions(source):
+                if prob.result(source, action) == target:
+                    return [action]
+            raise RuntimeError("relay path was not found again")
+
+        relay_depth = length // 2
+        found, _ = self.search(source, offset, target, bound, relay_depth)
+        if found is None or found[1] != length:
+            raise RuntimeError("relay path was not found again")
+        _, _, relay = found
+        return self.solve(
+            source, offset, relay, relay_depth, bound
+        ) + self.solve(
+            relay, offset + relay_depth, target, length - relay_depth, bound
+        )
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from search_templates import (
+    ReversibleProblem,
+    Solution,
+    SearchStats,
+    StatsProblem,
+    parent_path,
+)
+from memory_budget import MemoryBudget
+from heapq import heappush, heappop
+from itertools import count
+from typing import Optional
+
+
+def bidirectional_ucs(
+    prob: ReversibleProblem,
+    *,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+) -> Optional[Solution]:
+    """
+    Return Solution of the problem solved by bidirectional UCS search.
+
+    Forward search starts in the initial state, backward search
+    in all goal states (using predecessors). The side with cheaper
+    frontier node is always expanded and the search stops when
+    sum of both frontier minimums reaches the cheapest meeting path,
+    so the returned solution is optimal as with ucs.
+
+    Raise BudgetExceeded if number of known states (of both sides)
+    or size of frontiers exceeds the budget.
+    """
+    if stats is not None:
+        prob = StatsProblem(prob, stats)
+
+    start = prob.initial_state()
+    if prob.is_goal(start):
+        return Solution([], start, 0)
+
+    tie = count()
+    # dist: state -> best known path cost
+    # parent: state -> (neighbor state, action, cost)
+    #   forward  - result(neighbor, action) == state
+    #   backward - result(state, action) == neighbor
+    dist_f = {start: 0}
+    dist_b = {}
+    parent_f = {start: None}
+    parent_b = {}
+    frontier_f = [(0, next(tie), start)]
+    frontier_b = []
+    for goal in prob.goal_states():
+        dist_b[goal] = 0
+        parent_b[goal] = None
+        frontier_b.append((0, next(tie), goal))
+    closed_f = set()
+    closed_b = set()
+
+    best = float("inf")
+    meeting = None
+
+    while frontier_f and frontier_b:
+        if frontier_f[0][0] + frontier_b[0][0] >= best:
+            break
+
+        forward = frontier_f[0][0] <= frontier_b[0][0]
+        if forward:
+            frontier, closed = frontier_f, closed_f
+            dist, other_dist, parent = dist_f, dist_b, parent_f
+        else:
+            frontier, closed = frontier_b, closed_b
+            dist, other_dist, parent = dist_b, dist_f, parent_b
+
+        g, _, state = heappop(frontier)
+        if state in closed:
+            # stale entry with more expensive path
+            if stats is not None:
+                stats.duplicate()
+            continue
+        closed.add(state)
+
+        if forward:
+            steps = (
+                (prob.result(state, a), a, prob.cost(state, a))
+                for a in prob.actions(state)
+            )
+        else:
+            steps = (
+                (p, a, prob.cost(p, a)) for p, a in prob.predecessors(state)
+            )
+
+        for next_state, action, c in steps:
+            ng = g + c
+            if next_state in closed or dist.get(next_state, ng + 1) <= ng:
+                if stats is not None:
+                    stats.duplicate()
+                continue
+            dist[next_state] = ng
+            parent[next_state] = (state, action, c)
+            heappush(frontier, (ng, next(tie), next_state))
+
+            od = other_dist.get(next_state)
+            if od is not None and ng + od < best:
+                best = ng + od
+                meeting = next_state
+
+        if stats is not None:
+            stats.frontier(len(frontier_f) + len(frontier_b))
+            stats.closed(len(closed_f) + len(closed_b))
+        if budget is not None:
+            budget.check_states(len(dist_f) + len(dist_b))
+            budget.check_frontier(len(frontier_f) + len(frontier_b))
+
+    if meeting is None:
+        return None
+
+    # forward half - from the initial state to meeting point
+    actions, costs = parent_path(parent_f, meeting)
+
+    # backward half - from meeting point to the goal
+    state = meeting
+    while parent_b[state] is not None:
+        next_state, action, c = parent_b[state]
+        actions.append(action)
+        costs.append(c)
+        state = next_state
+    return Solution.from_path(actions, costs, state)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from bidirectional_ucs import bidirectional_ucs
+from search_templates import ReversibleProblem, search_with_stats
+from problems import Empty, Graph, Line, Grid
+from time import perf_counter
+from typing import Tuple, Union
+
+
+def run_test(
+    prob: ReversibleProblem, *, verbose: bool = True
+) -> Tuple[bool, float, Union[None, bool]]:
+    """
+    Run test and return validity, time and optimality (None for unknown).
+
+    Call with verbose=False to turn off prints.
+    """
+    start = perf_counter()
+    solution, stats = search_with_stats(bidirectional_ucs, prob)
+    elapsed = (perf_counter() - start) * 1000
+
+    if solution is None:
+        if verbose:
+            print("found no solution in {:.3f} ms".format(elapsed))
+        return False, elapsed, False
+
+    valid = None
+    if verbose and (valid := solution.report(prob)):
+        print("solved in {:.3f} ms".format(elapsed))
+        stats.report()
+
+    return (
+        valid if valid is not None else solution.is_valid(prob),
+        elapsed,
+        solution.is_optimal(prob),
+    )
+
+
+if __name__ == "__main__":
+    problems = [Empty, Graph, Line, Grid]
+
+    for p in problems:
+        print(f"Running test {p.__name__}")
+        run_test(p())
+        print()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    Problem,
+    ReversibleProblem,
+    Solution,
+    StateInterner,
+)
+from memory_budget import BudgetExceeded
+from priority_queues import IndexedHeap
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, used by all_pairs_distances
+    np = None
+
+# default limit of states for all_pairs_distances (the matrix has
+# n^2 entries of 8 bytes, 4096 states take 128 MiB)
+MAX_PAIRS_STATES = 4096
+
+
+class CompiledProblem(ReversibleProblem, HeuristicProblem):
+    """
+    Reachable state space of a problem enumerated into flat tables.
+
+    States are numbered 0, 1, ... in breadth-first order from
+    the initial state (0) and edges (state, action) are stored
+    in CSR arrays - edges of state s are offsets[s]:offsets[s + 1]
+    of targets (state ids) and costs.
+
+    Compiled problem is a Problem itself - states are ids
+    and actions are edge indices, so any engine can search it
+    (including engines of ReversibleProblem, reversed edges
+    are built on first call of predecessors).
+    Repeated queries are faster by shortest_paths and solve,
+    that run over the arrays directly.
+    Use state and action to translate ids back.
+
+    :param max_states: maximal number of states,
+        BudgetExceeded is raised if the state space is larger
+    :param keep: if given, only states with keep(state) True
+        are enumerated (e.g. to bound infinite state spaces),
+        edges to other states are dropped
+    """
+
+    def __init__(
+        self,
+        prob: Problem,
+        max_states: int = 1_000_000,
+        keep: Optional[Callable[[object], bool]] = None,
+    ) -> None:
+        self.prob = prob
+        self.interner = StateInterner()
+        self.offsets = array("q", [0])
+        self.targets = array("q")
+        # int costs while all costs are int
+        self.costs = array("q")
+        # original actions of edges
+        self.edge_actions: List[object] = []
+        self.goals = bytearray()
+        self.h = array("d")
+        # reversed CSR: sources of edges to each state
+        self.reverse_offsets: Optional[array] = None
+        self.reverse_edges: Optional[array] = None
+
+        interner = self.interner
+        heuristic = isinstance(prob, HeuristicProblem)
+        interner.intern(prob.initial_state())
+        id = 0
+        # ids are assigned in order of discovery - breadth-first
+        while id < len(interner):
+            state = interner.state(id)
+            self.goals.append(prob.is_goal(state))
+            self.h.append(prob.estimate(state) if heuristic else 0)
+            for action in prob.actions(state):
+                child = prob.result(state, action)
+                if keep is not None and not keep(child):
+                    continue
+                cid = interner.intern(child)
+                if cid >= max_states:
+                    raise BudgetExceeded(
+                        "state space has more than {} states".format(
+                            max_states
+                        )
+                    )
+                c = prob.cost(state, action)
+                if type(c) is not int and self.costs.typecode == "q":
+                    self.costs = array("d", self.costs)
+                self.targets.append(cid)
+                self.costs.append(c)
+                self.edge_actions.append(action)
+            self.offsets.append(len(self.targets))
+            id += 1
+
+    def __len__(self) -> int:
+        """Return number of states."""
+        return len(self.interner)
+
+    def state(self, id: int) -> object:
+        """Return original state of the id."""
+        return self.interner.state(id)
+
+    def id(self, state: object) -> Optional[int]:
+        """Return id of the original state (None if not reachable)."""
+        return self.interner.get(state)
+
+    def action(self, edge: int) -> object:
+        """Return original action of the edge."""
+        return self.edge_actions[edge]
+
+    def initial_state(self) -> int:
+        return 0
+
+    def actions(self, state: int) -> range:
+        return range(self.offsets[state], self.offsets[state + 1])
+
+    def result(self, state: int, action: int) -> int:
+        return self.targets[action]
+
+    def is_goal(self, state: int) -> bool:
+        return self.goals[state] == 1
+
+    def cost(self, state: int, action: int) -> float:
+        return self.costs[action]
+
+    def estimate(self, state: int) -> float:
+        return self.h[state]
+
+    def goal_states(self) -> List[int]:
+        return [s for s in range(len(self)) if self.goals[s]]
+
+    def predecessors(self, state: int) -> List[Tuple[int, int]]:
+        if self.reverse_edges is None:
+            self._build_reverse()
+        edges = self.reverse_edges[
+            self.reverse_offsets[state] : self.reverse_offsets[state + 1]
+        ]
+        return [(self._source(e), e) for e in edges]
+
+    def _build_reverse(self) -> None:
+        """Sort edges by target (counting sort) into reversed CSR."""
+        n = len(self)
+        offsets = array("q", [0]) * (n + 1)
+        for t in self.targets:
+            offsets[t + 1] += 1
+        for s in range(n):
+            offsets[s + 1] += offsets[s]
+        edges = array("q", [0]) * len(self.targets)
+        fill = array("q", offsets[:n])
+        for e, t in enumerate(self.targets):
+            edges[fill[t]] = e
+            fill[t] += 1
+        self.reverse_offsets = offsets
+        self.reverse_edges = edges
+
+    def translate(self, solution: Solution) -> Solution:
+        """Return solution with original actions and states."""
+        return Solution(
+            [self.edge_actions[e] for e in solution.actions],
+            self.state(solution.goal_state),
+            solution.path_cost,
+        )
+
+    def shortest_paths(self, source: int = 0) -> Tuple[array, array]:
+        """
+        Return path costs from the source to all states (inf if
+        unreachable) and edge leading to each state on its cheapest
+        path (-1 for the source and unreachable states).
+        """
+        dist, parent, _ = self._dijkstra(source, False)
+        return dist, parent
+
+    def solve(self, source: int = 0) -> Optional[Solution]:
+        """
+        Return cheapest Solution from the source (in original actions
+        and states), None if no goal is reachable.
+        """
+        dist, parent, goal = self._dijkstra(source, True)
+        if goal is None:
+            return None
+
+        edges = []
+        s = goal
+        while s != source:
+            e = parent[s]
+            edges.append(e)
+            s = self._source(e)
+        edges.reverse()
+        return Solution.from_path(
+            [self.edge_actions[e] for e in edges],
+            [self.costs[e] for e in edges],
+            self.state(goal),
+        )
+
+    def _dijkstra(
+        self, source: int, stop_at_goal: bool
+    ) -> Tuple[array, array, Optional[int]]:
+        """
+        Return path costs, parent edges and the first reached goal.
+        If stop_at_goal is True, search stops at the goal and costs
+        of unexpanded states are only upper bounds.
+        """
+        n = len(self)
+        offsets, targets, costs = self.offsets, self.targets, self.costs
+        goals = self.goals
+        dist = array("d", [float("inf")]) * n
+        parent = array("q", [-1]) * n
+        done = bytearray(n)
+        dist[source] = 0
+        heap = IndexedHeap(n)
+        heap.push(source, 0)
+        goal = None
+
+        while heap:
+            s = heap.pop()
+            done[s] = 1
+            if goals[s] and goal is None:
+                goal = s
+                if stop_at_goal:
+                    break
+            d = dist[s]
+            for e in range(offsets[s], offsets[s + 1]):
+                t = targets[e]
+                nd = d + costs[e]
+                if nd < dist[t] and not done[t]:
+                    dist[t] = nd
+                    parent[t] = e
+                    heap.update(t, nd)
+        return dist, parent, goal
+
+    def _source(self, edge: int) -> int:
+        """Return source state of the edge (binary search in offsets)."""
+        offsets = self.offsets
+        low, high = 0, len(offsets) - 1
+        while high - low > 1:
+            mid = (low + high) // 2
+            if offsets[mid] <= edge:
+                low = mid
+            else:
+                high = mid
+        return low
+
+    def all_pairs_distances(self, max_states: int = MAX_PAIRS_STATES):
+        """
+        Return matrix of path costs between all pairs of states
+        (inf if unreachable).
+
+        With NumPy it is numpy array computed by vectorized
+        Floyd-Warshall (O(n^3), for small state spaces),
+        otherwise list of arrays from shortest_paths of every state.
+
+        Raise BudgetExceeded if there are more than max_states states,
+        use shortest_paths of single states for larger state spaces.
+        """
+        n = len(self)
+        if n > max_states:
+            raise BudgetExceeded(
+                "{} states is too many for all pairs distances".format(n)
+            )
+        if np is None:
+            return [self.shortest_paths(s)[0] for s in range(n)]
+
+        dist = np.full((n, n), np.inf)
+        sources = np.repeat(np.arange(n), np.diff(np.asarray(self.offsets)))
+        targets = np.asarray(self.targets)
+        # parallel edges keep the cheapest cost
+        np.minimum.at(dist, (sources, targets), np.asarray(self.costs))
+        np.fill_diagonal(dist, 0)
+        for k in range(n):
+            np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+        return dist
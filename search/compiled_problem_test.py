@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+from search_templates import Problem
+from compiled_problem import CompiledProblem
+from memory_budget import BudgetExceeded
+from bidirectional_ucs import bidirectional_ucs
+from problems import Empty, Unsolvable, Graph, Line, Grid, NPuzzle
+from problems import PuzzleState
+from time import perf_counter
+from typing import Callable, Optional, Tuple, Union
+
+
+def run_test(
+    prob: Problem,
+    *,
+    keep: Optional[Callable[[object], bool]] = None,
+    queries: int = 10,
+    verbose: bool = True,
+) -> Tuple[bool, float, Union[None, bool]]:
+    """
+    Compile the problem, solve it repeatedly and return validity,
+    time of the queries and optimality (None for unknown).
+
+    Call with verbose=False to turn off prints.
+    """
+    start = perf_counter()
+    compiled = CompiledProblem(prob, keep=keep)
+    compile_time = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(queries):
+        solution = compiled.solve()
+    elapsed = perf_counter() - start
+
+    if verbose:
+        print(
+            "compiled {} states, {} edges in {:.4f} s".format(
+                len(compiled), len(compiled.targets), compile_time
+            )
+        )
+    if solution is None:
+        if verbose:
+            print("found no solution in {:.4f} s".format(elapsed / queries))
+        return False, elapsed, False
+
+    valid = None
+    if verbose and (valid := solution.report(prob)):
+        print("solved in {:.4f} s per query".format(elapsed / queries))
+
+    return (
+        valid if valid is not None else solution.is_valid(prob),
+        elapsed,
+        solution.is_optimal(prob),
+    )
+
+
+def check_all_pairs(prob: Problem) -> bool:
+    """
+    Return whether all pairs distances match shortest_paths
+    and bidirectional UCS on the compiled problem.
+    """
+    compiled = CompiledProblem(prob)
+    dist = compiled.all_pairs_distances()
+    for s in range(len(compiled)):
+        paths, _ = compiled.shortest_paths(s)
+        if list(dist[s]) != list(paths):
+            print("all pairs distances do not match")
+            return False
+
+    solution = compiled.solve()
+    other = bidirectional_ucs(compiled) if solution is not None else None
+    if other is not None and other.path_cost != solution.path_cost:
+        print("compiled problem does not match bidirectional UCS")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing all pairs distances")
+    for problem in (Empty, Unsolvable, Graph):
+        print(problem.__name__, check_all_pairs(problem()))
+    try:
+        CompiledProblem(NPuzzle(PuzzleState.reversed(3))).all_pairs_distances()
+        print("NPuzzle all pairs distances were not refused")
+    except BudgetExceeded:
+        print("NPuzzle refused (too many states)")
+    print()
+
+    problems = [
+        (Empty(), None),
+        (Unsolvable(), None),
+        (Graph(), None),
+        (Line(), lambda s: s <= 101),
+        (Grid(), lambda s: -2 <= s.x <= 85 and -2 <= s.y <= 85),
+        (NPuzzle(PuzzleState.reversed(3)), None),
+    ]
+    for prob, keep in problems:
+        print("Testing {}".format(type(prob).__name__))
+        run_test(prob, keep=keep)
+        print()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    Solution,
+    SearchStats,
+)
+from memory_budget import MemoryBudget, BudgetExceeded
+from heapq import heappush, heappop
+from itertools import count
+from queue import Empty
+from time import perf_counter, sleep
+from typing import Callable, List, Optional
+import multiprocessing as mp
+import pickle
+
+# messages in worker inboxes
+NODES = 0  # (NODES, [(state, g, h, parent, action, cost), ...])
+TRACE = 1  # (TRACE, state) - report parent of the state
+EXIT = 2  # (EXIT,) - report stats and finish
+
+# number of expansions between flushes of outgoing buffers
+FLUSH_INTERVAL = 64
+# seconds between termination checks of the main process
+POLL_INTERVAL = 0.005
+
+
+def HDAStar(
+    prob: HeuristicProblem,
+    workers: int = 4,
+    *,
+    batch_size: int = 64,
+    partition: Optional[Callable[[object], int]] = None,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+) -> Optional[Solution]:
+    """
+    Return Solution of the problem solved by hash-distributed A* search.
+
+    States are partitioned among worker processes by partition(state)
+    (hash(state) by default), each worker keeps its own open and closed
+    lists, expands only its states and sends generated states
+    to their owners in batches.
+
+    Problem and states have to be picklable and the partition has to be
+    the same in all processes (hash of str or bytes differs between
+    spawned processes unless PYTHONHASHSEED is set).
+
+    Search terminates when no worker has a node with f-cost lower than
+    the best found goal cost and no nodes are in transit,
+    so the returned solution is optimal as with A*
+    (given admissible heuristic).
+
+    Raise BudgetExceeded if budget (of known states and open size)
+    is exceeded, each worker checks its part of the budget
+    (states are expected to be distributed evenly).
+    """
+    if workers < 1:
+        raise ValueError("at least one worker is needed")
+    start = prob.initial_state()
+    if prob.is_goal(start):
+        return Solution([], start, 0)
+    if partition is None:
+        partition = hash
+    # fail here rather than in a queue feeder thread of a worker
+    pickle.dumps(start)
+
+    ctx = mp.get_context()
+    lock = ctx.Lock()
+    # number of nodes sent but not yet inserted into owners open
+    in_transit = ctx.Value("q", 1, lock=False)
+    idle = ctx.Array("b", workers, lock=False)
+    best = ctx.Value("d", float("inf"), lock=False)
+    goal_owner = ctx.Value("i", -1, lock=False)
+    exceeded = ctx.Value("b", 0, lock=False)
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+
+    processes = [
+        ctx.Process(
+            target=_worker,
+            args=(
+                i,
+                prob,
+                partition,
+                batch_size,
+                budget,
+                lock,
+                in_transit,
+                idle,
+                best,
+                goal_owner,
+                exceeded,
+                inboxes,
+                results,
+            ),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    try:
+        inboxes[partition(start) % workers].put(
+            (NODES, [(start, 0, prob.estimate(start), None, None, 0)])
+        )
+
+        # wait for termination
+        while True:
+            with lock:
+                if in_transit.value == 0 and all(idle):
+                    break
+            if exceeded.value:
+                raise BudgetExceeded("state budget exceeded")
+            # workers exit with 0 after exceeding the budget
+            if any(p.exitcode for p in processes):
+                # the budget may have been exceeded since the check
+                if exceeded.value:
+                    raise BudgetExceeded("state budget exceeded")
+                raise RuntimeError("worker process failed")
+            sleep(POLL_INTERVAL)
+
+        solution = None
+        if goal_owner.value >= 0:
+            solution = _trace(
+                prob, partition, inboxes, results, goal_owner.value
+            )
+
+        for inbox in inboxes:
+            inbox.put((EXIT,))
+        for _ in range(workers):
+            worker_stats = results.get()
+            if stats is not None:
+                _add_stats(stats, worker_stats)
+        for p in processes:
+            p.join()
+        return solution
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        for p in processes:
+            p.join()
+
+
+def _trace(
+    prob: HeuristicProblem,
+    partition: Callable[[object], int],
+    inboxes: List,
+    results,
+    goal_owner: int,
+) -> Solution:
+    """Reconstruct path to the goal by asking owners for parents."""
+    workers = len(inboxes)
+    inboxes[goal_owner].put((TRACE, None))
+    goal, parent, action, cost = results.get()
+
+    actions = []
+    costs = []
+    while parent is not None:
+        actions.append(action)
+        costs.append(cost)
+        inboxes[partition(parent) % workers].put((TRACE, parent))
+        _, parent, action, cost = results.get()
+    actions.reverse()
+    costs.reverse()
+    return Solution.from_path(actions, costs, goal)
+
+
+def _add_stats(stats: SearchStats, worker_stats: dict) -> None:
+    stats.expanded += worker_stats["expanded"]
+    stats.generated += worker_stats["generated"]
+    stats.duplicates += worker_stats["duplicates"]
+    stats.cost_calls += worker_stats["cost_calls"]
+    stats.estimate_calls += worker_stats["estimate_calls"]
+    stats.estimate_time += worker_stats["estimate_time"]
+    # peaks of workers do not have to be simultaneous - upper bound
+    stats.max_frontier += worker_stats["max_frontier"]
+    stats.max_closed += worker_stats["max_closed"]
+
+
+def _worker(
+    me: int,
+    prob: HeuristicProblem,
+    partition: Callable[[object], int],
+    batch_size: int,
+    budget: Optional[MemoryBudget],
+    lock,
+    in_transit,
+    idle,
+    best,
+    goal_owner,
+    exceeded,
+    inboxes: List,
+    results,
+) -> None:
+    try:
+        _worker_loop(
+            me,
+            prob,
+            partition,
+            batch_size,
+            budget,
+            lock,
+            in_transit,
+            idle,
+            best,
+            goal_owner,
+            inboxes,
+            results,
+        )
+    except BudgetExceeded:
+        exceeded.value = 1
+
+
+def _worker_loop(
+    me: int,
+    prob: HeuristicProblem,
+    partition: Callable[[object], int],
+    batch_size: int,
+    budget: Optional[MemoryBudget],
+    lock,
+    in_transit,
+    idle,
+    best,
+    goal_owner,
+    inboxes: List,
+    results,
+) -> None:
+    workers = len(inboxes)
+    inbox = inboxes[me]
+    incremental = isinstance(prob, IncrementalEstimate)
+
+    tie = count()
+    open = []
+    # g: state -> best path cost, parent: state -> (parent, action, cost)
+    g = {}
+    parent = {}
+    goal = None
+    outgoing = [[] for _ in range(workers)]
+    counters = dict.fromkeys(
+        (
+            "expanded",
+            "generated",
+            "duplicates",
+            "cost_calls",
+            "estimate_calls",
+            "estimate_time",
+            "max_frontier",
+            "max_closed",
+        ),
+        0,
+    )
+
+    def insert(nodes) -> None:
+        nonlocal goal
+        for state, sg, sh, p, action, c in nodes:
+            old = g.get(state)
+            if old is not None and old <= sg:
+                counters["duplicates"] += 1
+                continue
+            g[state] = sg
+            parent[state] = (p, action, c)
+            if prob.is_goal(state):
+                with lock:
+                    if sg < best.value:
+                        best.value = sg
+                        goal_owner.value = me
+                        goal = state
+                continue
+            heappush(open, (sg + sh, -sg, next(tie), sg, sh, state))
+
+    def flush() -> None:
+        for i, batch in enumerate(outgoing):
+            if batch:
+                with lock:
+                    in_transit.value += len(batch)
+                inboxes[i].put((NODES, batch))
+                outgoing[i] = []
+
+    def receive(message) -> bool:
+        """Process message, return False on exit."""
+        if message[0] == NODES:
+            with lock:
+                idle[me] = 0
+            insert(message[1])
+            with lock:
+                in_transit.value -= len(message[1])
+        elif message[0] == TRACE:
+            state = goal if message[1] is None else message[1]
+            results.put((state, *parent[state]))
+        else:
+            counters["max_closed"] = max(counters["max_closed"], len(g))
+            results.put(counters)
+            return False
+        return True
+
+    while True:
+        # receive all waiting messages
+        try:
+            while True:
+                if not receive(inbox.get_nowait()):
+                    return
+        except Empty:
+            pass
+
+        expansions = 0
+        while open and open[0][0] < best.value:
+            _, _, _, sg, sh, state = heappop(open)
+            if g[state] != sg:
+                # stale entry
+                continue
+            counters["expanded"] += 1
+            for action in prob.actions(state):
+                c = prob.cost(state, action)
+                counters["cost_calls"] += 1
+                child = prob.result(state, action)
+                counters["generated"] += 1
+                counters["estimate_calls"] += 1
+                start = perf_counter()
+                if incremental:
+                    ch = prob.estimate_delta(state, action, sh)
+                else:
+                    ch = prob.estimate(child)
+                counters["estimate_time"] += perf_counter() - start
+                node = (child, sg + c, ch, state, action, c)
+                owner = partition(child) % workers
+                if owner == me:
+                    insert((node,))
+                else:
+                    outgoing[owner].append(node)
+                    if len(outgoing[owner]) >= batch_size:
+                        with lock:
+                            in_transit.value += batch_size
+                        inboxes[owner].put((NODES, outgoing[owner]))
+                        outgoing[owner] = []
+
+            if len(open) > counters["max_frontier"]:
+                counters["max_frontier"] = len(open)
+            if budget is not None:
+                budget.check_states(len(g) * workers)
+                budget.check_frontier(len(open) * workers)
+            expansions += 1
+            if expansions >= FLUSH_INTERVAL:
+                break
+
+        flush()
+        if open and open[0][0] < best.value:
+            continue
+
+        # nothing to expand - wait for messages
+        with lock:
+            idle[me] = 1
+        if not receive(inbox.get()):
+            return
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+from search_templates import HeuristicProblem, search_with_stats
+from hda_star import HDAStar
+from memory_budget import BudgetExceeded, MemoryBudget
+from problems import OptNPuzzle, OptPackedNPuzzle, PuzzleState
+from time import perf_counter
+from typing import Tuple, Union
+
+
+def run_test(
+    prob: HeuristicProblem, *, verbose: bool = True, **kwargs
+) -> Tuple[bool, float, Union[None, bool]]:
+    """
+    Run test and return validity, time and optimality (None for unknown).
+
+    Call with verbose=False to turn off prints.
+    Other keyword arguments are passed to HDAStar.
+    """
+    start = perf_counter()
+    solution, stats = search_with_stats(HDAStar, prob, **kwargs)
+    elapsed = perf_counter() - start
+
+    if solution is None:
+        if verbose:
+            print("found no solution in {:.4f} s".format(elapsed))
+        return False, elapsed, False
+
+    valid = None
+    if verbose and (valid := solution.report(prob)):
+        print("solved in {:.4f} s".format(elapsed))
+        stats.report()
+
+    return (
+        valid if valid is not None else solution.is_valid(prob),
+        elapsed,
+        solution.is_optimal(prob),
+    )
+
+
+if __name__ == "__main__":
+    print("Testing NPuzzle")
+    puzzles = [
+        # shortest solution = 28 steps
+        (PuzzleState.reversed(3), 28),
+        # shortest solution = 44 steps
+        (
+            PuzzleState(
+                [12, 9, 6, 2, 10, 5, 4, 3, 1, 8, 11, 14, 7, 0, 13, 15]
+            ),
+            44,
+        ),
+    ]
+    for workers in (1, 4):
+        print("{} worker(s)".format(workers))
+        for state, optimal_cost in puzzles[:1]:
+            print(state)
+            run_test(OptNPuzzle(state, optimal_cost), workers=workers)
+            print()
+
+    print("Testing NPuzzle with memory budget")
+    state, optimal_cost = puzzles[0]
+    try:
+        HDAStar(
+            OptNPuzzle(state, optimal_cost),
+            budget=MemoryBudget(max_states=1000),
+        )
+        print("budget was not exceeded - WRONG")
+    except BudgetExceeded:
+        print("budget exceeded - OK")
+    print()
+
+    print("Testing PackedNPuzzle")
+    for state, optimal_cost in puzzles:
+        print(state)
+        run_test(OptPackedNPuzzle(state, optimal_cost))
+        print()
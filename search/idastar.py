@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    InPlaceProblem,
+    IncrementalEstimate,
+    Solution,
+    SearchStats,
+    StatsProblem,
+    get_canonical,
+)
+from memory_budget import MemoryBudget, SpillingDict
+from search_tracer import SearchTracer
+from typing import Callable, List, Optional, Union
+
+
+def IDAStar(
+    prob: HeuristicProblem,
+    *,
+    prune: Optional[Callable[[object, object], bool]] = None,
+    table_size: int = 0,
+    budget: Optional[MemoryBudget] = None,
+    stats: Optional[SearchStats] = None,
+    tracer: Optional[SearchTracer] = None,
+) -> Optional[Solution]:
+    """
+    Return Solution of the problem solved by iterative-deepening A* search.
+
+    Memory is linear in the solution depth - only current path is stored.
+    If the problem is IncrementalEstimate, estimate_delta is used
+    for generated nodes.
+    Cycles and transpositions are detected by canonical states
+    (Problem.canonical), so symmetric states are searched only once.
+    If the problem is InPlaceProblem, the initial state is walked
+    by perform and undo, and cycles and transpositions are detected
+    by keys of states instead.
+
+    :param prune: move pruning hook, prune(action, previous_action)
+        returns True if action should not follow previous_action
+        (e.g. NPuzzle.undoes never slides the previous tile back)
+    :param table_size: maximal number of states in transposition table,
+        that stores cheapest path cost of states visited in the current
+        iteration (0 - no table, only cycles on current path are pruned)
+    :param budget: if given, transposition table is used regardless
+        of table_size, it keeps budget.max_states states in memory
+        and spills older ones to disk (up to budget.spill_states),
+        when even the disk table is full, new states are not stored
+    :param tracer: if given, expansions of all iterations are recorded
+    """
+    incremental = isinstance(prob, IncrementalEstimate)
+    in_place = isinstance(prob, InPlaceProblem)
+    canonical = get_canonical(prob)
+    if stats is not None:
+        prob = StatsProblem(prob, stats)
+
+    start = prob.initial_state()
+    if prob.is_goal(start):
+        return Solution([], start, 0)
+    bound = prob.estimate(start)
+    h = bound
+
+    while True:
+        if budget is not None:
+            table = SpillingDict(budget)
+        else:
+            table = {} if table_size else None
+        dfs = _bounded_dfs_in_place if in_place else _bounded_dfs
+        try:
+            found, bound = dfs(
+                prob,
+                start,
+                h,
+                bound,
+                prune,
+                table,
+                table_size,
+                incremental,
+                canonical,
+                stats,
+                tracer,
+            )
+        finally:
+            if budget is not None:
+                if stats is not None:
+                    stats.spilled = max(stats.spilled, table.spilled())
+                table.close()
+        if found is not None:
+            if tracer is not None:
+                tracer.solution(found.path_cost)
+            return found
+        if bound == float("inf"):
+            return None
+
+
+def _bounded_dfs(
+    prob: HeuristicProblem,
+    start: object,
+    start_h: float,
+    bound: float,
+    prune: Optional[Callable[[object, object], bool]],
+    table: Union[None, dict, SpillingDict],
+    table_size: int,
+    incremental: bool,
+    canonical: Optional[Callable[[object], object]],
+    stats: Optional[SearchStats],
+    tracer: Optional[SearchTracer],
+):
+    """
+    Depth-first search of nodes with f-cost within bound.
+
+    Return (Solution or None, minimal f-cost exceeding the bound).
+    Size of dict table is limited by table_size,
+    SpillingDict limits itself by its budget.
+    on_path and table are keyed by canonical states if canonical is given.
+    """
+    inf = float("inf")
+    next_bound = inf
+
+    # path of nodes: (state, g, h, iterator over (index, action) of children,
+    #   trace record id)
+    start_key = start if canonical is None else canonical(start)
+    keys = [start_key]
+    on_path = {start_key}
+    actions = [None]
+    costs = [0]
+    tid = -1 if tracer is None else tracer.expand(start, 0, start_h, -1, -1)
+    stack = [(start, 0, start_h, enumerate(prob.actions(start)), tid)]
+
+    while stack:
+        state, g, h, children, tid = stack[-1]
+
+        for i, action in children:
+            if prune is not None and prune(action, actions[-1]):
+                continue
+
+            c = prob.cost(state, action)
+            child = prob.result(state, action)
+            cg = g + c
+
+            key = child if canonical is None else canonical(child)
+            if key in on_path:
+                continue
+            if table is not None:
+                tg = table.get(key)
+                if tg is not None and tg <= cg:
+                    if stats is not None:
+                        stats.duplicate()
+                    continue
+                if not table_size or tg is not None or len(table) < table_size:
+                    table[key] = cg
+
+            if incremental:
+                ch = prob.estimate_delta(state, action, h)
+            else:
+                ch = prob.estimate(child)
+            f = cg + ch
+            if f > bound:
+                if f < next_bound:
+                    next_bound = f
+                continue
+
+            keys.append(key)
+            on_path.add(key)
+            actions.append(action)
+            costs.append(c)
+
+            if prob.is_goal(child):
+                # f-cost of the goal is within bound - optimal
+                return (
+                    Solution.from_path(actions[1:], costs[1:], child),
+                    bound,
+                )
+
+            if tracer is not None:
+                ctid = tracer.expand(child, cg, ch, tid, i)
+            else:
+                ctid = -1
+            stack.append((child, cg, ch, enumerate(prob.actions(child)), ctid))
+            break
+        else:
+            # all children explored - backtrack
+            stack.pop()
+            on_path.discard(keys.pop())
+            actions.pop()
+            costs.pop()
+            continue
+
+        if stats is not None:
+            stats.frontier(len(stack))
+            if table is not None:
+                stats.closed(len(table))
+
+    return None, next_bound
+
+
+def _bounded_dfs_in_place(
+    prob: HeuristicProblem,
+    start: object,
+    start_h: float,
+    bound: float,
+    prune: Optional[Callable[[object, object], bool]],
+    table: Union[None, dict, SpillingDict],
+    table_size: int,
+    incremental: bool,
+    canonical: Optional[Callable[[object], object]],
+    stats: Optional[SearchStats],
+    tracer: Optional[SearchTracer],
+):
+    """
+    The same as _bounded_dfs, but the start state of InPlaceProblem
+    is changed in place - the path keeps only actions,
+    on_path and table are keyed by keys of states (prob.key),
+    canonical is not used.
+
+    The start state is restored before return,
+    goal state of the solution is replayed by result.
+    """
+    inf = float("inf")
+    next_bound = inf
+    state = start
+    # (actions, costs) of the path to the goal
+    found = None
+
+    # path of nodes: (g, h, iterator over (index, action) of children,
+    #   trace record id)
+    start_key = prob.key(state)
+    keys = [start_key]
+    on_path = {start_key}
+    actions = [None]
+    costs = [0]
+    tid = -1
+    if tracer is not None:
+        tid = tracer.expand(start_key, 0, start_h, -1, -1)
+    stack = [(0, start_h, enumerate(prob.actions(state)), tid)]
+
+    try:
+        while stack and found is None:
+            g, h, children, tid = stack[-1]
+
+            for i, action in children:
+                if prune is not None and prune(action, actions[-1]):
+                    continue
+
+                c = prob.cost(state, action)
+                cg = g + c
+                if incremental:
+                    ch = prob.estimate_delta(state, action, h)
+                prob.perform(state, action)
+                # on the path at once, so that the finally block undoes it
+                actions.append(action)
+                costs.append(c)
+
+                key = prob.key(state)
+                if key in on_path:
+                    _retract(prob, state, actions, costs)
+                    continue
+                if table is not None:
+                    tg = table.get(key)
+                    if tg is not None and tg <= cg:
+                        if stats is not None:
+                            stats.duplicate()
+                        _retract(prob, state, actions, costs)
+                        continue
+                    if (
+                        not table_size
+                        or tg is not None
+                        or len(table) < table_size
+                    ):
+                        table[key] = cg
+
+                if not incremental:
+                    ch = prob.estimate(state)
+                f = cg + ch
+                if f > bound:
+                    if f < next_bound:
+                        next_bound = f
+                    _retract(prob, state, actions, costs)
+                    continue
+
+                keys.append(key)
+                on_path.add(key)
+
+                if prob.is_goal(state):
+                    # f-cost of the goal is within bound - optimal
+                    found = (actions[1:], costs[1:])
+                    break
+
+                if tracer is not None:
+                    ctid = tracer.expand(key, cg, ch, tid, i)
+                else:
+                    ctid = -1
+                stack.append((cg, ch, enumerate(prob.actions(state)), ctid))
+                break
+            else:
+                # all children explored - backtrack
+                stack.pop()
+                on_path.discard(keys.pop())
+                action = actions.pop()
+                costs.pop()
+                if action is not None:
+                    prob.undo(state, action)
+                continue
+
+            if stats is not None:
+                stats.frontier(len(stack))
+                if table is not None:
+                    stats.closed(len(table))
+    finally:
+        # restore the start state (also when interrupted by budget)
+        for action in reversed(actions[1:]):
+            prob.undo(state, action)
+
+    if found is not None:
+        path, path_costs = found
+        goal = start
+        for action in path:
+            goal = prob.result(goal, action)
+        return Solution.from_path(path, path_costs, goal), bound
+    return None, next_bound
+
+
+def _retract(
+    prob: InPlaceProblem,
+    state: object,
+    actions: List[object],
+    costs: List[float],
+) -> None:
+    """Undo the last action of the path and remove it."""
+    costs.pop()
+    prob.undo(state, actions.pop())
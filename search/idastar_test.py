@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+from search_templates import HeuristicProblem, search_with_stats
+from idastar import IDAStar
+from memory_budget import MemoryBudget
+from astar_test import check_estimate_delta
+from problems import Cube, NPuzzle, OptNPuzzle, OptPackedNPuzzle, PuzzleState
+from time import perf_counter
+from typing import Tuple, Union
+
+
+def run_test(
+    prob: HeuristicProblem, *, verbose: bool = True, **kwargs
+) -> Tuple[bool, float, Union[None, bool]]:
+    """
+    Run test and return validity, time and optimality (None for unknown).
+
+    Call with verbose=False to turn off prints.
+    Other keyword arguments are passed to IDAStar.
+    """
+    start = perf_counter()
+    solution, stats = search_with_stats(IDAStar, prob, **kwargs)
+    elapsed = perf_counter() - start
+
+    if solution is None:
+        if verbose:
+            print("found no solution in {:.4f} s".format(elapsed))
+        return False, elapsed, False
+
+    valid = None
+    if verbose and (valid := solution.report(prob)):
+        print("solved in {:.4f} s".format(elapsed))
+        stats.report()
+        check_estimate_delta(prob, solution)
+
+    return (
+        valid if valid is not None else solution.is_valid(prob),
+        elapsed,
+        solution.is_optimal(prob),
+    )
+
+
+if __name__ == "__main__":
+    print("Testing Cube")
+    run_test(Cube())
+    print()
+
+    print("Testing NPuzzle")
+    puzzles = [
+        # shortest solution = 28 steps
+        (PuzzleState.reversed(3), 28),
+        # shortest solution = 46 steps
+        (
+            PuzzleState(
+                [2, 11, 14, 3, 8, 6, 7, 13, 0, 5, 4, 15, 1, 9, 10, 12]
+            ),
+            46,
+        ),
+        # shortest solution = 44 steps
+        (
+            PuzzleState(
+                [12, 9, 6, 2, 10, 5, 4, 3, 1, 8, 11, 14, 7, 0, 13, 15]
+            ),
+            44,
+        ),
+    ]
+    for state, optimal_cost in puzzles:
+        print(state)
+        run_test(OptNPuzzle(state, optimal_cost), prune=NPuzzle.undoes)
+        print()
+
+    print("Testing PackedNPuzzle")
+    for state, optimal_cost in puzzles:
+        print(state)
+        run_test(OptPackedNPuzzle(state, optimal_cost), prune=NPuzzle.undoes)
+        print()
+
+    print("Testing symmetric NPuzzle (transposed states are duplicates)")
+    state, optimal_cost = puzzles[0]
+    for prob in [
+        OptNPuzzle(state, optimal_cost, symmetric=True),
+        OptPackedNPuzzle(state, optimal_cost, symmetric=True),
+    ]:
+        run_test(prob, prune=NPuzzle.undoes, table_size=100_000)
+        print()
+
+    print("Testing NPuzzle with memory budget")
+    state, optimal_cost = puzzles[0]
+    for budget in [
+        # table is full after 20 states, IDA* continues without storing
+        MemoryBudget(max_states=20),
+        MemoryBudget(max_states=50, spill_states=100_000),
+    ]:
+        run_test(
+            OptNPuzzle(state, optimal_cost),
+            prune=NPuzzle.undoes,
+            budget=budget,
+        )
+        print()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+from itertools import islice
+from mmap import mmap
+from tempfile import TemporaryFile
+from typing import Dict, Optional
+
+
+class BudgetExceeded(MemoryError):
+    """
+    Raised by search engines when memory budget is exceeded.
+
+    search_with_stats catches it and reports it
+    in SearchStats.budget_exceeded.
+    """
+
+    pass
+
+
+class MemoryBudget:
+    """
+    Memory budget of a search, counted in stored states.
+
+    :param max_states: maximal number of states kept in memory
+        (closed set, transposition table or all known states,
+        depending on engine)
+    :param max_frontier: maximal size of the frontier
+    :param spill_states: number of states that can be moved to disk
+        when max_states is reached (0 - no spilling),
+        only hashes of spilled states are stored, so equal hashes
+        of different states are treated as duplicates
+    :param spill_file: file of the disk table (None - temporary file)
+    """
+
+    def __init__(
+        self,
+        max_states: Optional[int] = None,
+        max_frontier: Optional[int] = None,
+        spill_states: int = 0,
+        spill_file: Optional[str] = None,
+    ) -> None:
+        self.max_states = max_states
+        self.max_frontier = max_frontier
+        self.spill_states = spill_states
+        self.spill_file = spill_file
+
+    def check_states(self, size: int) -> None:
+        if self.max_states is not None and size > self.max_states:
+            raise BudgetExceeded("state budget exceeded")
+
+    def check_frontier(self, size: int) -> None:
+        if self.max_frontier is not None and size > self.max_frontier:
+            raise BudgetExceeded("frontier budget exceeded")
+
+
+class DiskHashTable:
+    """
+    Memory-mapped open-addressing table from 64-bit state hashes to floats.
+
+    Keys and values are stored in two regions of the file,
+    0 marks empty slot (hash 0 is stored as 1).
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity: int, file_name: Optional[str] = None) -> None:
+        # slots are power of two, so the probe is masked
+        slots = 1
+        while slots * DiskHashTable.MAX_LOAD < capacity:
+            slots *= 2
+        self.slots = slots
+        self.capacity = capacity
+        self.size = 0
+
+        self.file = (
+            TemporaryFile() if file_name is None else open(file_name, "w+b")
+        )
+        self.file.truncate(slots * 16)
+        self.mmap = mmap(self.file.fileno(), slots * 16)
+        view = memoryview(self.mmap)
+        self.keys = view[: slots * 8].cast("Q")
+        self.values = view[slots * 8 :].cast("d")
+
+    @staticmethod
+    def key(state: object) -> int:
+        return (hash(state) & 0xFFFFFFFFFFFFFFFF) or 1
+
+    def _slot(self, key: int) -> int:
+        mask = self.slots - 1
+        keys = self.keys
+        i = (key ^ (key >> 29)) & mask
+        while keys[i] != 0 and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def get(self, state: object) -> Optional[float]:
+        key = DiskHashTable.key(state)
+        i = self._slot(key)
+        if self.keys[i] == 0:
+            return None
+        return self.values[i]
+
+    def put(self, state: object, value: float) -> None:
+        key = DiskHashTable.key(state)
+        i = self._slot(key)
+        if self.keys[i] == 0:
+            if self.size >= self.capacity:
+                raise BudgetExceeded("spill budget exceeded")
+            self.size += 1
+            self.keys[i] = key
+        self.values[i] = value
+
+    def close(self) -> None:
+        self.keys.release()
+        self.values.release()
+        self.mmap.close()
+        self.file.close()
+
+
+class SpillingDict:
+    """
+    Map of states to path costs (closed set or transposition table)
+    keeping at most budget.max_states states in memory.
+
+    When memory part is full, older (colder) half of it is moved
+    to DiskHashTable (if budget.spill_states allows), when there is
+    no room left, new states are not stored (as in a size-bounded
+    transposition table). Spilled states are looked up by hash only.
+    """
+
+    def __init__(self, budget: MemoryBudget) -> None:
+        self.budget = budget
+        self.memory: Dict[object, float] = {}
+        self.disk: Optional[DiskHashTable] = None
+
+    def __len__(self) -> int:
+        return len(self.memory) + (self.disk.size if self.disk else 0)
+
+    def __contains__(self, state: object) -> bool:
+        return self.get(state) is not None
+
+    def spilled(self) -> int:
+        return self.disk.size if self.disk else 0
+
+    def get(self, state: object) -> Optional[float]:
+        value = self.memory.get(state)
+        if value is None and self.disk is not None:
+            value = self.disk.get(state)
+        return value
+
+    def __setitem__(self, state: object, value: float) -> None:
+        memory = self.memory
+        max_states = self.budget.max_states
+        if (
+            max_states is not None
+            and len(memory) >= max_states
+            and state not in memory
+            and not self._spill()
+        ):
+            # table is full - the state is not stored
+            return
+        memory[state] = value
+
+    def _spill(self) -> bool:
+        """Move older half of memory to disk, return False if no room."""
+        memory = self.memory
+        count = len(memory) // 2 + 1
+        if self.spilled() + count > self.budget.spill_states:
+            return False
+        if self.disk is None:
+            self.disk = DiskHashTable(
+                self.budget.spill_states, self.budget.spill_file
+            )
+        # dict keeps insertion order - the oldest states go first
+        for state in list(islice(memory, count)):
+            self.disk.put(state, memory.pop(state))
+        return True
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+from search_templates import Optimal
+from problems import NPuzzle, PuzzleState
+from mmap import mmap, ACCESS_READ
+from os.path import exists
+from typing import List, Optional, Sequence, Tuple, Union
+import struct
+
+MAGIC = b"PDB1"
+UNKNOWN = 255
+
+# disjoint partitions of tiles for the goal with empty square in the corner
+DEFAULT_PARTITIONS = {
+    3: ((1, 2, 4, 5), (3, 6, 7, 8)),
+    # 5-5-5 partition, 6-6-3 e.g. ((1, 2, 3, 5, 6, 7), ...) is
+    # much stronger, but building it in python takes hours
+    4: ((1, 2, 3, 6, 7), (4, 5, 8, 9, 12), (10, 11, 13, 14, 15)),
+}
+
+
+class PatternDatabase:
+    """
+    Additive disjoint pattern database for NPuzzle.
+
+    For every pattern (subset of tiles) stores minimal number of moves
+    of pattern tiles needed to get them to their goal positions.
+    Since patterns are disjoint and only moves of pattern tiles are counted,
+    values of all patterns can be summed into admissible heuristic.
+
+    Table of each pattern is indexed by positions of its tiles,
+    each position takes `bits` bits (position of i-th tile
+    is at bits * i), values are stored in bytes.
+
+    Main methods:
+    - build
+    - save
+    - load
+    - estimate
+    """
+
+    def __init__(
+        self,
+        size: int,
+        patterns: Sequence[Tuple[int, ...]],
+        tables: Sequence[Union[bytearray, memoryview]],
+    ) -> None:
+        self.size: int = size
+        self.bits: int = (size**2 - 1).bit_length()
+        self.patterns: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(p) for p in patterns
+        )
+        self.tables = tuple(tables)
+        # keeps memory-mapped file open
+        self._mmap: Optional[mmap] = None
+
+    @staticmethod
+    def build(
+        size: int, partition: Optional[Sequence[Tuple[int, ...]]] = None
+    ) -> "PatternDatabase":
+        """
+        Build database by backwards BFS from the goal for each pattern
+        of the partition (DEFAULT_PARTITIONS if None).
+        """
+        if partition is None:
+            partition = DEFAULT_PARTITIONS[size]
+        tiles = [t for p in partition for t in p]
+        if len(tiles) != len(set(tiles)) or not all(
+            0 < t < size**2 for t in tiles
+        ):
+            raise ValueError("invalid partition")
+
+        return PatternDatabase(
+            size,
+            partition,
+            [PatternDatabase.build_table(size, p) for p in partition],
+        )
+
+    @staticmethod
+    def build_table(size: int, pattern: Sequence[int]) -> bytearray:
+        """
+        Return table of pattern costs.
+
+        Abstract state is encoded as (pattern index << bits) | empty,
+        moves of the empty square to non-pattern tile cost 0,
+        moves of pattern tiles cost 1 - so the search is 0-1 BFS
+        processed by layers.
+        """
+        cells = size**2
+        bits = (cells - 1).bit_length()
+        mask = (1 << bits) - 1
+        k = len(pattern)
+
+        neighbors = []
+        for c in range(cells):
+            r, col = divmod(c, size)
+            n = []
+            if r > 0:
+                n.append(c - size)
+            if r < size - 1:
+                n.append(c + size)
+            if col > 0:
+                n.append(c - 1)
+            if col < size - 1:
+                n.append(c + 1)
+            neighbors.append(n)
+        shifts = [bits * (i + 1) for i in range(k)]
+
+        table = bytearray(b"\xff") * (1 << (bits * k))
+        visited = bytearray(1 << (bits * (k + 1)))
+
+        goal = 0
+        for i, t in enumerate(pattern):
+            goal |= t << shifts[i]
+        # empty square at 0 in the goal
+        visited[goal] = 1
+        layer = [goal]
+        depth = 0
+
+        while layer:
+            next_layer = []
+            i = 0
+            while i < len(layer):
+                code = layer[i]
+                i += 1
+                index = code >> bits
+                if table[index] == UNKNOWN:
+                    table[index] = depth
+
+                empty = code & mask
+                occupied = {(code >> s) & mask: s for s in shifts}
+                base = code & ~mask
+                for n in neighbors[empty]:
+                    s = occupied.get(n)
+                    if s is None:
+                        # moving other tile, empty square moves for free
+                        nc = base | n
+                        if not visited[nc]:
+                            visited[nc] = 1
+                            layer.append(nc)
+                    else:
+                        # moving pattern tile from n to empty
+                        nc = (base + ((empty - n) << s)) | n
+                        if not visited[nc]:
+                            next_layer.append(nc)
+
+            depth += 1
+            if depth >= UNKNOWN:
+                raise RuntimeError("pattern costs do not fit into bytes")
+            layer = []
+            for code in next_layer:
+                if not visited[code]:
+                    visited[code] = 1
+                    layer.append(code)
+        return table
+
+    def estimate(self, squares: Sequence[int]) -> int:
+        """Return sum of pattern costs of given squares."""
+        pos = [0] * len(squares)
+        for i, t in enumerate(squares):
+            pos[t] = i
+        bits = self.bits
+        h = 0
+        for pattern, table in zip(self.patterns, self.tables):
+            index = 0
+            shift = 0
+            for t in pattern:
+                index |= pos[t] << shift
+                shift += bits
+            h += table[index]
+        return h
+
+    def slide_change(
+        self, squares: Sequence[int], tile: int, src: int, dst: int
+    ) -> int:
+        """Return change of the estimate after tile slides from src to dst."""
+        for pattern, table in zip(self.patterns, self.tables):
+            if tile in pattern:
+                break
+        else:
+            return 0
+
+        bits = self.bits
+        index = 0
+        shift = 0
+        for t in pattern:
+            if t == tile:
+                tile_shift = shift
+            index |= squares.index(t) << shift
+            shift += bits
+        moved = index + ((dst - src) << tile_shift)
+        return table[moved] - table[index]
+
+    # =======
+    # STORAGE
+    # =======
+    # file format:
+    #   magic, size, number of patterns,
+    #   for each pattern: number of tiles and tiles,
+    #   tables of all patterns (each of 2 ** (bits * len(pattern)) bytes)
+
+    def save(self, file_name: str) -> None:
+        """Save database to the file."""
+        with open(file_name, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("BB", self.size, len(self.patterns)))
+            for p in self.patterns:
+                file.write(struct.pack(f"B{len(p)}B", len(p), *p))
+            for t in self.tables:
+                file.write(t)
+
+    @staticmethod
+    def load(file_name: str) -> "PatternDatabase":
+        """Load database from the file, tables are memory-mapped."""
+        with open(file_name, "rb") as file:
+            mm = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        if mm[:4] != MAGIC:
+            mm.close()
+            raise ValueError("not a pattern database file")
+        size, count = struct.unpack_from("BB", mm, 4)
+        offset = 6
+        patterns: List[Tuple[int, ...]] = []
+        for _ in range(count):
+            k = mm[offset]
+            patterns.append(tuple(mm[offset + 1 : offset + 1 + k]))
+            offset += 1 + k
+
+        bits = (size**2 - 1).bit_length()
+        view = memoryview(mm)
+        tables = []
+        for p in patterns:
+            length = 1 << (bits * len(p))
+            tables.append(view[offset : offset + length])
+            offset += length
+
+        pdb = PatternDatabase(size, patterns, tables)
+        pdb._mmap = mm
+        return pdb
+
+    @staticmethod
+    def load_or_build(
+        file_name: str,
+        size: int,
+        partition: Optional[Sequence[Tuple[int, ...]]] = None,
+    ) -> "PatternDatabase":
+        """Load database from the file, if it does not exist build and save it."""
+        if not exists(file_name):
+            PatternDatabase.build(size, partition).save(file_name)
+        return PatternDatabase.load(file_name)
+
+
+class PDBNPuzzle(NPuzzle):
+    """NPuzzle with additive pattern database heuristic."""
+
+    def __init__(
+        self, init: Union[PuzzleState, int], pdb: PatternDatabase
+    ) -> None:
+        NPuzzle.__init__(self, init)
+        if pdb.size != self.initial.size:
+            raise ValueError("pattern database of different size")
+        self.pdb: PatternDatabase = pdb
+
+    def estimate(self, state: PuzzleState) -> int:
+        """Compute the sum of pattern costs from the pattern database."""
+        return self.pdb.estimate(state.squares)
+
+    def estimate_delta(
+        self, state: PuzzleState, action: int, parent_h: int
+    ) -> int:
+        """Update only the cost of the pattern containing the sliding tile."""
+        empty = state.empty
+        src = empty - PuzzleState.offset(state.size, action)
+        return parent_h + self.pdb.slide_change(
+            state.squares, state.squares[src], src, empty
+        )
+
+
+class OptPDBNPuzzle(PDBNPuzzle, Optimal):
+    """PDBNPuzzle with optimal cost."""
+
+    def __init__(
+        self,
+        init: Union[PuzzleState, int],
+        pdb: PatternDatabase,
+        opt_cost: int,
+    ) -> None:
+        PDBNPuzzle.__init__(self, init, pdb)
+        self._opt_cost = opt_cost
+
+    def optimal_cost(self) -> int:
+        return self._opt_cost
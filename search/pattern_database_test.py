@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+from pattern_database import PatternDatabase, OptPDBNPuzzle
+from problems import NPuzzle, PuzzleState
+from idastar_test import run_test
+from os.path import dirname
+from os.path import join as path_join
+from time import perf_counter
+import random
+
+# built databases are stored next to this script
+PDB_FILE = path_join(dirname(__file__), "npuzzle{}.pdb")
+
+
+def check_dominance(pdb: PatternDatabase, count: int = 1000) -> bool:
+    """
+    Return whether pattern database estimate is at least
+    the taxicab distance on random states.
+    """
+    prob = NPuzzle(pdb.size)
+    for _ in range(count):
+        state = PuzzleState.random(pdb.size, 100)
+        if pdb.estimate(state.squares) < prob.estimate(state):
+            print("pattern database is weaker than taxicab heuristic")
+            print(state)
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    puzzles = {
+        3: [
+            # shortest solution = 28 steps
+            (PuzzleState.reversed(3), 28),
+        ],
+        4: [
+            # shortest solution = 46 steps
+            # IDA* with 5-5-5 database explores about 160,000 states
+            (
+                PuzzleState(
+                    [2, 11, 14, 3, 8, 6, 7, 13, 0, 5, 4, 15, 1, 9, 10, 12]
+                ),
+                46,
+            ),
+            # shortest solution = 44 steps
+            # IDA* with 5-5-5 database explores about 140,000 states
+            (
+                PuzzleState(
+                    [12, 9, 6, 2, 10, 5, 4, 3, 1, 8, 11, 14, 7, 0, 13, 15]
+                ),
+                44,
+            ),
+        ],
+    }
+
+    for size, cases in puzzles.items():
+        print(f"Loading pattern database for size {size}")
+        start = perf_counter()
+        pdb = PatternDatabase.load_or_build(PDB_FILE.format(size), size)
+        print("loaded in {:.4f} s".format(perf_counter() - start))
+        if check_dominance(pdb):
+            print("pattern database dominates taxicab heuristic")
+        print()
+
+        for state, optimal_cost in cases:
+            print(state)
+            run_test(
+                OptPDBNPuzzle(state, pdb, optimal_cost), prune=NPuzzle.undoes
+            )
+            print()
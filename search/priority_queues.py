@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+from array import array
+from typing import List
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of int ids (0, 1, ...) with decrease-key.
+
+    Ids are usually indices of nodes stored elsewhere,
+    keys are kept in array('d') indexed by id,
+    heap in array('q') and position of each id in the heap
+    in array('q') (-1 if not in the heap).
+    Buffers grow as needed, no objects are allocated per push.
+
+    Main methods:
+    - push
+    - pop
+    - decrease_key
+    - update (push or decrease_key)
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.heap = array("q")
+        self.pos = array("q", [-1]) * capacity
+        self.keys = array("d", [0.0]) * capacity
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __bool__(self) -> bool:
+        return len(self.heap) > 0
+
+    def __contains__(self, id: int) -> bool:
+        return id < len(self.pos) and self.pos[id] >= 0
+
+    def _reserve(self, id: int) -> None:
+        if id >= len(self.pos):
+            grow = max(id + 1, 2 * len(self.pos)) - len(self.pos)
+            self.pos.extend(array("q", [-1]) * grow)
+            self.keys.extend(array("d", [0.0]) * grow)
+
+    def key(self, id: int) -> float:
+        """Return key of id in the heap."""
+        return self.keys[id]
+
+    def peek(self) -> int:
+        """Return id with minimal key."""
+        return self.heap[0]
+
+    def push(self, id: int, key: float) -> None:
+        """Push id, that is not in the heap."""
+        self._reserve(id)
+        self.keys[id] = key
+        self.heap.append(id)
+        self.pos[id] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self) -> int:
+        """Remove and return id with minimal key."""
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.pos[top] = -1
+        if heap:
+            heap[0] = last
+            self.pos[last] = 0
+            self._sift_down(0)
+        return top
+
+    def decrease_key(self, id: int, key: float) -> None:
+        """Set smaller key of id in the heap."""
+        self.keys[id] = key
+        self._sift_up(self.pos[id])
+
+    def update(self, id: int, key: float) -> bool:
+        """
+        Push id or decrease its key if the new key is smaller.
+        Return whether heap changed.
+        """
+        if id in self:
+            if key < self.keys[id]:
+                self.decrease_key(id, key)
+                return True
+            return False
+        self.push(id, key)
+        return True
+
+    def _sift_up(self, i: int) -> None:
+        heap, pos, keys = self.heap, self.pos, self.keys
+        id = heap[i]
+        key = keys[id]
+        while i > 0:
+            parent = (i - 1) >> 1
+            pid = heap[parent]
+            if keys[pid] <= key:
+                break
+            heap[i] = pid
+            pos[pid] = i
+            i = parent
+        heap[i] = id
+        pos[id] = i
+
+    def _sift_down(self, i: int) -> None:
+        heap, pos, keys = self.heap, self.pos, self.keys
+        n = len(heap)
+        id = heap[i]
+        key = keys[id]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            cid = heap[child]
+            if key <= keys[cid]:
+                break
+            heap[i] = cid
+            pos[cid] = i
+            i = child
+        heap[i] = id
+        pos[id] = i
+
+
+class BucketQueue:
+    """
+    Bucket (Dial's) priority queue of int ids with small non-negative int keys.
+
+    Bucket of each key is array('q') used as a stack
+    (so nodes of the same key are popped depth-first).
+    Decrease-key pushes id into new bucket and the old entry
+    is skipped when reached (key of id is kept in array('q')).
+    Push and pop are O(1) amortized, given keys grow monotonically
+    as in UCS or A* with consistent heuristic.
+
+    Main methods:
+    - push
+    - pop
+    - decrease_key
+    - update (push or decrease_key)
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.buckets: List[array] = []
+        # key of the id in the queue, -1 if not in the queue
+        self.keys = array("q", [-1]) * capacity
+        self.current = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __contains__(self, id: int) -> bool:
+        return id < len(self.keys) and self.keys[id] >= 0
+
+    def key(self, id: int) -> int:
+        """Return key of id in the queue."""
+        return self.keys[id]
+
+    def push(self, id: int, key: int) -> None:
+        """Push id, that is not in the queue."""
+        if id >= len(self.keys):
+            grow = max(id + 1, 2 * len(self.keys)) - len(self.keys)
+            self.keys.extend(array("q", [-1]) * grow)
+        self.keys[id] = key
+        self._append(id, key)
+        self.size += 1
+
+    def _append(self, id: int, key: int) -> None:
+        buckets = self.buckets
+        while len(buckets) <= key:
+            buckets.append(array("q"))
+        buckets[key].append(id)
+        if key < self.current:
+            self.current = key
+
+    def pop(self) -> int:
+        """Remove and return id with minimal key."""
+        if not self.size:
+            raise IndexError("pop from empty queue")
+        buckets, keys = self.buckets, self.keys
+        while True:
+            bucket = buckets[self.current]
+            while bucket:
+                id = bucket.pop()
+                if keys[id] == self.current:
+                    keys[id] = -1
+                    self.size -= 1
+                    return id
+                # stale entry after decrease_key
+            self.current += 1
+
+    def decrease_key(self, id: int, key: int) -> None:
+        """Set smaller key of id in the queue."""
+        self.keys[id] = key
+        self._append(id, key)
+
+    def update(self, id: int, key: int) -> bool:
+        """
+        Push id or decrease its key if the new key is smaller.
+        Return whether queue changed.
+        """
+        if id in self:
+            if key < self.keys[id]:
+                self.decrease_key(id, key)
+                return True
+            return False
+        self.push(id, key)
+        return True
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from priority_queues import IndexedHeap, BucketQueue
+from time import perf_counter
+from typing import Tuple
+import random
+
+
+def run_test(
+    queue_class: type, *, steps: int = 100_000, verbose: bool = True
+) -> Tuple[bool, float]:
+    """
+    Run random pushes, decreases and pops on the queue,
+    compare them with dict of keys and return correctness and time.
+
+    Keys are non-decreasing ints (as in UCS with int costs),
+    so any queue can be tested.
+    Call with verbose=False to turn off prints.
+    """
+    rng = random.Random(0)
+    queue = queue_class()
+    expected = {}
+    current = 0
+    correct = True
+
+    start = perf_counter()
+    for _ in range(steps):
+        if rng.random() < 0.55 or not expected:
+            id = rng.randrange(steps // 10)
+            key = current + rng.randrange(20)
+            changed = queue.update(id, key)
+            old = expected.get(id)
+            if changed != (old is None or key < old):
+                correct = False
+            if old is None or key < old:
+                expected[id] = key
+        else:
+            id = queue.pop()
+            current = min(expected.values())
+            if expected.pop(id, None) != current:
+                correct = False
+        if len(queue) != len(expected):
+            correct = False
+    elapsed = perf_counter() - start
+
+    if verbose:
+        print(
+            "{} in {:.4f} s".format("correct" if correct else "WRONG", elapsed)
+        )
+    return correct, elapsed
+
+
+if __name__ == "__main__":
+    for q in [IndexedHeap, BucketQueue]:
+        print(f"Testing {q.__name__}")
+        run_test(q)
+        print()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
-from search_templates import Problem, HeuristicProblem, Optimal
+from search_templates import (
+    Problem,
+    HeuristicProblem,
+    IncrementalEstimate,
+    Optimal,
+    ReversibleProblem,
+)
 from collections import namedtuple
 import random
 from enum import IntEnum, Enum
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
 
-class Empty(Problem, Optimal):
+class Empty(ReversibleProblem, Optimal):
     """
     Model search problem testing goal checking.
     """
@@ -26,6 +32,12 @@ class Empty(Problem, Optimal):
     def cost(self, state, action) -> float:
         raise AssertionError("should not be called")
 
+    def goal_states(self) -> list:
+        return [0]
+
+    def predecessors(self, state) -> list:
+        return []
+
     @classmethod
     def optimal_cost(cls) -> int:
         return 0
@@ -52,7 +64,7 @@ class Unsolvable(Problem):
         return 1
 
 
-class Graph(Optimal, Problem):
+class Graph(Optimal, ReversibleProblem):
     """Model search problem testing graph."""
 
     Edge = namedtuple("Edge", ["dest", "weight"])
@@ -87,12 +99,21 @@ class Graph(Optimal, Problem):
     def cost(self, state, action: Edge) -> int:
         return action.weight
 
+    def goal_states(self) -> List[int]:
+        return [4]
+
+    def predecessors(self, state) -> List[Tuple[int, Edge]]:
+        # undirected graph - edge to the state is in adjacency of its source
+        return [
+            (e.dest, Graph.Edge(state, e.weight)) for e in self.adj[state]
+        ]
+
     @classmethod
     def optimal_cost(cls) -> int:
         return 6
 
 
-class Cube(Optimal, HeuristicProblem):
+class Cube(Optimal, IncrementalEstimate, HeuristicProblem):
     """
     A simple model search problem involving movement in a cube.
 
@@ -112,6 +133,8 @@ class Cube(Optimal, HeuristicProblem):
     """
 
     CPos = namedtuple("CPos", "x y z")
+    # nested name, so the states can be pickled (e.g. by HDAStar)
+    CPos.__qualname__ = "Cube.CPos"
 
     def initial_state(self) -> CPos:
         return Cube.CPos(1000, 1000, 1000)
@@ -151,12 +174,16 @@ class Cube(Optimal, HeuristicProblem):
         """
         return 1000 * state.x
 
+    def estimate_delta(self, state: CPos, action: int, parent_h: int) -> int:
+        """Only decreasing X changes the estimate."""
+        return parent_h - 1000 if action == 1 else parent_h
+
     @classmethod
     def optimal_cost(cls) -> int:
         return 1_000_000
 
 
-class Grid(Optimal, Problem):
+class Grid(Optimal, ReversibleProblem):
     """
     A simple puzzle involving movement on a grid.
 
@@ -202,12 +229,20 @@ class Grid(Optimal, Problem):
     def cost(self, state: GPos, action: Move) -> int:
         return action.cost
 
+    def goal_states(self) -> List[GPos]:
+        return [Grid.GPos(80, 80)]
+
+    def predecessors(self, state: GPos) -> List[Tuple[GPos, Move]]:
+        return [
+            (state.plus((-m.vector[0], -m.vector[1])), m) for m in Grid.Move
+        ]
+
     @classmethod
     def optimal_cost(cls) -> int:
         return 120
 
 
-class Line(Optimal, Problem):
+class Line(Optimal, ReversibleProblem):
     """
     A simple model search problem.
     """
@@ -229,6 +264,12 @@ class Line(Optimal, Problem):
     def cost(self, state: int, action: int) -> int:
         return Line._cost[action]
 
+    def goal_states(self) -> List[int]:
+        return [101]
+
+    def predecessors(self, state: int) -> List[Tuple[int, int]]:
+        return [(state - a, a) for a in (1, 2, 3)]
+
     @classmethod
     def optimal_cost(cls) -> int:
         return 152
@@ -275,7 +316,7 @@ class PuzzleState:
         state = PuzzleState(list(range(size**2)))
         for _ in range(num):
             l = state.possible_directions()
-            state.slide(random.choice(l))
+            state = state.slide(random.choice(l))
         return state
 
     def __eq__(self, __o: object) -> bool:
@@ -297,22 +338,26 @@ class PuzzleState:
 
         return dirs
 
-    def slide(self, dir: int) -> "PuzzleState":
-        """
-        Apply slide in direction to a copy of the state
-        and return resulting state.
-        """
+    @staticmethod
+    def offset(size: int, dir: int) -> int:
+        """Return offset from the sliding tile to the empty square for direction."""
         if dir == 0:
-            d = -1
+            return -1
         elif dir == 1:
-            d = 1
+            return 1
         elif dir == 2:
-            d = -self.size
+            return -size
         elif dir == 3:
-            d = self.size
+            return size
         else:
             raise ValueError("invalid direction")
 
+    def slide(self, dir: int) -> "PuzzleState":
+        """
+        Apply slide in direction to a copy of the state
+        and return resulting state.
+        """
+        d = PuzzleState.offset(self.size, dir)
         a = self.squares.copy()
         a[self.empty] = a[self.empty - d]
         a[self.empty - d] = 0
@@ -336,7 +381,7 @@ class PuzzleState:
         )
 
 
-class NPuzzle(HeuristicProblem):
+class NPuzzle(IncrementalEstimate, HeuristicProblem):
     """
     The classic sliding block puzzle, i.e. the 8-puzzle or 15-puzzle.
 
@@ -366,12 +411,21 @@ class NPuzzle(HeuristicProblem):
 
     new NPuzzle(4);
 
-    This is much harder, and requires pattern databases to solve effectively.
+    This is much harder, and requires pattern databases to solve effectively
+    (see PDBNPuzzle in pattern_database.py).
+
+    With symmetric=True, states symmetric along the main diagonal
+    (with tiles relabeled by the reflection, so the goal maps to itself)
+    have the same canonical state, so search engines detect them
+    as duplicates. It pays off when the initial state is symmetric too
+    (like the reversed one), for others it mostly slows the search.
     """
 
     Dir = type("Dir", (), dict(Left=0, Right=1, Up=2, Down=3))
 
-    def __init__(self, init: Union[PuzzleState, int]) -> None:
+    def __init__(
+        self, init: Union[PuzzleState, int], symmetric: bool = False
+    ) -> None:
         if isinstance(init, PuzzleState):
             self.initial = init
         elif isinstance(init, int):
@@ -379,6 +433,9 @@ class NPuzzle(HeuristicProblem):
         else:
             raise ValueError("invalid initial parameter")
         self.dists = NPuzzle.get_dists(self.initial.size)
+        self.transposition: Optional[List[int]] = (
+            NPuzzle.get_transposition(self.initial.size) if symmetric else None
+        )
 
     @staticmethod
     def get_dists(size: int) -> List[List[int]]:
@@ -391,6 +448,16 @@ class NPuzzle(HeuristicProblem):
             dists.append(di)
         return dists
 
+    @staticmethod
+    def get_transposition(size: int) -> List[int]:
+        """Return reflection of each square (and tile) along the diagonal."""
+        return [(i % size) * size + i // size for i in range(size**2)]
+
+    @staticmethod
+    def undoes(action: int, previous: Optional[int]) -> bool:
+        """Return whether action slides back the tile moved by previous action."""
+        return previous is not None and action ^ 1 == previous
+
     def initial_state(self) -> PuzzleState:
         return self.initial
 
@@ -406,6 +473,17 @@ class NPuzzle(HeuristicProblem):
     def cost(self, state: PuzzleState, action: int) -> int:
         return 1
 
+    def canonical(self, state: PuzzleState) -> PuzzleState:
+        """Return the smaller (as list) of the state and its transposition."""
+        t = self.transposition
+        if t is None:
+            return state
+        squares = state.squares
+        transposed = [t[squares[i]] for i in t]
+        if transposed < squares:
+            return PuzzleState(transposed, state.size, t[state.empty])
+        return state
+
     def estimate(self, state: PuzzleState) -> int:
         """Compute the sum of the taxicab distances of tiles from their goal positions."""
         sum = 0
@@ -414,12 +492,162 @@ class NPuzzle(HeuristicProblem):
                 sum += self.dists[s][i]
         return sum
 
+    def estimate_delta(
+        self, state: PuzzleState, action: int, parent_h: int
+    ) -> int:
+        """Update the taxicab distance by the distance change of the sliding tile."""
+        empty = state.empty
+        src = empty - PuzzleState.offset(state.size, action)
+        tile = state.squares[src]
+        return parent_h - self.dists[tile][src] + self.dists[tile][empty]
+
 
 class OptNPuzzle(NPuzzle, Optimal):
     """NPuzzle with optimal cost."""
 
-    def __init__(self, init: Union[PuzzleState, int], opt_cost: int) -> None:
-        NPuzzle.__init__(self, init)
+    def __init__(
+        self,
+        init: Union[PuzzleState, int],
+        opt_cost: int,
+        symmetric: bool = False,
+    ) -> None:
+        NPuzzle.__init__(self, init, symmetric)
+        self._opt_cost = opt_cost
+
+    def optimal_cost(self) -> int:
+        return self._opt_cost
+
+
+class PackedNPuzzle(NPuzzle):
+    """
+    NPuzzle with states packed into single int (for size up to 4).
+
+    Square i holds its tile in 4 bits at 4 * i (the 15-puzzle board
+    takes exactly 64 bits), index of the empty square is stored above
+    the board. Such states are hashed and compared as plain ints,
+    so they can be stored in closed sets directly.
+
+    Slides are applied by precomputed deltas
+    and taxicab distance can be updated incrementally by estimate_change.
+
+    Use pack and unpack for conversion from and to PuzzleState.
+    """
+
+    BITS = 4
+    MASK = 0xF
+
+    def __init__(
+        self, init: Union[PuzzleState, int], symmetric: bool = False
+    ) -> None:
+        NPuzzle.__init__(self, init, symmetric)
+        size = self.initial.size
+        cells = size**2
+        if cells > 1 << PackedNPuzzle.BITS:
+            raise ValueError("too large puzzle to pack")
+        self.size: int = size
+        self.empty_shift: int = PackedNPuzzle.BITS * cells
+        self.goal: int = self.pack(PuzzleState(list(range(cells))))
+
+        # directions and source squares of sliding tile for each empty square
+        self.dirs: List[List[int]] = []
+        self.sources: List[List[int]] = []
+        for e in range(cells):
+            dirs = PuzzleState([0] * cells, size, e).possible_directions()
+            self.dirs.append(dirs)
+            src = [0] * 4
+            for d in dirs:
+                src[d] = e - PuzzleState.offset(size, d)
+            self.sources.append(src)
+
+        # change of taxicab distance of tile moving from source to empty
+        # h_change[tile][source][empty]
+        self.h_change: List[List[List[int]]] = [
+            [
+                [self.dists[t][e] - self.dists[t][s] for e in range(cells)]
+                for s in range(cells)
+            ]
+            for t in range(cells)
+        ]
+
+    def pack(self, state: PuzzleState) -> int:
+        """Return packed representation of the state."""
+        packed = state.empty << self.empty_shift
+        for i, t in enumerate(state.squares):
+            packed |= t << (PackedNPuzzle.BITS * i)
+        return packed
+
+    def unpack(self, packed: int) -> PuzzleState:
+        """Return PuzzleState of the packed state."""
+        mask = PackedNPuzzle.MASK
+        squares = [
+            (packed >> (PackedNPuzzle.BITS * i)) & mask
+            for i in range(self.size**2)
+        ]
+        return PuzzleState(squares, self.size, packed >> self.empty_shift)
+
+    def initial_state(self) -> int:
+        return self.pack(self.initial)
+
+    def actions(self, state: int) -> List[int]:
+        return self.dirs[state >> self.empty_shift]
+
+    def result(self, state: int, action: int) -> int:
+        empty = state >> self.empty_shift
+        src = self.sources[empty][action]
+        tile = (state >> (PackedNPuzzle.BITS * src)) & PackedNPuzzle.MASK
+        return (
+            state
+            + (tile << (PackedNPuzzle.BITS * empty))
+            - (tile << (PackedNPuzzle.BITS * src))
+            + ((src - empty) << self.empty_shift)
+        )
+
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    def estimate(self, state: int) -> int:
+        """Compute the sum of the taxicab distances of tiles from their goal positions."""
+        sum = 0
+        mask = PackedNPuzzle.MASK
+        for i in range(self.size**2):
+            t = (state >> (PackedNPuzzle.BITS * i)) & mask
+            if t > 0:
+                sum += self.dists[t][i]
+        return sum
+
+    def canonical(self, state: int) -> int:
+        """Return the smaller of the packed state and its transposition."""
+        t = self.transposition
+        if t is None:
+            return state
+        bits = PackedNPuzzle.BITS
+        mask = PackedNPuzzle.MASK
+        transposed = t[state >> self.empty_shift] << self.empty_shift
+        for i in range(self.size**2):
+            transposed |= t[(state >> (bits * i)) & mask] << (bits * t[i])
+        return min(state, transposed)
+
+    def estimate_change(self, state: int, action: int) -> int:
+        """Return change of the taxicab distance caused by the slide."""
+        empty = state >> self.empty_shift
+        src = self.sources[empty][action]
+        tile = (state >> (PackedNPuzzle.BITS * src)) & PackedNPuzzle.MASK
+        return self.h_change[tile][src][empty]
+
+    def estimate_delta(self, state: int, action: int, parent_h: int) -> int:
+        return parent_h + self.estimate_change(state, action)
+
+
+class OptPackedNPuzzle(PackedNPuzzle, Optimal):
+    """PackedNPuzzle with optimal cost."""
+
+    def __init__(
+        self,
+        init: Union[PuzzleState, int],
+        opt_cost: int,
+        symmetric: bool = False,
+    ) -> None:
+        PackedNPuzzle.__init__(self, init, symmetric)
         self._opt_cost = opt_cost
 
     def optimal_cost(self) -> int:
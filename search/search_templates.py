@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from abc import ABC, abstractmethod
-from typing import Union
+from inspect import signature
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 
 class Problem(ABC):
@@ -48,6 +50,20 @@ class Problem(ABC):
         """
         pass
 
+    def canonical(self, state) -> object:
+        """
+        Return canonical state of the symmetry class of a given state.
+
+        Engines detect duplicates by canonical states, so problems
+        with symmetries (mapping goals to goals and actions to actions
+        of the same cost) can override it to search only one state
+        of each class. Estimate should be the same for symmetric states.
+        Default is the state itself (no symmetries).
+
+        :rtype: State
+        """
+        return state
+
 
 class HeuristicProblem(Problem):
     """Interface for heuristic problem."""
@@ -60,6 +76,80 @@ class HeuristicProblem(Problem):
         pass
 
 
+class IncrementalEstimate(ABC):
+    """
+    Optional interface of HeuristicProblem,
+    that can update the estimate after single action.
+
+    Search engines use it instead of estimate for generated nodes.
+    """
+
+    @abstractmethod
+    def estimate_delta(self, state, action, parent_h: float) -> float:
+        """
+        Return estimate of result(state, action)
+        given that estimate of the state is parent_h.
+        """
+        pass
+
+
+class InPlaceProblem(ABC):
+    """
+    Optional interface of Problem, whose states can be changed in place.
+
+    Depth-first engines (IDAStar) use it to walk a single state
+    by perform and undo instead of creating successors by result,
+    and store only keys of states in their tables.
+    Engine undoes actions in the reverse order of performing them
+    and leaves the initial state unchanged when it returns.
+    """
+
+    @abstractmethod
+    def perform(self, state, action) -> None:
+        """Apply the action to the state in place."""
+        pass
+
+    @abstractmethod
+    def undo(self, state, action) -> None:
+        """Revert the action, that was the last one performed on the state."""
+        pass
+
+    @abstractmethod
+    def key(self, state) -> object:
+        """
+        Return compact hashable copy of the state,
+        keys of two states are equal iff the states are equal.
+        """
+        pass
+
+
+class ReversibleProblem(Problem):
+    """
+    Interface for problem with reverse model, used by bidirectional search.
+
+    Note: cost of reversed step is cost(predecessor, action).
+    """
+
+    @abstractmethod
+    def goal_states(self) -> list:
+        """
+        Return list of all goal states.
+
+        :rtype: list of States
+        """
+        pass
+
+    @abstractmethod
+    def predecessors(self, state) -> list:
+        """
+        Return list of all (predecessor, action) pairs
+        such that result(predecessor, action) == state.
+
+        :rtype: list of (State, Action)
+        """
+        pass
+
+
 class Optimal(ABC):
     @abstractmethod
     def optimal_cost(self) -> float:
@@ -72,6 +162,9 @@ class Solution:
     Stores sequence of actions leading from some problem state
     to stored goal_state
     for stored path_cost
+
+    Result of is_valid is cached for the last verified problem
+    (actions and path_cost are not expected to change afterwards).
     """
 
     def __init__(
@@ -80,24 +173,33 @@ class Solution:
         self.actions = actions
         self.goal_state = goal_state
         self.path_cost = path_cost
+        # (problem, validity) of the last verification
+        self._verified: Optional[Tuple[Problem, bool]] = None
 
     def is_valid(self, prob: Problem) -> bool:
         """
         Return whether sequence of actions leads to goal_state
         and whether the path_cost is correct.
         """
-        state = prob.initial_state()
-        cost = 0
+        if self._verified is not None and self._verified[0] is prob:
+            return self._verified[1]
 
-        for action in self.actions:
-            cost += prob.cost(state, action)
-            state = prob.result(state, action)
+        return SolutionVerifier(prob, self).is_valid()
 
-        return (
-            state == self.goal_state
-            and prob.is_goal(state)
-            and cost == self.path_cost
-        )
+    @staticmethod
+    def from_path(
+        actions: list, costs: list, goal_state: object
+    ) -> "Solution":
+        """
+        Return Solution of actions with given costs leading to goal_state.
+
+        Costs are summed in order of actions, so the path cost
+        is the same float as the one computed by is_valid.
+        """
+        path_cost = 0
+        for c in costs:
+            path_cost += c
+        return Solution(actions, goal_state, path_cost)
 
     def is_optimal(self, prob: Problem) -> Union[None, bool]:
         """Return whether solution is optimal (None for unknown)."""
@@ -124,3 +226,407 @@ class Solution:
         else:
             print("optimal cost is {}".format(prob.optimal_cost()))
         return True
+
+
+class SolutionVerifier:
+    """
+    Incremental verifier of a Solution.
+
+    Each step replays one action of the solution, so the verification
+    can run alongside the execution of the solution
+    (e.g. by an agent, one action per step).
+    Result is stored in the solution, so later calls
+    of solution.is_valid(prob) do not replay it again.
+
+    Main methods:
+    - step - replay next action and return the reached state
+    - done - whether all actions were replayed
+    - is_valid - replay the rest and return validity
+    """
+
+    def __init__(self, prob: Problem, solution: Solution) -> None:
+        self.prob = prob
+        self.solution = solution
+        self.state = prob.initial_state()
+        self.cost = 0
+        self.steps = 0
+
+    def done(self) -> bool:
+        return self.steps >= len(self.solution.actions)
+
+    def step(self) -> object:
+        """Replay next action of the solution and return the reached state."""
+        action = self.solution.actions[self.steps]
+        self.cost += self.prob.cost(self.state, action)
+        self.state = self.prob.result(self.state, action)
+        self.steps += 1
+        return self.state
+
+    def is_valid(self) -> bool:
+        """
+        Replay remaining actions and return whether the solution
+        leads to its goal_state for its path_cost.
+        """
+        while not self.done():
+            self.step()
+        solution = self.solution
+        valid = (
+            self.state == solution.goal_state
+            and self.prob.is_goal(self.state)
+            and self.cost == solution.path_cost
+        )
+        solution._verified = (self.prob, valid)
+        return valid
+
+
+def parent_path(
+    parent: Dict[object, Optional[tuple]], state: object
+) -> Tuple[list, list]:
+    """
+    Return actions and their costs on the path to the state
+    from parent map: state -> (parent state, action, cost, ...),
+    None for the initial state.
+    """
+    actions = []
+    costs = []
+    while parent[state] is not None:
+        state, action, c = parent[state][:3]
+        actions.append(action)
+        costs.append(c)
+    actions.reverse()
+    costs.reverse()
+    return actions, costs
+
+
+def get_canonical(prob: Problem) -> Optional[Callable[[object], object]]:
+    """
+    Return canonical method of the problem (seen through StatsProblem)
+    or None if the problem does not override Problem.canonical,
+    so engines skip canonicalization of problems without symmetries.
+    """
+    if isinstance(prob, StatsProblem):
+        prob = prob.prob
+    if type(prob).canonical is Problem.canonical:
+        return None
+    return prob.canonical
+
+
+def replay_path(
+    prob: Problem, parent: Dict[object, Optional[tuple]], state: object
+) -> Tuple[list, list, object]:
+    """
+    Return actions, their costs and the reached state of the path
+    to the symmetry class of the state from parent map of canonical
+    states: state -> (parent state, action, cost, ...),
+    None for the initial state.
+
+    Actions of the parent map were applied to canonical states,
+    so the path is replayed from the initial state of the problem
+    by the cheapest action reaching the next canonical state.
+    Raise ValueError if no action reaches it (canonical is not
+    consistent with actions).
+    """
+    chain = [state]
+    while parent[state] is not None:
+        state = parent[state][0]
+        chain.append(state)
+    chain.reverse()
+
+    state = prob.initial_state()
+    actions = []
+    costs = []
+    for step, target in enumerate(chain[1:], 1):
+        best = None
+        for action in prob.actions(state):
+            child = prob.result(state, action)
+            if prob.canonical(child) == target:
+                c = prob.cost(state, action)
+                if best is None or c < best[2]:
+                    best = (child, action, c)
+        if best is None:
+            raise ValueError(
+                f"no action reaches canonical state {target} "
+                f"at step {step} of the path"
+            )
+        state, action, c = best
+        actions.append(action)
+        costs.append(c)
+    return actions, costs, state
+
+
+class StateInterner:
+    """
+    Hash-consing table of states.
+
+    Every distinct state gets a stable small int id (0, 1, ...)
+    and one canonical instance, so engines can keep ids in parent
+    pointers, closed sets and arrays indexed by id instead of states,
+    and equal states created by result() can be dropped.
+
+    Main methods:
+    - intern - return id of the state (new id for unseen state)
+    - get - return id of the state or None if it was not interned
+    - state - return canonical state of the id
+    - canonical - return canonical instance of the state (interns it)
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[object, int] = {}
+        self.states: List[object] = []
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, state: object) -> bool:
+        return state in self.ids
+
+    def intern(self, state: object) -> int:
+        id = self.ids.get(state)
+        if id is None:
+            id = len(self.states)
+            self.ids[state] = id
+            self.states.append(state)
+        return id
+
+    def get(self, state: object) -> Optional[int]:
+        return self.ids.get(state)
+
+    def state(self, id: int) -> object:
+        return self.states[id]
+
+    def canonical(self, state: object) -> object:
+        """
+        Return the interned instance equal to the state.
+
+        Note: unseen state is interned (gets new id) as a side effect.
+        """
+        return self.states[self.intern(state)]
+
+
+class SearchStats:
+    """
+    Statistics of a single search run.
+
+    Calls to problem methods are counted by StatsProblem proxy:
+    - expanded - calls to actions (or predecessors)
+    - generated - calls to result or perform (or generated predecessors)
+    - cost_calls - calls to cost
+    - estimate_calls and estimate_time - calls to estimate (or estimate_delta)
+
+    Engines accepting stats parameter also record:
+    - duplicates - generated states that were already seen
+    - max_frontier - peak size of the frontier
+    - max_closed - peak size of the closed set
+
+    wall_time is measured by search_with_stats,
+    budget_exceeded is set if the search exceeded its memory budget
+    (memory_budget.BudgetExceeded),
+    spilled is number of states moved to disk by the engine.
+    """
+
+    def __init__(self) -> None:
+        self.expanded: int = 0
+        self.generated: int = 0
+        self.cost_calls: int = 0
+        self.duplicates: int = 0
+        self.max_frontier: int = 0
+        self.max_closed: int = 0
+        self.estimate_calls: int = 0
+        self.estimate_time: float = 0  # seconds
+        self.wall_time: float = 0  # seconds
+        self.budget_exceeded: bool = False
+        self.spilled: int = 0
+
+    def duplicate(self) -> None:
+        """Record hit of already seen state."""
+        self.duplicates += 1
+
+    def frontier(self, size: int) -> None:
+        """Record current frontier size."""
+        if size > self.max_frontier:
+            self.max_frontier = size
+
+    def closed(self, size: int) -> None:
+        """Record current closed set size."""
+        if size > self.max_closed:
+            self.max_closed = size
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def report(self) -> None:
+        """Print collected statistics."""
+        print(f"expanded {self.expanded}, generated {self.generated} nodes")
+        print(
+            f"duplicates {self.duplicates},"
+            f" max frontier {self.max_frontier},"
+            f" max closed {self.max_closed}"
+        )
+        if self.estimate_calls:
+            print(
+                "heuristic called {} times in {:.4f} s".format(
+                    self.estimate_calls, self.estimate_time
+                )
+            )
+        if self.spilled:
+            print(f"{self.spilled} states spilled to disk")
+        if self.budget_exceeded:
+            print("memory budget exceeded")
+        if self.wall_time:
+            per_sec = self.expanded / self.wall_time
+            print(f"{per_sec:.1f} expanded nodes/sec")
+
+
+class StatsProblem(Problem):
+    """
+    Proxy of any Problem counting calls to its methods into SearchStats.
+
+    Proxy implements the same interfaces as the wrapped problem
+    (HeuristicProblem, IncrementalEstimate, InPlaceProblem,
+    ReversibleProblem, Optimal),
+    so isinstance checks of engines see through it.
+    Other attributes are forwarded to the wrapped problem.
+    """
+
+    # (proxy class, implemented interfaces) -> combined class
+    _classes: Dict[Tuple[type, Tuple[type, ...]], type] = {}
+
+    def __new__(cls, prob: Problem, stats: SearchStats) -> "StatsProblem":
+        interfaces = tuple(i for i in _STATS_MIXINS if isinstance(prob, i))
+        if not interfaces:
+            return super().__new__(cls)
+        combined = StatsProblem._classes.get((cls, interfaces))
+        if combined is None:
+            combined = type(
+                cls.__name__,
+                (cls, *(_STATS_MIXINS[i] for i in interfaces)),
+                {"__module__": cls.__module__},
+            )
+            StatsProblem._classes[(cls, interfaces)] = combined
+        return super().__new__(combined)
+
+    def __init__(self, prob: Problem, stats: SearchStats) -> None:
+        self.prob: Problem = prob
+        self.stats: SearchStats = stats
+
+    def __reduce__(self):
+        # combined classes are not importable
+        return StatsProblem, (self.prob, self.stats)
+
+    def __getattr__(self, name: str):
+        # called only for attributes not found on the proxy
+        return getattr(self.prob, name)
+
+    def initial_state(self) -> object:
+        return self.prob.initial_state()
+
+    def actions(self, state) -> list:
+        self.stats.expanded += 1
+        return self.prob.actions(state)
+
+    def result(self, state, action) -> object:
+        self.stats.generated += 1
+        return self.prob.result(state, action)
+
+    def is_goal(self, state) -> bool:
+        return self.prob.is_goal(state)
+
+    def cost(self, state, action) -> float:
+        self.stats.cost_calls += 1
+        return self.prob.cost(state, action)
+
+    def canonical(self, state) -> object:
+        # default of Problem would hide the wrapped one from __getattr__
+        return self.prob.canonical(state)
+
+
+class _StatsHeuristic(HeuristicProblem):
+    def estimate(self, state) -> float:
+        stats = self.stats
+        stats.estimate_calls += 1
+        start = perf_counter()
+        h = self.prob.estimate(state)
+        stats.estimate_time += perf_counter() - start
+        return h
+
+
+class _StatsIncremental(IncrementalEstimate):
+    def estimate_delta(self, state, action, parent_h: float) -> float:
+        stats = self.stats
+        stats.estimate_calls += 1
+        start = perf_counter()
+        h = self.prob.estimate_delta(state, action, parent_h)
+        stats.estimate_time += perf_counter() - start
+        return h
+
+
+class _StatsReversible(ReversibleProblem):
+    def goal_states(self) -> list:
+        return self.prob.goal_states()
+
+    def predecessors(self, state) -> list:
+        stats = self.stats
+        stats.expanded += 1
+        preds = self.prob.predecessors(state)
+        stats.generated += len(preds)
+        return preds
+
+
+class _StatsInPlace(InPlaceProblem):
+    def perform(self, state, action) -> None:
+        self.stats.generated += 1
+        self.prob.perform(state, action)
+
+    def undo(self, state, action) -> None:
+        self.prob.undo(state, action)
+
+    def key(self, state) -> object:
+        return self.prob.key(state)
+
+
+class _StatsOptimal(Optimal):
+    def optimal_cost(self) -> float:
+        return self.prob.optimal_cost()
+
+
+# interface -> its counting methods, mixed into StatsProblem
+_STATS_MIXINS: Dict[type, type] = {
+    HeuristicProblem: _StatsHeuristic,
+    IncrementalEstimate: _StatsIncremental,
+    InPlaceProblem: _StatsInPlace,
+    ReversibleProblem: _StatsReversible,
+    Optimal: _StatsOptimal,
+}
+
+
+def search_with_stats(
+    search: Callable[..., Optional[Solution]], prob: Problem, *args, **kwargs
+) -> Tuple[Optional[Solution], SearchStats]:
+    """
+    Run search on the problem and return its Solution with SearchStats.
+
+    If the search accepts stats parameter it gets the stats object
+    and the problem as is (engine is expected to wrap it by StatsProblem),
+    otherwise it gets StatsProblem proxy of the problem.
+
+    If the search exceeds its memory budget (BudgetExceeded), None is
+    returned with partial stats and stats.budget_exceeded set.
+    Other errors, including MemoryError, are propagated.
+    """
+    # only engines with memory budget need the module
+    from memory_budget import BudgetExceeded
+
+    stats = SearchStats()
+    if "stats" in signature(search).parameters:
+        kwargs["stats"] = stats
+    else:
+        prob = StatsProblem(prob, stats)
+
+    start = perf_counter()
+    try:
+        solution = search(prob, *args, **kwargs)
+    except BudgetExceeded:
+        solution = None
+        stats.budget_exceeded = True
+    stats.wall_time = perf_counter() - start
+    return solution, stats
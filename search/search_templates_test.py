@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    Optimal,
+    Problem,
+    ReversibleProblem,
+    SearchStats,
+    StateInterner,
+    StatsProblem,
+    get_canonical,
+    replay_path,
+    search_with_stats,
+)
+from problems import Cube, Empty, Grid, Line, NPuzzle, OptNPuzzle
+from problems import PuzzleState
+from problems import Unsolvable
+import pickle
+
+INTERFACES = (
+    HeuristicProblem,
+    IncrementalEstimate,
+    ReversibleProblem,
+    Optimal,
+)
+
+
+def run_test(prob: Problem, *, verbose: bool = True) -> bool:
+    """
+    Return whether StatsProblem proxy of the problem implements the same
+    interfaces as the problem (also after pickling) and whether a search
+    run by search_with_stats sees them.
+
+    Call with verbose=False to turn off prints.
+    """
+    expected = [isinstance(prob, i) for i in INTERFACES]
+    proxy = StatsProblem(prob, SearchStats())
+    copy = pickle.loads(pickle.dumps(proxy))
+
+    seen = []
+
+    def search(p: Problem) -> None:
+        # search without stats parameter gets the proxy
+        seen.extend(isinstance(p, i) for i in INTERFACES)
+
+    search_with_stats(search, prob)
+
+    correct = True
+    for name, got in (
+        ("proxy", [isinstance(proxy, i) for i in INTERFACES]),
+        ("pickled proxy", [isinstance(copy, i) for i in INTERFACES]),
+        ("search", seen),
+    ):
+        if got != expected:
+            correct = False
+            if verbose:
+                print(f"{name} interfaces differ: {got} != {expected}")
+    if hasattr(proxy, "estimate") != expected[0]:
+        correct = False
+        if verbose:
+            print("proxy estimate does not match the problem")
+    start = prob.initial_state()
+    if (get_canonical(proxy) is None) != (
+        get_canonical(prob) is None
+    ) or proxy.canonical(start) != prob.canonical(start):
+        correct = False
+        if verbose:
+            print("proxy canonical does not match the problem")
+
+    if verbose and correct:
+        print("correct")
+    return correct
+
+
+def check_interner(prob: Problem, *, verbose: bool = True) -> bool:
+    """
+    Intern states reachable by two actions from the initial state
+    (equal states are generated by different paths) and return whether
+    equal states get the same id and canonical instance.
+    """
+    interner = StateInterner()
+    seen = {}  # state -> first generated instance
+    start = prob.initial_state()
+    states = [start] + [prob.result(start, a) for a in prob.actions(start)]
+    for s in list(states):
+        states.extend(prob.result(s, a) for a in prob.actions(s))
+
+    correct = True
+    for s in states:
+        id = interner.intern(s)
+        first = seen.setdefault(s, s)
+        if (
+            interner.get(s) != id
+            or interner.canonical(s) is not first
+            or interner.state(id) is not first
+        ):
+            correct = False
+    if len(interner) != len(seen) or sorted(
+        interner.get(s) for s in seen
+    ) != list(range(len(seen))):
+        correct = False
+
+    unseen = StateInterner()
+    unseen.canonical(start)
+    if start not in unseen or unseen.get(start) != 0:
+        # canonical interns unseen states
+        correct = False
+
+    if verbose:
+        print(
+            "{} ({} of {} states distinct)".format(
+                "correct" if correct else "WRONG", len(seen), len(states)
+            )
+        )
+    return correct
+
+
+def check_replay(*, verbose: bool = True) -> bool:
+    """
+    Return whether replay_path replays the cheapest path of Line
+    and raises ValueError for a state no action reaches.
+    """
+    prob = Line()
+    # 0 -> 3 -> 5, cheapest actions are 3 (cost 5) and 2 (cost 3)
+    parent = {0: None, 3: (0, 1, 8), 5: (3, 2, 3), 100: (5, 1, 8)}
+    correct = replay_path(prob, parent, 5) == ([3, 2], [5, 3], 5)
+    try:
+        replay_path(prob, parent, 100)
+        correct = False
+    except ValueError:
+        pass
+    if verbose:
+        print("correct" if correct else "WRONG")
+    return correct
+
+
+if __name__ == "__main__":
+    problems = [
+        Empty(),
+        Unsolvable(),
+        Grid(),
+        Cube(),
+        OptNPuzzle(PuzzleState.reversed(3), 28),
+        NPuzzle(PuzzleState.random(3, 20), symmetric=True),
+    ]
+    for prob in problems:
+        print(f"Testing StatsProblem of {type(prob).__name__}")
+        run_test(prob)
+        print()
+
+    for prob in [Grid(), NPuzzle(PuzzleState.reversed(3))]:
+        print(f"Testing StateInterner on {type(prob).__name__}")
+        check_interner(prob)
+        print()
+
+    print("Testing replay_path")
+    check_replay()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+from array import array
+from dataclasses import dataclass
+from math import ceil, isnan, nan
+from argparse import ArgumentParser
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import struct
+
+# Trace file starts with header (magic, version), followed by records
+# (little endian, see RECORD):
+# - key - hash of the expanded state (signed)
+# - g, h - path cost and estimate of the expanded node
+# - parent - record id of the parent expansion (-1 for root)
+# - action - index of the action in actions of the parent (-1 for root)
+# Record ids are assigned in expansion order from 0.
+# The file ends with footer record with parent SOLUTION_MARK
+# and g set to cost of the found solution (NaN if none was reported).
+MAGIC = b"SRCHTRC"
+VERSION = 1
+HEADER = struct.Struct("<7sB")
+RECORD = struct.Struct("<qddqi")
+SOLUTION_MARK = -2
+
+
+class SearchTracer:
+    """
+    Writer of binary search trace.
+
+    Engines accepting tracer parameter call expand for every expanded
+    node and solution when a solution is found. Records are packed
+    into a preallocated buffer (of whole records, about buffer_size
+    bytes), that is written when it is full.
+
+    Usable as context manager (closes the file on exit).
+    """
+
+    def __init__(self, file_name: str, buffer_size: int = 1 << 20) -> None:
+        self.file: BinaryIO = open(file_name, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        size = max(1, buffer_size // RECORD.size) * RECORD.size
+        self.buffer = bytearray(size)
+        self.offset = 0
+        self.pack_into = RECORD.pack_into
+        self.records = 0
+        self.cost = nan
+
+    def __enter__(self) -> "SearchTracer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def expand(
+        self, state: object, g: float, h: float, parent: int, action: int
+    ) -> int:
+        """
+        Record expansion of the state and return its record id.
+
+        :param parent: record id of the parent expansion (-1 for root)
+        :param action: index of the action leading from the parent
+            in actions of the parent (-1 for root)
+        """
+        # hash is Py_hash_t (at most 64 bits), so it fits int64
+        offset = self.offset
+        self.pack_into(self.buffer, offset, hash(state), g, h, parent, action)
+        offset += RECORD.size
+        if offset == len(self.buffer):
+            self.file.write(self.buffer)
+            offset = 0
+        self.offset = offset
+        self.records += 1
+        return self.records - 1
+
+    def solution(self, cost: float) -> None:
+        """Record cost of the found solution (the last call counts)."""
+        self.cost = cost
+
+    def flush(self) -> None:
+        self.file.write(memoryview(self.buffer)[: self.offset])
+        self.offset = 0
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.write(RECORD.pack(0, self.cost, nan, SOLUTION_MARK, -1))
+        self.file.close()
+
+
+@dataclass
+class Trace:
+    """Columns of a loaded trace and cost of the solution (NaN if none)."""
+
+    key: array
+    g: array
+    h: array
+    parent: array
+    action: array
+    cost: float
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def depths(self) -> array:
+        """Return depth (number of actions from root) of each record."""
+        depth = array("i", [0]) * len(self.parent)
+        for i, p in enumerate(self.parent):
+            if p >= 0:
+                depth[i] = depth[p] + 1
+        return depth
+
+
+def load_trace(file_name: str) -> Trace:
+    with open(file_name, "rb") as file:
+        magic, version = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a search trace".format(file_name))
+        data = file.read()
+
+    trace = Trace(
+        array("q"), array("d"), array("d"), array("q"), array("i"), nan
+    )
+    # trace that was not closed can end with incomplete record
+    end = len(data) - len(data) % RECORD.size
+    for key, g, h, parent, action in RECORD.iter_unpack(data[:end]):
+        if parent == SOLUTION_MARK:
+            trace.cost = g
+            break
+        trace.key.append(key)
+        trace.g.append(g)
+        trace.h.append(h)
+        trace.parent.append(parent)
+        trace.action.append(action)
+    return trace
+
+
+def _histogram(values: array, bins: int) -> List[Tuple[float, float, int]]:
+    """Return (low, high, count) of equally wide bins (at most bins)."""
+    low, high = min(values), max(values)
+    if all(v == int(v) for v in (low, high)):
+        # integer values (usually) - integer bins
+        width = max(1, ceil((high - low + 1) / bins))
+    else:
+        width = (high - low) / bins
+    counts: Dict[int, int] = {}
+    for v in values:
+        b = min(int((v - low) / width), bins - 1)
+        counts[b] = counts.get(b, 0) + 1
+    return [
+        (low + b * width, low + (b + 1) * width, counts[b])
+        for b in sorted(counts)
+    ]
+
+
+def analyze(trace: Trace, cost: Optional[float] = None, bins: int = 20):
+    """
+    Print g and h distribution of expanded nodes, heuristic error
+    (cost - g - h) and rate of re-expanded states per depth.
+
+    :param cost: final cost used for the heuristic error,
+        default is the solution cost stored in the trace
+    """
+    if not len(trace):
+        print("trace is empty")
+        return
+    if cost is None and not isnan(trace.cost):
+        cost = trace.cost
+
+    print("expansions: {}".format(len(trace)))
+    print("solution cost: {}".format("unknown" if cost is None else cost))
+
+    for name, values in (("g", trace.g), ("h", trace.h)):
+        print()
+        print("{} distribution".format(name))
+        for low, high, n in _histogram(values, bins):
+            print("  [{:10.4g}, {:10.4g}) {:10d}".format(low, high, n))
+
+    # per depth: expansions, re-expansions, sum of h, sum of error
+    depth = trace.depths()
+    seen = set()
+    rows: Dict[int, List[float]] = {}
+    for i, key in enumerate(trace.key):
+        row = rows.get(depth[i])
+        if row is None:
+            row = rows[depth[i]] = [0, 0, 0.0, 0.0]
+        row[0] += 1
+        if key in seen:
+            row[1] += 1
+        else:
+            seen.add(key)
+        row[2] += trace.h[i]
+        if cost is not None:
+            row[3] += cost - trace.g[i] - trace.h[i]
+
+    print()
+    print(
+        "{:>6} {:>10} {:>10} {:>10} {:>12}".format(
+            "depth", "expanded", "duplicate", "mean h", "mean error"
+        )
+    )
+    for d in sorted(rows):
+        n, dup, sum_h, sum_err = rows[d]
+        print(
+            "{:6d} {:10d} {:9.2f}% {:10.3f} {:>12}".format(
+                d,
+                n,
+                100 * dup / n,
+                sum_h / n,
+                "-" if cost is None else "{:.3f}".format(sum_err / n),
+            )
+        )
+    print()
+    print(
+        "duplicate rate: {:.2f}%".format(100 * (1 - len(seen) / len(trace)))
+    )
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Analyze binary search trace.")
+    parser.add_argument("trace", help="trace file written by SearchTracer")
+    parser.add_argument(
+        "--cost",
+        type=float,
+        default=None,
+        help="final cost for heuristic error (default: stored solution)",
+    )
+    parser.add_argument(
+        "--bins", type=int, default=20, help="number of histogram bins"
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    analyze(load_trace(args.trace), args.cost, args.bins)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+from search_templates import HeuristicProblem, search_with_stats
+from search_tracer import SearchTracer, load_trace, analyze
+from anytime_astar import WeightedAStar
+from idastar import IDAStar
+from problems import NPuzzle, OptNPuzzle, OptPackedNPuzzle, PuzzleState
+from tempfile import TemporaryDirectory
+from os.path import join
+from typing import Callable
+
+
+def run_test(
+    search: Callable, prob: HeuristicProblem, *, verbose: bool = True, **kwargs
+) -> bool:
+    """
+    Run search with and without tracer and return whether the trace
+    matches the search (number of expansions, solution cost, parents).
+
+    Call with verbose=False to turn off prints.
+    Other keyword arguments are passed to the search.
+    """
+    solution, stats = search_with_stats(search, prob, **kwargs)
+
+    with TemporaryDirectory() as directory:
+        file_name = join(directory, "trace.bin")
+        with SearchTracer(file_name) as tracer:
+            traced, traced_stats = search_with_stats(
+                search, prob, tracer=tracer, **kwargs
+            )
+        trace = load_trace(file_name)
+
+    ok = (
+        traced.path_cost == solution.path_cost == trace.cost
+        and len(trace) == traced_stats.expanded
+        and all(p < i for i, p in enumerate(trace.parent))
+    )
+    if verbose:
+        print(
+            "trace {}, overhead {:.1f}%".format(
+                "ok" if ok else "does not match the search",
+                100 * (traced_stats.wall_time / stats.wall_time - 1),
+            )
+        )
+        analyze(trace, bins=10)
+    return ok
+
+
+if __name__ == "__main__":
+    state = PuzzleState.reversed(3)
+    print(state)
+    print()
+    print("Testing A*")
+    run_test(WeightedAStar, OptNPuzzle(state, 28), weight=1)
+    print()
+
+    print("Testing IDA*")
+    run_test(IDAStar, OptPackedNPuzzle(state, 28), prune=NPuzzle.undoes)
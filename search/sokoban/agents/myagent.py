@@ -3,7 +3,11 @@ from game.action import *
 from game.board import *
 from game.artificial_agent import ArtificialAgent
 from dead_square_detector import detect
-from typing import List, Union
+from box_matching import INF, BoxMatching, PushDistances
+from dynamic_deadlocks import DynamicDeadlocks
+from game.packed_board import PackedBoard, PackedKey
+from collections import OrderedDict
+from typing import List, Tuple, Union
 import sys
 from time import perf_counter
 from os.path import dirname
@@ -11,7 +15,11 @@ from os.path import dirname
 # hack for importing from parent package
 sys.path.append(dirname(dirname(dirname(__file__))))
 from astar import AStar
-from search_templates import HeuristicProblem
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    InPlaceProblem,
+)
 
 
 class MyAgent(ArtificialAgent):
@@ -48,37 +56,170 @@ class MyAgent(ArtificialAgent):
         return [a.dir for a in solution.actions]
 
 
-class SokobanProblem(HeuristicProblem):
-    """HeuristicProblem wrapper of Sokoban game."""
+class SokobanProblem(HeuristicProblem, IncrementalEstimate, InPlaceProblem):
+    """
+    HeuristicProblem wrapper of Sokoban game.
+
+    States are Boards, actions are Moves and Pushes (cost 1 each),
+    pushes of a box onto a dead square (see dead_square_detector)
+    and pushes to freeze and corral deadlocks (DynamicDeadlocks)
+    are not generated.
+    Estimate is the cost of minimum-cost assignment of boxes to targets
+    by push distances (box_matching), infinite if some box
+    cannot get to a target.
+    Assignments are cached by positions of boxes (least recently used
+    are dropped), after a push the assignment of the parent
+    is repaired instead of solved again.
+
+    As InPlaceProblem, a single Board is walked by perform and reverse
+    of actions, while PackedBoards of the walked path keep positions
+    and Zobrist hash up to date, keys are PackedKeys. The path is kept
+    only while the Board is off its first state (changes of the Board
+    between perform and undo are not noticed).
+    """
 
-    def __init__(self) -> None:
-        # Your implementation goes here.
-        # Hint: __init__(self, initial_board) -> None:
-        raise NotImplementedError
+    # maximal number of cached assignments
+    MATCHINGS = 50_000
+
+    def __init__(self, initial_board: Board) -> None:
+        self.initial_board = initial_board
+        self.dead = detect(initial_board)
+        self.deadlocks = DynamicDeadlocks.of(initial_board)
+        self.distances = PushDistances.of(initial_board)
+        self.static = self.distances.static
+        # box cells -> assignment
+        self.matchings: OrderedDict[Tuple[int, ...], BoxMatching] = (
+            OrderedDict()
+        )
+        # board changed in place and PackedBoards of its path
+        self._walked: Board = None
+        self._path: List[PackedBoard] = []
+        # the last other state, its hash and PackedBoard (children
+        # of the same state come together), Board resets its hash
+        # when changed
+        self._last: Board = None
+        self._last_hash: int = None
+        self._last_packed: PackedBoard = None
 
     def initial_state(self) -> Union[Board, StateMinimal]:
-        # Your implementation goes here.
-        # Hint: return self.initial_board
-        raise NotImplementedError
+        return self.initial_board
 
     def actions(self, state: Union[Board, StateMinimal]) -> List[Action]:
-        # Your implementation goes here.
-        raise NotImplementedError
+        actions = []
+        x, y = state.sokoban
+        packed = None
+        for dir in EDirection:
+            move = Move.get_action(dir)
+            if move.is_possible(state):
+                actions.append(move)
+                continue
+            push = Push.get_action(dir)
+            if not push.is_possible(state) or (
+                self.dead[x + 2 * dir.dx][y + 2 * dir.dy]
+            ):
+                continue
+            if packed is None:
+                packed = self._packed(state)
+            neighbors = self.static.neighbors
+            box = neighbors[packed.player][dir.index]
+            target = neighbors[box][dir.index]
+            boxes = packed.boxes ^ (1 << box) ^ (1 << target)
+            if not self.deadlocks.is_deadlock(box, boxes, target):
+                actions.append(push)
+        return actions
 
     def result(
         self, state: Union[Board, StateMinimal], action: Action
     ) -> Union[Board, StateMinimal]:
-        # Your implementation goes here.
-        raise NotImplementedError
+        board = state.clone()
+        action.perform(board)
+        return board
 
     def is_goal(self, state: Union[Board, StateMinimal]) -> bool:
-        # Your implementation goes here.
-        raise NotImplementedError
+        return state.is_victory()
 
     def cost(self, state: Union[Board, StateMinimal], action: Action) -> float:
-        # Your implementation goes here.
-        raise NotImplementedError
+        return 1
 
     def estimate(self, state: Union[Board, StateMinimal]) -> float:
-        # Your implementation goes here.
-        raise NotImplementedError
+        boxes = tuple(self._packed(state).box_cells())
+        return self._estimate(self._matching(boxes))
+
+    def estimate_delta(
+        self,
+        state: Union[Board, StateMinimal],
+        action: Action,
+        parent_h: float,
+    ) -> float:
+        if not isinstance(action, Push):
+            return parent_h
+        packed = self._packed(state)
+        boxes = tuple(packed.box_cells())
+        neighbors = self.static.neighbors
+        box = neighbors[packed.player][action.dir.index]
+        cell = neighbors[box][action.dir.index]
+        moved = tuple(sorted(cell if b == box else b for b in boxes))
+        matching = self.matchings.get(moved)
+        if matching is None:
+            matching = self._matching(boxes).moved(box, cell)
+            self._store(moved, matching)
+        else:
+            self.matchings.move_to_end(moved)
+        return self._estimate(matching)
+
+    def perform(self, state: Board, action: Action) -> None:
+        if state is not self._walked:
+            self._path = [self._packed(state)]
+            self._walked = state
+        self._path.append(self._path[-1].perform(action))
+        action.perform(state)
+
+    def undo(self, state: Board, action: Action) -> None:
+        action.reverse(state)
+        self._path.pop()
+        if len(self._path) == 1:
+            # back at the first state, the walk may end here
+            self._walked = None
+
+    def key(self, state: Board) -> PackedKey:
+        return self._packed(state).key()
+
+    def _packed(self, state: Board) -> PackedBoard:
+        """Return PackedBoard of the state."""
+        if state is self._walked:
+            return self._path[-1]
+        if (
+            state is not self._last
+            or state._hash is None
+            or state._hash != self._last_hash
+        ):
+            height = self.static.height
+            boxes = 0
+            for x, col in enumerate(state.tiles):
+                for y, t in enumerate(col):
+                    if ETile.is_box(t):
+                        boxes |= 1 << (x * height + y)
+            self._last = state
+            self._last_hash = hash(state)
+            self._last_packed = PackedBoard(
+                self.static, self.static.cell(*state.sokoban), boxes
+            )
+        return self._last_packed
+
+    def _matching(self, boxes: Tuple[int, ...]) -> BoxMatching:
+        matching = self.matchings.get(boxes)
+        if matching is None:
+            matching = BoxMatching.solve(self.distances, boxes)
+            self._store(boxes, matching)
+        else:
+            self.matchings.move_to_end(boxes)
+        return matching
+
+    def _store(self, boxes: Tuple[int, ...], matching: BoxMatching) -> None:
+        self.matchings[boxes] = matching
+        if len(self.matchings) > self.MATCHINGS:
+            self.matchings.popitem(last=False)
+
+    @staticmethod
+    def _estimate(matching: BoxMatching) -> float:
+        return matching.cost if matching.cost < INF else float("inf")
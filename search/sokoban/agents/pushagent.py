@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+from game.board import Board, EDirection
+from game.artificial_agent import ArtificialAgent
+from push_problem import PushProblem, expand_path
+from typing import List
+from os.path import dirname
+import sys
+
+# hack for importing from parent package
+sys.path.append(dirname(dirname(dirname(__file__))))
+from anytime_astar import WeightedAStar
+from search_templates import SearchStats
+
+
+class PushAgent(ArtificialAgent):
+    """
+    Sokoban agent searching pushes instead of single moves
+    (see push_problem.py), walks between pushes are added afterwards.
+
+    Search is A* (weighted A* with the weight 2 if not optimal),
+    optimal solutions have minimal number of pushes, not moves.
+    """
+
+    @staticmethod
+    def think(board: Board, optimal: bool, verbose: bool) -> List[EDirection]:
+        stats = SearchStats() if verbose else None
+        solution = WeightedAStar(
+            PushProblem(board), 1.0 if optimal else 2.0, stats=stats
+        )
+        if verbose:
+            stats.report()
+        if not solution:
+            return None
+        return expand_path(board, solution.actions)
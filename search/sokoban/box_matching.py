@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+from game.board import Board
+from game.packed_board import StaticMap
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+
+# push distance of a box that cannot reach the target
+INF = 10**9
+
+
+class PushDistances:
+    """
+    Minimal number of pushes of a single box from every cell
+    to every target of a level (other boxes are ignored,
+    the player can get anywhere), INF if the target cannot be reached.
+
+    Distances are computed by BFS of pulls from every target
+    and cached by static layout of the level (StaticMap.key).
+
+    Attributes:
+    - static - StaticMap of the level, cells are its cells
+    - table[cell][t] - distance from the cell to t-th target
+      (of static.target_cells)
+    """
+
+    # layout -> distances of this process
+    _loaded: Dict[bytes, "PushDistances"] = {}
+
+    def __init__(self, static: StaticMap) -> None:
+        self.static = static
+        neighbors = static.neighbors
+        walls = static.walls
+
+        def floor(cell: int) -> bool:
+            return cell >= 0 and (walls >> cell) & 1 == 0
+
+        columns = []
+        for target in static.target_cells:
+            dist = [INF] * static.size
+            dist[target] = 0
+            queue = deque([target])
+            while queue:
+                cell = queue.popleft()
+                for d in range(4):
+                    # box is pulled to the neighbor by the player
+                    # standing one cell further
+                    pulled = neighbors[cell][d]
+                    if (
+                        floor(pulled)
+                        and dist[pulled] == INF
+                        and floor(neighbors[pulled][d])
+                    ):
+                        dist[pulled] = dist[cell] + 1
+                        queue.append(pulled)
+            columns.append(dist)
+        self.table: List[Tuple[int, ...]] = list(zip(*columns))
+
+    @staticmethod
+    def of(board: Board) -> "PushDistances":
+        """Return distances of the level of the board (cached)."""
+        static = StaticMap.of(board)
+        distances = PushDistances._loaded.get(static.key)
+        if distances is None:
+            distances = PushDistances(static)
+            PushDistances._loaded[static.key] = distances
+        return distances
+
+
+class BoxMatching:
+    """
+    Minimum-cost assignment of boxes to distinct targets by the Hungarian
+    method (shortest augmenting paths with potentials, O(m^3)
+    for m targets).
+
+    Cost of the assignment (sum of push distances of boxes
+    to their targets) is a lower bound of pushes needed to solve the level,
+    it is at least INF if some box cannot get to any free target.
+
+    Potentials are kept, so after a push of a single box
+    the assignment is repaired by one augmenting path in O(m^2) (moved).
+    """
+
+    __slots__ = ("table", "boxes", "rows", "u", "v", "p", "cost")
+
+    def __init__(
+        self,
+        table: List[Tuple[int, ...]],
+        boxes: List[int],
+        rows: List[Tuple[int, ...]],
+        u: List[int],
+        v: List[int],
+        p: List[int],
+    ) -> None:
+        self.table = table
+        # cells of boxes
+        self.boxes = boxes
+        # cost matrix - rows of boxes followed by zero rows
+        # of missing boxes (if there are more targets), so it is square
+        self.rows = rows
+        # potentials of rows and columns (targets), both from 1,
+        # u[i] + v[j] <= rows[i - 1][j - 1], equal if assigned
+        self.u = u
+        self.v = v
+        # p[j] - row assigned to column j
+        self.p = p
+        self.cost = 0
+
+    @staticmethod
+    def solve(
+        distances: PushDistances, boxes: Sequence[int]
+    ) -> "BoxMatching":
+        """Return optimal assignment of the boxes (cells) to targets."""
+        table = distances.table
+        n = len(boxes)
+        m = len(distances.static.target_cells)
+        if n > m:
+            raise ValueError(f"{n} boxes for {m} targets")
+        rows = [table[cell] for cell in boxes] + [(0,) * m] * (m - n)
+        zeros = [0] * (m + 1)
+        matching = BoxMatching(
+            table, list(boxes), rows, zeros.copy(), zeros.copy(), zeros
+        )
+        for i in range(1, m + 1):
+            matching._augment(i)
+        matching._update_cost()
+        return matching
+
+    def moved(self, box: int, cell: int) -> "BoxMatching":
+        """Return optimal assignment after the box moved to the cell."""
+        i = self.boxes.index(box) + 1
+        boxes = self.boxes.copy()
+        boxes[i - 1] = cell
+        rows = self.rows.copy()
+        rows[i - 1] = self.table[cell]
+        matching = BoxMatching(
+            self.table,
+            boxes,
+            rows,
+            self.u.copy(),
+            self.v.copy(),
+            self.p.copy(),
+        )
+        # only the row of the box changed, other rows keep feasible
+        # potentials, so the box is unassigned and assigned again
+        matching.p[matching.p.index(i, 1)] = 0
+        matching._augment(i)
+        matching._update_cost()
+        return matching
+
+    def _augment(self, row: int) -> None:
+        """
+        Assign unassigned row by the shortest augmenting path
+        (Dijkstra on reduced costs), keeping feasible potentials.
+        """
+        rows, u, v, p = self.rows, self.u, self.v, self.p
+        m = len(p) - 1
+        p[0] = row
+        j0 = 0
+        minv = [float("inf")] * (m + 1)
+        way = [0] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            costs = rows[i0 - 1]
+            ui0 = u[i0]
+            delta = float("inf")
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = costs[j - 1] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # flip the path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    def _update_cost(self) -> None:
+        rows = self.rows
+        self.cost = sum(rows[i - 1][j - 1] for j, i in enumerate(self.p) if j)
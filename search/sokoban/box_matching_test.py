@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+from game.board import Board
+from game.packed_board import StaticMap
+from box_matching import BoxMatching, PushDistances
+from agents.myagent import SokobanProblem
+from itertools import permutations
+from os.path import dirname
+from os.path import join as path_join
+from random import Random
+
+LEVEL_SET = "Aymeric_Medium"
+STEPS = 300
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+def brute_force(distances: PushDistances, boxes) -> int:
+    """Return cost of the best assignment of boxes to targets."""
+    table = distances.table
+    return min(
+        sum(table[cell][t] for cell, t in zip(boxes, targets))
+        for targets in permutations(
+            range(len(distances.static.target_cells)), len(boxes)
+        )
+    )
+
+
+def check_distances(board: Board) -> bool:
+    """Return whether push distances of targets are 0, of others positive."""
+    static = StaticMap.of(board)
+    table = PushDistances.of(board).table
+    return all(
+        table[cell][t] == 0
+        for t, cell in enumerate(static.target_cells)
+    ) and all(
+        table[cell][t] > 0
+        for cell in range(static.size)
+        for t, target in enumerate(static.target_cells)
+        if cell != target
+    )
+
+
+def check_matching(board: Board, seed: int = 0) -> bool:
+    """
+    Return whether assignments of random positions of boxes
+    and their repairs after moves of single boxes are optimal.
+    """
+    rand = Random(seed)
+    distances = PushDistances.of(board)
+    static = distances.static
+    floor = [c for c in range(static.size) if not static.is_wall(c)]
+    # few boxes, so that brute force is fast
+    boxes = rand.sample(floor, min(4, len(static.target_cells)))
+    matching = BoxMatching.solve(distances, boxes)
+    for _ in range(20):
+        if matching.cost != brute_force(distances, matching.boxes):
+            return False
+        box = rand.choice(matching.boxes)
+        cell = rand.choice([c for c in floor if c not in matching.boxes])
+        matching = matching.moved(box, cell)
+    return True
+
+
+def check_incremental(board: Board, steps: int = STEPS) -> bool:
+    """
+    Walk randomly and return whether estimate_delta
+    equals estimate of every successor.
+    """
+    rand = Random(0)
+    prob = SokobanProblem(board)
+    state = prob.initial_state()
+    h = prob.estimate(state)
+    for _ in range(steps):
+        actions = prob.actions(state)
+        for action in actions:
+            child_h = prob.estimate_delta(state, action, h)
+            if child_h != prob.estimate(prob.result(state, action)):
+                return False
+        action = rand.choice(actions)
+        h = prob.estimate_delta(state, action, h)
+        state = prob.result(state, action)
+    return True
+
+
+def test(level_set: str = LEVEL_SET) -> None:
+    file = path_join(DIR, f"{level_set}.sok")
+    results = []
+    skip = 0
+    while True:
+        board, _, skip = Board.from_file(file, None, False, skip=skip)
+        if board is None:
+            break
+        correct = (
+            check_distances(board)
+            and check_matching(board)
+            and check_incremental(board)
+        )
+        print("{}: {}".format(board.level_name, "OK" if correct else "WRONG"))
+        results.append(correct)
+    assert results and all(results)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+from game.board import Board, EDirection, ETile, StateMinimal
+from game.packed_board import PackedBoard, StaticMap
+from static_deadlocks import StaticDeadlocks
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Set, Tuple, Union
+
+UP, RIGHT, DOWN, LEFT = (d.index for d in EDirection)
+
+# (boxes, region) - deadlock whenever the boxes are on their cells
+# and the player is in the region (bitsets of cells)
+Pattern = Tuple[int, int]
+
+
+class DynamicDeadlocks:
+    """
+    Deadlocks caused by positions of boxes, checked around the box
+    pushed last (other boxes were not deadlocked before the push):
+
+    - freeze - the box cannot be pushed along either axis,
+      because of walls, dead squares and other frozen boxes,
+      and some of these frozen boxes is not on target
+    - corral - the player cannot get to the area (corral) behind
+      the box, and boxes around the corral cannot be pushed to targets
+      nor open the corral even with all other boxes removed
+      (checked by a small search of pushes, limited by CORRAL_NODES)
+
+    and static deadlocks (StaticDeadlocks.is_deadlock).
+
+    Results of searches of corrals are remembered too (as they depend
+    only on the boxes around the corral and the region of the player).
+    Found deadlocks are remembered as patterns (boxes and region
+    of the player), that match any state with the boxes on their cells
+    (other boxes only make it worse) and the player in the region.
+    Patterns are shared by all searches on the level (see of),
+    least recently used are dropped when there are more than PATTERNS
+    (of both).
+
+    Main methods:
+    - of - return detector of the level of the board (shared)
+    - is_deadlock - whether the state after push is deadlocked
+    - is_deadlock_push - the same for the push from Board
+      or StateMinimal
+    """
+
+    # maximal number of remembered patterns
+    PATTERNS = 10_000
+    # maximal number of states of the search of a corral
+    CORRAL_NODES = 200
+
+    # layout -> detector of this process
+    _loaded: Dict[bytes, "DynamicDeadlocks"] = {}
+
+    def __init__(self, deadlocks: StaticDeadlocks) -> None:
+        self.deadlocks = deadlocks
+        self.static: StaticMap = deadlocks.static
+        # pattern -> None, the least recently used first
+        self.patterns: OrderedDict[Pattern, None] = OrderedDict()
+        # cell -> patterns with a box on the cell
+        self.by_cell: Dict[int, Set[Pattern]] = {}
+        # (boxes, player cell, corral cell) -> whether the corral
+        # is closed (minimal cells identify regions), least recently
+        # used first
+        self.corrals: OrderedDict[Tuple[int, int, int], bool] = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def of(board: Board) -> "DynamicDeadlocks":
+        """Return detector of the level of the board (shared)."""
+        static = StaticMap.of(board)
+        detector = DynamicDeadlocks._loaded.get(static.key)
+        if detector is None:
+            detector = DynamicDeadlocks(StaticDeadlocks.of(board))
+            DynamicDeadlocks._loaded[static.key] = detector
+        return detector
+
+    def is_deadlock_push(
+        self, state: Union[Board, StateMinimal], dir: EDirection
+    ) -> bool:
+        """
+        Return whether the possible push in the direction
+        from the state leads to a deadlock.
+        """
+        player, boxes = self._positions(state)
+        neighbors = self.static.neighbors
+        box = neighbors[player][dir.index]
+        target = neighbors[box][dir.index]
+        boxes ^= (1 << box) ^ (1 << target)
+        return self.is_deadlock(box, boxes, target)
+
+    def is_deadlock(self, player: int, boxes: int, box: int) -> bool:
+        """
+        Return whether the state (player cell and bitset of box cells)
+        after push of a box to the cell box is deadlocked.
+        """
+        if self.deadlocks.is_deadlock(boxes, box):
+            return True
+        for pattern in self.by_cell.get(box, ()):
+            pattern_boxes, region = pattern
+            if (
+                boxes & pattern_boxes == pattern_boxes
+                and (region >> player) & 1
+            ):
+                self.patterns.move_to_end(pattern)
+                return True
+        frozen = self._frozen(boxes, box)
+        if frozen:
+            self._remember((frozen, self.static.floor))
+            return True
+        pattern = self._corral(player, boxes, box)
+        if pattern is not None:
+            self._remember(pattern)
+            return True
+        return False
+
+    def _positions(
+        self, state: Union[Board, StateMinimal]
+    ) -> Tuple[int, int]:
+        """Return player cell and bitset of box cells of the state."""
+        static = self.static
+        boxes = 0
+        if isinstance(state, Board):
+            height = static.height
+            for x, col in enumerate(state.tiles):
+                for y, tile in enumerate(col):
+                    if ETile.is_box(tile):
+                        boxes |= 1 << (x * height + y)
+            return static.cell(*state.sokoban), boxes
+        p = state.positions
+        for x, y in zip(p[2::2], p[3::2]):
+            boxes |= 1 << static.cell(x, y)
+        return static.cell(p[0], p[1]), boxes
+
+    def _frozen(self, boxes: int, box: int) -> int:
+        """
+        Return bitset of boxes frozen together with the box,
+        if some of them is not on target, otherwise 0.
+        """
+        static = self.static
+        neighbors = static.neighbors
+        dead = self.deadlocks.dead
+        blocked_axis = (
+            (self.deadlocks.blocked_h, LEFT, RIGHT),
+            (self.deadlocks.blocked_v, UP, DOWN),
+        )
+        frozen = 0
+
+        def is_frozen(cell: int, fixed: int) -> bool:
+            # boxes already being checked are treated as walls,
+            # boxes frozen only thanks to unfrozen box are dropped
+            nonlocal frozen
+            before = frozen
+            fixed |= 1 << cell
+            for blocked, back, forward in blocked_axis:
+                if (blocked >> cell) & 1:
+                    continue
+                a = neighbors[cell][back]
+                b = neighbors[cell][forward]
+                if (fixed >> a) & 1 or (fixed >> b) & 1:
+                    continue
+                if (dead >> a) & 1 and (dead >> b) & 1:
+                    continue
+                if (boxes >> a) & 1 and is_frozen(a, fixed):
+                    continue
+                if (boxes >> b) & 1 and is_frozen(b, fixed):
+                    continue
+                frozen = before
+                return False
+            frozen |= 1 << cell
+            return True
+
+        if not is_frozen(box, 0) or frozen & ~static.targets == 0:
+            return 0
+        return frozen
+
+    def _corral(
+        self, player: int, boxes: int, box: int
+    ) -> Optional[Pattern]:
+        """
+        Return pattern of corral deadlock next to the box,
+        None if there is none.
+        """
+        static = self.static
+        reach = static.reachable(player, boxes)
+        seen = reach | boxes
+        for cell in static.neighbors[box]:
+            if cell < 0 or (seen >> cell) & 1 or static.is_wall(cell):
+                continue
+            region = static.reachable(cell, boxes)
+            seen |= region
+            fence = boxes & static.neighborhood(region)
+            if fence & ~static.targets == 0:
+                continue
+            relaxed = static.reachable(player, fence)
+            key = (fence, relaxed & -relaxed, region & -region)
+            closed = self.corrals.get(key)
+            if closed is None:
+                closed = self._closed(player, fence, region)
+                self.corrals[key] = closed
+                if len(self.corrals) > self.PATTERNS:
+                    self.corrals.popitem(last=False)
+            else:
+                self.corrals.move_to_end(key)
+            if closed:
+                return fence, relaxed
+        return None
+
+    def _closed(self, player: int, boxes: int, region: int) -> bool:
+        """
+        Return whether the boxes alone can neither get to targets
+        nor let the player into the region (search of pushes),
+        False if not decided in CORRAL_NODES states.
+        """
+        static = self.static
+        neighbors = static.neighbors
+        is_deadlock = self.deadlocks.is_deadlock
+        start = PackedBoard(static, player, boxes).normalized()
+        if start.reachable() & region:
+            return False
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            for box, dir in state.pushes():
+                target = neighbors[box][dir.index]
+                pushed = state.boxes ^ (1 << box) ^ (1 << target)
+                if is_deadlock(pushed, target):
+                    continue
+                child = state.push_box(box, dir).normalized()
+                if child.is_victory() or child.reachable() & region:
+                    return False
+                if child not in seen:
+                    if len(seen) >= self.CORRAL_NODES:
+                        return False
+                    seen.add(child)
+                    queue.append(child)
+        return True
+
+    def _remember(self, pattern: Pattern) -> None:
+        self.patterns[pattern] = None
+        boxes = pattern[0]
+        while boxes:
+            low = boxes & -boxes
+            self.by_cell.setdefault(low.bit_length() - 1, set()).add(pattern)
+            boxes ^= low
+        if len(self.patterns) > self.PATTERNS:
+            old, _ = self.patterns.popitem(last=False)
+            boxes = old[0]
+            while boxes:
+                low = boxes & -boxes
+                self.by_cell[low.bit_length() - 1].discard(old)
+                boxes ^= low
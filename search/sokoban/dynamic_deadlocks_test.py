@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+from game.board import Board, ETile
+from dynamic_deadlocks import DynamicDeadlocks
+from push_problem import PushProblem
+from static_deadlocks import StaticDeadlocks
+from os.path import dirname
+from os.path import join as path_join
+import sys
+
+# hack for importing from parent package
+sys.path.append(dirname(dirname(__file__)))
+from anytime_astar import WeightedAStar
+
+LEVEL_SET = "Aymeric_Medium"
+LIMIT = 3
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+# boxes at (3, 3) and (4, 3) hold each other against the walls
+FREEZE = [
+    "########",
+    "#      #",
+    "#  #   #",
+    "#      #",
+    "#   #  #",
+    "#    ..#",
+    "########",
+]
+
+
+def make_board(rows, targets=()) -> Board:
+    """Return board of the rows (walls and targets) and extra targets."""
+    board = Board(len(rows[0]), len(rows))
+    for y, row in enumerate(rows):
+        for x, c in enumerate(row):
+            if c == "#":
+                board.tiles[x][y] = ETile.WALL
+            elif c == "." or (x, y) in targets:
+                board.tiles[x][y] = ETile.TARGET
+    board.tiles[1][1] |= ETile.SOKOBAN
+    board.sokoban = (1, 1)
+    return board
+
+
+class StaticOnly:
+    """Detector of static deadlocks only, with DynamicDeadlocks interface."""
+
+    def __init__(self, board: Board) -> None:
+        self.deadlocks = StaticDeadlocks.of(board)
+
+    def is_deadlock(self, player: int, boxes: int, box: int) -> bool:
+        return self.deadlocks.is_deadlock(boxes, box)
+
+
+def check_freeze(verbose=True) -> bool:
+    """
+    Return whether two boxes frozen against walls are deadlock
+    (missed by static deadlocks), that is remembered,
+    but not when they are on targets.
+    """
+    board = make_board(FREEZE)
+    detector = DynamicDeadlocks.of(board)
+    static = detector.static
+    a, b = static.cell(3, 3), static.cell(4, 3)
+    boxes = 1 << a | 1 << b
+    other = static.cell(6, 1)
+    correct = (
+        not detector.deadlocks.is_deadlock(boxes, b)
+        and detector.is_deadlock(a, boxes, b)
+        and (boxes, static.floor) in detector.patterns
+        and detector.is_deadlock(a, boxes | 1 << other, a)
+    )
+
+    board = make_board(FREEZE, [(3, 3), (4, 3)])
+    detector = DynamicDeadlocks.of(board)
+    correct = correct and not detector.is_deadlock(a, boxes, b)
+    if verbose:
+        print("freeze {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def check_levels(level_set: str = LEVEL_SET, verbose=True) -> bool:
+    """
+    Return whether pruning of dynamic deadlocks keeps optimal
+    push costs of levels, and corral deadlocks were found.
+    """
+    file = path_join(DIR, f"{level_set}.sok")
+    correct = True
+    corrals = 0
+    skip = 0
+    for _ in range(LIMIT):
+        board, _, skip = Board.from_file(file, None, False, skip=skip)
+        DynamicDeadlocks._loaded.clear()
+        prob = PushProblem(board)
+        cost = WeightedAStar(prob, 1.0).path_cost
+        floor = prob.deadlocks.static.floor
+        corrals += sum(r != floor for _, r in prob.deadlocks.patterns)
+        prob.deadlocks = StaticOnly(board)
+        if WeightedAStar(prob, 1.0).path_cost != cost:
+            correct = False
+            if verbose:
+                print(f"{board.level_name}: wrong cost")
+    correct = correct and corrals > 0
+    if verbose:
+        print("levels {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def test() -> None:
+    assert all([check_freeze(), check_levels()])
+
+
+if __name__ == "__main__":
+    test()
@@ -442,6 +442,10 @@ class Board:
         """
         Load board from the file. Does not check for validity.
 
+        Level is looked up in the index of the file (see LevelIndex
+        in level_index.py), that is built on the first load
+        and stored next to the file.
+
         :param str file_name: path to the file
         :param int|None level_number: number of level to load, if None - load first
         :param bool announce_not_found: announce if level is not found
@@ -450,71 +454,25 @@ class Board:
         :return: Board, minimal_moves (if specified in file), last line of level
 
         """
-        with open(file_name, "r", encoding='cp1252') as file:
-            line_number = skip
-            if skip:
-                for _ in range(skip):
-                    next(file)
-                line = skip
-
-            # find start
-            found = False
-            for line in file:
-                line_number += 1
-                line = line[:-1]
-                if line.isdigit():
-                    if level_number is None:
-                        found = True
-                        level_number = int(line)
-                        break
-                    elif int(line) == level_number:
-                        found = True
-                        break
-
-            if not found and announce_not_found:
+        from game.level_index import LevelIndex
+
+        index = LevelIndex.load(file_name)
+        entry = index.find(level_number, skip)
+        if entry is None:
+            if announce_not_found:
                 print(
                     "Failed to find level{}.".format(
                         "" if level_number is None else " " + str(level_number)
                     )
                 )
-                return None, -1, -1
-
-            # select level lines
-            lines = []
-            for line in file:
-                if line is None:
-                    line_number = -1
-                    break
-                if len(line) and line[0].isdigit():
-                    break
-                line_number += 1
-                lines.append(line[:-1])
+            return None, -1, -1
 
+        lines = index.read_lines(entry)
         if not lines:
             return None, -1, -1
 
-        # find maze
-        height = 0
-        width = 0
-        comments = False
-        min_moves = -1
-
-        for line in lines:
-            if not line:
-                comments = True
-                continue
-            if not comments and any(
-                c not in ETile.get_maze_symbols() for c in line
-            ):
-                comments = True
-            if comments:
-                ls = line.split(":", 1)
-                if ls[0] == "Moves" and len(ls) > 1:
-                    min_moves = int(ls[1])
-            else:
-                height += 1
-                if width < len(line):
-                    width = len(line)
+        level_number = entry.number
+        width, height, min_moves = entry.width, entry.height, entry.moves
 
         if 50 < width <= 4 or 50 < height < 4:
             raise RuntimeError("Level has invalid dimensions.")
@@ -560,7 +518,7 @@ class Board:
         if box_places_count != board.box_count:
             raise RuntimeError("Boxes and targets count mismatch.")
 
-        return board, min_moves, line_number
+        return board, min_moves, entry.end_line
 
 
 class StateMinimal:
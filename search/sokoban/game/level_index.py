@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+from game.board import ETile
+from bisect import bisect_right
+from io import StringIO
+from os import getpid, remove, replace, stat
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import json
+
+ENCODING = "cp1252"
+INDEX_SUFFIX = ".idx"
+VERSION = 1
+
+
+class LevelEntry(NamedTuple):
+    """Location and header of a level in .sok file."""
+
+    number: int
+    line: int  # line of the level number (lines are counted from 1)
+    start: int  # byte offset of the first line of the level
+    end: int  # byte offset after the last line of the level
+    end_line: int  # last line of the level
+    width: int
+    height: int
+    moves: int  # minimal moves ('Moves:' comment), -1 if not specified
+
+
+def level_dimensions(lines: List[str]) -> Tuple[int, int, int]:
+    """
+    Return width and height of the maze and minimal moves
+    ('Moves:' comment, -1 if not specified) of level lines.
+
+    Maze is the leading block of lines consisting of maze symbols only,
+    the rest of the level is comments.
+    """
+    height = 0
+    width = 0
+    comments = False
+    min_moves = -1
+
+    for line in lines:
+        if not line:
+            comments = True
+            continue
+        if not comments and any(
+            c not in ETile.get_maze_symbols() for c in line
+        ):
+            comments = True
+        if comments:
+            ls = line.split(":", 1)
+            if ls[0] == "Moves" and len(ls) > 1:
+                min_moves = int(ls[1])
+        else:
+            height += 1
+            if width < len(line):
+                width = len(line)
+    return width, height, min_moves
+
+
+class LevelIndex:
+    """
+    Index of levels of .sok file - byte offsets, dimensions
+    and minimal moves of every level.
+
+    Index is stored in a sidecar file (file_name + INDEX_SUFFIX)
+    and rebuilt when modification time or size of the .sok file changes.
+    If the sidecar cannot be written, index is kept in memory only.
+    Loaded indices are cached per process.
+
+    Main methods:
+    - load - return up-to-date index of the file
+    - find - return entry of the level
+    - read_lines - return lines of the level
+    """
+
+    # file name -> index loaded by this process
+    _loaded: Dict[str, "LevelIndex"] = {}
+
+    def __init__(
+        self,
+        file_name: str,
+        mtime_ns: int,
+        size: int,
+        levels: List[LevelEntry],
+    ) -> None:
+        self.file_name = file_name
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.levels = levels
+        # lines of level numbers (ascending) for lookup after skipped lines
+        self._lines = [e.line for e in levels]
+        # level number -> indices of its entries (numbers may repeat)
+        self._numbers: Dict[int, List[int]] = {}
+        for i, e in enumerate(levels):
+            self._numbers.setdefault(e.number, []).append(i)
+
+    @staticmethod
+    def load(file_name: str) -> "LevelIndex":
+        """
+        Return index of the file - loaded by this process, from the sidecar
+        or built (and saved) if both are outdated.
+        """
+        st = stat(file_name)
+        index = LevelIndex._loaded.get(file_name)
+        if index is None or not index._matches(st.st_mtime_ns, st.st_size):
+            index = LevelIndex._read(file_name)
+            if index is None or not index._matches(
+                st.st_mtime_ns, st.st_size
+            ):
+                index = LevelIndex.build(file_name)
+                index.save()
+            LevelIndex._loaded[file_name] = index
+        return index
+
+    @staticmethod
+    def build(file_name: str) -> "LevelIndex":
+        """Scan the file and return its index."""
+        st = stat(file_name)
+        with open(file_name, "rb") as file:
+            data = file.read()
+
+        levels = []
+        # [number, line, start, lines] of the level being scanned
+        current = None
+
+        def finish(end: int, end_line: int) -> None:
+            number, line, start, lines = current
+            levels.append(
+                LevelEntry(
+                    number,
+                    line,
+                    start,
+                    end,
+                    end_line,
+                    *level_dimensions(lines),
+                )
+            )
+
+        offset = 0
+        line_number = 0
+        # splitlines of bytes splits only on universal newlines
+        for raw in data.splitlines(keepends=True):
+            line = raw.decode(ENCODING).rstrip("\r\n")
+            line_number += 1
+            if current is not None:
+                # line starting by digit ends the level
+                if line and line[0].isdigit():
+                    finish(offset, line_number - 1)
+                    current = None
+                else:
+                    current[3].append(line)
+            if current is None and line.isdigit():
+                current = [int(line), line_number, offset + len(raw), []]
+            offset += len(raw)
+        if current is not None:
+            finish(offset, line_number)
+        return LevelIndex(file_name, st.st_mtime_ns, st.st_size, levels)
+
+    def save(self) -> bool:
+        """Write the sidecar file, return False if it cannot be written."""
+        index_name = self.file_name + INDEX_SUFFIX
+        tmp_name = f"{index_name}.{getpid()}.tmp"
+        try:
+            with open(tmp_name, "w") as file:
+                json.dump(
+                    {
+                        "version": VERSION,
+                        "mtime_ns": self.mtime_ns,
+                        "size": self.size,
+                        "levels": self.levels,
+                    },
+                    file,
+                    separators=(",", ":"),
+                )
+            # atomic, concurrent readers see old or new index
+            replace(tmp_name, index_name)
+        except OSError:
+            try:
+                remove(tmp_name)
+            except OSError:
+                pass
+            return False
+        return True
+
+    @staticmethod
+    def _read(file_name: str) -> Optional["LevelIndex"]:
+        """Return index from the sidecar file, None if missing or invalid."""
+        try:
+            with open(file_name + INDEX_SUFFIX) as file:
+                data = json.load(file)
+            if data["version"] != VERSION:
+                return None
+            return LevelIndex(
+                file_name,
+                data["mtime_ns"],
+                data["size"],
+                [LevelEntry(*e) for e in data["levels"]],
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _matches(self, mtime_ns: int, size: int) -> bool:
+        return self.mtime_ns == mtime_ns and self.size == size
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def find(
+        self, level_number: Optional[int] = None, skip: int = 0
+    ) -> Optional[LevelEntry]:
+        """
+        Return entry of the first level with the number
+        (or the first level if None) after skip lines, None if not found.
+        """
+        if level_number is None:
+            i = bisect_right(self._lines, skip)
+            return self.levels[i] if i < len(self.levels) else None
+        for i in self._numbers.get(level_number, ()):
+            if self.levels[i].line > skip:
+                return self.levels[i]
+        return None
+
+    def read_lines(self, entry: LevelEntry) -> List[str]:
+        """Return lines of the level (without line ends)."""
+        with open(self.file_name, "rb") as file:
+            file.seek(entry.start)
+            text = file.read(entry.end - entry.start).decode(ENCODING)
+        return [
+            line.rstrip("\n") for line in StringIO(text, newline=None)
+        ]
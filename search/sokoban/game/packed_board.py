@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+from game.board import Board, EDirection, ETile, Pos, StateMinimal
+from game.action import Action, Push
+from random import Random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# seed of Zobrist keys - equal boards have equal hashes in all processes
+ZOBRIST_SEED = 0x50C0BA
+# bits of Zobrist keys, hash() keeps values below 2**61 - 1 unchanged
+ZOBRIST_BITS = 60
+
+
+# (direction, index of the direction, index of the opposite direction)
+_DIRECTIONS = [(d, d.index, d.opposite().index) for d in EDirection]
+
+
+class StaticMap:
+    """
+    Static part of a level (walls and targets) shared by PackedBoards.
+
+    Cells are indexed column by column: cell = x * height + y,
+    so the order of cells is the order of positions
+    in Board.get_positions (and StateMinimal).
+
+    Maps are cached by their layout, use StaticMap.of(board).
+
+    Attributes:
+    - key - static layout the map is cached by
+    - walls, targets - bitsets of cells (bit cell is set)
+    - target_cells - cells of targets in ascending order
+    - neighbors[cell][dir.index] - neighbor cell in the direction,
+      -1 off the board
+    - box_keys, player_keys - Zobrist keys of cells
+    - full, floor - bitsets of all cells and cells without wall
+    - not_top, not_bottom - bitsets of cells with y > 0 (y < height - 1),
+      masks of vertical shifts of bitsets
+    """
+
+    # layout -> map
+    _maps: Dict[bytes, "StaticMap"] = {}
+
+    def __init__(self, board: Board) -> None:
+        self.key: bytes = StaticMap.layout(board)
+        self.width: int = board.width
+        self.height: int = board.height
+        self.level_name: str = board.level_name
+        self.level: int = board.level
+        self.size: int = board.width * board.height
+
+        height = self.height
+        self.walls: int = 0
+        self.targets: int = 0
+        for x, col in enumerate(board.tiles):
+            for y, tile in enumerate(col):
+                if ETile.is_wall(tile):
+                    self.walls |= 1 << (x * height + y)
+                elif ETile.is_target(tile):
+                    self.targets |= 1 << (x * height + y)
+        self.target_cells: Tuple[int, ...] = tuple(_cells(self.targets))
+        self.full: int = (1 << self.size) - 1
+        self.floor: int = self.full & ~self.walls
+        column = (1 << height) - 1
+        columns = sum(1 << (x * height) for x in range(self.width))
+        self.not_top: int = (column - 1) * columns
+        self.not_bottom: int = (column >> 1) * columns
+
+        self.neighbors: List[Tuple[int, ...]] = []
+        for cell in range(self.size):
+            x, y = divmod(cell, height)
+            self.neighbors.append(
+                tuple(
+                    (x + d.dx) * height + y + d.dy
+                    if board.on_board(x, y, d)
+                    else -1
+                    for d in EDirection
+                )
+            )
+
+        rand = Random(ZOBRIST_SEED)
+        self.box_keys: List[int] = [
+            rand.getrandbits(ZOBRIST_BITS) for _ in range(self.size)
+        ]
+        self.player_keys: List[int] = [
+            rand.getrandbits(ZOBRIST_BITS) for _ in range(self.size)
+        ]
+
+        # board with static tiles only, cloned by to_board
+        self._empty = Board(self.width, self.height, init_tiles=False)
+        self._empty.tiles = tuple(
+            bytearray(t & ETile.NULLIFY_ENTITY for t in col)
+            for col in board.tiles
+        )
+        self._empty.level_name = board.level_name
+        self._empty.level = board.level
+
+    @staticmethod
+    def layout(board: Board) -> bytes:
+        """Return static layout of the board (dimensions, walls, targets)."""
+        return bytes((board.width, board.height)) + b"".join(
+            bytes(t & ETile.NULLIFY_ENTITY for t in col)
+            for col in board.tiles
+        )
+
+    @staticmethod
+    def of(board: Board) -> "StaticMap":
+        """Return shared map of the static part of the board."""
+        static = StaticMap._maps.get(StaticMap.layout(board))
+        if static is None:
+            static = StaticMap(board)
+            StaticMap._maps[static.key] = static
+        return static
+
+    def cell(self, x: int, y: int) -> int:
+        return x * self.height + y
+
+    def pos(self, cell: int) -> Pos:
+        return Pos(*divmod(cell, self.height))
+
+    def is_wall(self, cell: int) -> bool:
+        return cell < 0 or (self.walls >> cell) & 1 == 1
+
+    def is_target(self, cell: int) -> bool:
+        return (self.targets >> cell) & 1 == 1
+
+    def neighborhood(self, bits: int) -> int:
+        """Return bitset of the cells and their neighbors on the board."""
+        return (
+            bits
+            | (bits & self.not_bottom) << 1
+            | (bits & self.not_top) >> 1
+            | bits << self.height
+            | bits >> self.height
+        ) & self.full
+
+    def reachable(self, cell: int, blocked: int) -> int:
+        """
+        Return bitset of floor cells reachable from the cell
+        without entering blocked cells (flood fill by shifts of bitsets).
+        """
+        free = self.floor & ~blocked
+        not_top, not_bottom = self.not_top, self.not_bottom
+        height = self.height
+        reach = 1 << cell
+        while True:
+            grown = (
+                reach
+                | (reach & not_bottom) << 1
+                | (reach & not_top) >> 1
+                | reach << height
+                | reach >> height
+            ) & free
+            if grown == reach:
+                return reach
+            reach = grown
+
+    def hash(self, player: int, boxes: int) -> int:
+        """Return Zobrist hash of the dynamic part (computed from scratch)."""
+        h = self.player_keys[player]
+        for cell in _cells(boxes):
+            h ^= self.box_keys[cell]
+        return h
+
+
+def _cells(bits: int) -> Iterator[int]:
+    """Yield indices of set bits in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class PackedBoard:
+    """
+    Compact Sokoban state - player cell and bitset of box cells
+    over a shared StaticMap.
+
+    Boards are immutable, move and push return new boards,
+    their Zobrist hash is updated incrementally.
+    Boards are compared (and hashed) by the dynamic part only,
+    so they should not be mixed across levels.
+
+    Use from_board, to_board, from_state and to_state for conversion
+    from and to Board and StateMinimal.
+    """
+
+    __slots__ = ("static", "player", "boxes", "_hash", "_reach")
+
+    def __init__(
+        self,
+        static: StaticMap,
+        player: int,
+        boxes: int,
+        hash: Optional[int] = None,
+    ) -> None:
+        self.static: StaticMap = static
+        self.player: int = player
+        self.boxes: int = boxes
+        self._hash: int = (
+            static.hash(player, boxes) if hash is None else hash
+        )
+        # cells reachable by the player, computed by reachable
+        self._reach: Optional[int] = None
+
+    @staticmethod
+    def from_board(board: Board) -> "PackedBoard":
+        static = StaticMap.of(board)
+        height = board.height
+        boxes = 0
+        for x, col in enumerate(board.tiles):
+            for y, tile in enumerate(col):
+                if ETile.is_box(tile):
+                    boxes |= 1 << (x * height + y)
+        return PackedBoard(static, static.cell(*board.sokoban), boxes)
+
+    def to_board(self) -> Board:
+        static = self.static
+        board = static._empty.clone()
+        board.level_name = static.level_name
+        board.level = static.level
+        x, y = static.pos(self.player)
+        board.tiles[x][y] |= ETile.SOKOBAN
+        board.sokoban = Pos(x, y)
+        for cell in _cells(self.boxes):
+            x, y = static.pos(cell)
+            board.tiles[x][y] |= ETile.BOX
+            board.box_count += 1
+            if static.is_target(cell):
+                board.box_in_place_count += 1
+        board._hash = None
+        return board
+
+    @staticmethod
+    def from_state(static: StaticMap, state: StateMinimal) -> "PackedBoard":
+        p = state.positions
+        boxes = 0
+        for x, y in zip(p[2::2], p[3::2]):
+            boxes |= 1 << static.cell(x, y)
+        return PackedBoard(static, static.cell(p[0], p[1]), boxes)
+
+    def to_state(self) -> StateMinimal:
+        """Return StateMinimal equal to the one of the Board."""
+        static = self.static
+        positions = bytearray(static.pos(self.player))
+        for cell in _cells(self.boxes):
+            positions.extend(static.pos(cell))
+        return StateMinimal(positions)
+
+    def key(self) -> "PackedKey":
+        """Return compact hashable copy of the board (see PackedKey)."""
+        return PackedKey(self.player, self.boxes, self._hash)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, __o: "PackedBoard") -> bool:
+        """Note: assumes the same static map."""
+        return (
+            self._hash == __o._hash
+            and self.player == __o.player
+            and self.boxes == __o.boxes
+        )
+
+    def box_cells(self) -> Iterator[int]:
+        return _cells(self.boxes)
+
+    def is_box(self, cell: int) -> bool:
+        return (self.boxes >> cell) & 1 == 1
+
+    def is_free(self, cell: int) -> bool:
+        """Whether the cell is on the board without wall and box."""
+        return (
+            cell >= 0
+            and ((self.static.walls | self.boxes) >> cell) & 1 == 0
+        )
+
+    def is_victory(self) -> bool:
+        """All boxes on targets."""
+        return self.boxes & ~self.static.targets == 0
+
+    def can_move(self, dir: EDirection) -> bool:
+        return self.is_free(self.static.neighbors[self.player][dir.index])
+
+    def can_push(self, dir: EDirection) -> bool:
+        neighbors = self.static.neighbors
+        box = neighbors[self.player][dir.index]
+        return (
+            box >= 0
+            and self.is_box(box)
+            and self.is_free(neighbors[box][dir.index])
+        )
+
+    def move(self, dir: EDirection) -> "PackedBoard":
+        """Return board after the move (no checks)."""
+        static = self.static
+        player = static.neighbors[self.player][dir.index]
+        keys = static.player_keys
+        return PackedBoard(
+            static,
+            player,
+            self.boxes,
+            self._hash ^ keys[self.player] ^ keys[player],
+        )
+
+    def push(self, dir: EDirection) -> "PackedBoard":
+        """Return board after the push (no checks)."""
+        box = self.static.neighbors[self.player][dir.index]
+        return self.push_box(box, dir)
+
+    def push_box(self, box: int, dir: EDirection) -> "PackedBoard":
+        """
+        Return board after the player walks behind the box
+        and pushes it in the direction (no checks).
+        """
+        static = self.static
+        target = static.neighbors[box][dir.index]
+        keys = static.player_keys
+        box_keys = static.box_keys
+        return PackedBoard(
+            static,
+            box,
+            self.boxes ^ (1 << box) ^ (1 << target),
+            self._hash
+            ^ keys[self.player]
+            ^ keys[box]
+            ^ box_keys[box]
+            ^ box_keys[target],
+        )
+
+    def reachable(self) -> int:
+        """Return bitset of cells reachable by the player (cached)."""
+        if self._reach is None:
+            self._reach = self.static.reachable(self.player, self.boxes)
+        return self._reach
+
+    def pushes(self) -> Iterator[Tuple[int, EDirection]]:
+        """
+        Yield (box, direction) of all possible pushes
+        of boxes the player can walk behind.
+        """
+        reach = self.reachable()
+        neighbors = self.static.neighbors
+        for box in _cells(self.boxes):
+            n = neighbors[box]
+            for dir, forward, back in _DIRECTIONS:
+                behind = n[back]
+                if (
+                    behind >= 0
+                    and (reach >> behind) & 1
+                    and self.is_free(n[forward])
+                ):
+                    yield box, dir
+
+    def normalized(self) -> "PackedBoard":
+        """
+        Return board with the player moved to the minimal cell
+        of its reachable region, boards differing only by walking
+        of the player are then equal.
+        """
+        reach = self.reachable()
+        player = (reach & -reach).bit_length() - 1
+        if player == self.player:
+            return self
+        keys = self.static.player_keys
+        board = PackedBoard(
+            self.static,
+            player,
+            self.boxes,
+            self._hash ^ keys[self.player] ^ keys[player],
+        )
+        board._reach = reach
+        return board
+
+    def is_possible(self, action: Action) -> bool:
+        if isinstance(action, Push):
+            return self.can_push(action.dir)
+        return self.can_move(action.dir)
+
+    def perform(self, action: Action) -> "PackedBoard":
+        """Return board after the Move or Push (no checks)."""
+        if isinstance(action, Push):
+            return self.push(action.dir)
+        return self.move(action.dir)
+
+    def __str__(self) -> str:
+        return str(self.to_board())
+
+
+class PackedKey:
+    """
+    Positions of PackedBoard (player cell and bitset of box cells)
+    hashed by its Zobrist hash, key of transposition tables.
+
+    Keys are equal only to keys of the same positions, not to Boards
+    or StateMinimals, and should not be mixed across levels.
+    """
+
+    __slots__ = ("player", "boxes", "_hash")
+
+    def __init__(self, player: int, boxes: int, hash: int) -> None:
+        self.player = player
+        self.boxes = boxes
+        self._hash = hash
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, __o: object) -> bool:
+        return (
+            isinstance(__o, PackedKey)
+            and self._hash == __o._hash
+            and self.player == __o.player
+            and self.boxes == __o.boxes
+        )
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+from game.board import Board
+from agents.myagent import SokobanProblem
+from os.path import dirname
+from os.path import join as path_join
+from time import perf_counter
+import sys
+
+# hack for importing from parent package
+sys.path.append(dirname(dirname(__file__)))
+from anytime_astar import WeightedAStar
+from idastar import IDAStar
+from search_templates import (
+    HeuristicProblem,
+    IncrementalEstimate,
+    InPlaceProblem,
+)
+
+LEVEL_SET = "easy"
+LIMIT = 4
+TABLE_SIZE = 200_000
+# estimate fails at this call
+FAILING_CALL = 50
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+class Copying(HeuristicProblem, IncrementalEstimate):
+    """SokobanProblem without InPlaceProblem, successors are copies."""
+
+    def __init__(self, prob: SokobanProblem) -> None:
+        self.prob = prob
+
+    def initial_state(self):
+        return self.prob.initial_state()
+
+    def actions(self, state):
+        return self.prob.actions(state)
+
+    def result(self, state, action):
+        return self.prob.result(state, action)
+
+    def is_goal(self, state) -> bool:
+        return self.prob.is_goal(state)
+
+    def cost(self, state, action) -> float:
+        return self.prob.cost(state, action)
+
+    def estimate(self, state) -> float:
+        return self.prob.estimate(state)
+
+    def estimate_delta(self, state, action, parent_h: float) -> float:
+        return self.prob.estimate_delta(state, action, parent_h)
+
+
+class Failing(HeuristicProblem, InPlaceProblem):
+    """
+    SokobanProblem without IncrementalEstimate, whose estimate raises
+    RuntimeError at FAILING_CALL call (after the action was performed).
+    """
+
+    def __init__(self, prob: SokobanProblem) -> None:
+        self.prob = prob
+        self.calls = 0
+
+    def initial_state(self):
+        return self.prob.initial_state()
+
+    def actions(self, state):
+        return self.prob.actions(state)
+
+    def result(self, state, action):
+        return self.prob.result(state, action)
+
+    def is_goal(self, state) -> bool:
+        return self.prob.is_goal(state)
+
+    def cost(self, state, action) -> float:
+        return self.prob.cost(state, action)
+
+    def estimate(self, state) -> float:
+        self.calls += 1
+        if self.calls == FAILING_CALL:
+            raise RuntimeError("estimate failed")
+        return self.prob.estimate(state)
+
+    def perform(self, state, action) -> None:
+        self.prob.perform(state, action)
+
+    def undo(self, state, action) -> None:
+        self.prob.undo(state, action)
+
+    def key(self, state):
+        return self.prob.key(state)
+
+
+def check_interrupted(board: Board, verbose=True) -> bool:
+    """
+    Return whether the board is restored when the search
+    is interrupted by an exception.
+    """
+    before = str(board)
+    prob = SokobanProblem(board)
+    try:
+        IDAStar(Failing(prob), table_size=TABLE_SIZE)
+        correct = False
+    except RuntimeError:
+        correct = str(board) == before
+    correct = correct and prob.estimate(board) == prob.estimate(
+        board.clone()
+    )
+    if verbose:
+        print("interrupted {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def check_changed(board: Board, verbose=True) -> bool:
+    """
+    Return whether estimates and keys follow the board changed
+    outside of perform and undo (after a search and between calls).
+    """
+    board = board.clone()
+    prob = SokobanProblem(board)
+    IDAStar(prob, table_size=TABLE_SIZE)
+    correct = True
+    for _ in range(10):
+        prob.estimate(board)
+        prob.key(board)
+        actions = prob.actions(board)
+        if not actions:
+            break
+        actions[-1].perform(board)
+        fresh = SokobanProblem(board)
+        correct = correct and (
+            prob.estimate(board) == fresh.estimate(board.clone())
+            and prob.key(board) == fresh.key(board.clone())
+        )
+    if verbose:
+        print("changed {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def check_level(board: Board, verbose=True) -> bool:
+    """
+    Return whether IDA* walking the board in place finds optimal cost
+    (the same as A*) and leaves the board unchanged.
+    """
+    before = str(board)
+    start = perf_counter()
+    solution = IDAStar(SokobanProblem(board), table_size=TABLE_SIZE)
+    in_place = perf_counter() - start
+    correct = str(board) == before and solution is not None
+
+    start = perf_counter()
+    copied = IDAStar(Copying(SokobanProblem(board)), table_size=TABLE_SIZE)
+    copying = perf_counter() - start
+    optimal = WeightedAStar(SokobanProblem(board), 1.0)
+    correct = (
+        correct
+        and solution.path_cost == copied.path_cost == optimal.path_cost
+        and solution.goal_state.is_victory()
+    )
+    if verbose:
+        print(
+            "{}: {} in place {:.2f} s, copying {:.2f} s".format(
+                board.level_name,
+                "OK" if correct else "WRONG",
+                in_place,
+                copying,
+            )
+        )
+    return correct
+
+
+def test(level_set: str = LEVEL_SET) -> None:
+    file = path_join(DIR, f"{level_set}.sok")
+    results = []
+    skip = 0
+    for _ in range(LIMIT):
+        board, _, skip = Board.from_file(file, None, False, skip=skip)
+        if board is None:
+            break
+        results.append(check_level(board))
+    results.append(check_interrupted(board))
+    results.append(check_changed(board))
+    assert results and all(results)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+from game.board import Board
+from game.level_index import INDEX_SUFFIX, LevelIndex
+from os.path import dirname, exists
+from os.path import join as path_join
+from shutil import copy
+from tempfile import TemporaryDirectory
+
+LEVEL_SETS = ["easy", "Aymeric_Medium", "Aymeric_du_Peloux_1_Minicosmos"]
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+def check_index(file: str, verbose: bool = True) -> bool:
+    """
+    Return whether levels loaded one after another by skip lines
+    match the index entries and whether every level is found
+    by its number.
+    """
+    index = LevelIndex.load(file)
+    correct = True
+    skip = 0
+    for entry in index.levels:
+        board, min_moves, skip = Board.from_file(file, None, skip=skip)
+        if (
+            board is None
+            or board.level != entry.number
+            or (board.width, board.height) != (entry.width, entry.height)
+            or min_moves != entry.moves
+            or skip != entry.end_line
+        ):
+            correct = False
+            if verbose:
+                print(f"level {entry.number} does not match its entry")
+        if index.find(entry.number) != entry:
+            correct = False
+            if verbose:
+                print(f"level {entry.number} is not found by number")
+    if Board.from_file(file, None, False, skip=skip)[0] is not None:
+        correct = False
+        if verbose:
+            print("level found after the last one")
+    if verbose:
+        print(
+            "{}: {} levels {}".format(
+                file, len(index), "OK" if correct else "WRONG"
+            )
+        )
+    return correct
+
+
+def check_rebuild(file: str, verbose: bool = True) -> bool:
+    """Return whether index of a copy of the file is rebuilt after change."""
+    with TemporaryDirectory() as tmp_dir:
+        tmp = path_join(tmp_dir, "levels.sok")
+        copy(file, tmp)
+        count = len(LevelIndex.load(tmp))
+        stored = exists(tmp + INDEX_SUFFIX)
+
+        with open(tmp, "a") as f:
+            f.write("\n1000\n#####\n#@$.#\n#####\nMoves: 1\n")
+        board, min_moves, _ = Board.from_file(tmp, 1000)
+        correct = (
+            stored
+            and len(LevelIndex.load(tmp)) == count + 1
+            and board is not None
+            and min_moves == 1
+        )
+    if verbose:
+        print("rebuild after change {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def test(level_sets=LEVEL_SETS) -> None:
+    results = [check_index(path_join(DIR, f"{s}.sok")) for s in level_sets]
+    results.append(check_rebuild(path_join(DIR, f"{level_sets[0]}.sok")))
+    assert all(results)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+from game.action import Move, Push
+from game.board import Board, EDirection
+from game.packed_board import PackedBoard, StaticMap
+from os.path import dirname
+from os.path import join as path_join
+from random import Random
+from time import perf_counter
+
+LEVEL_SET = "easy"
+STEPS = 500
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+def check_level(
+    board: Board, steps: int = STEPS, seed: int = 0, verbose: bool = True
+) -> bool:
+    """
+    Walk randomly on the board and its PackedBoard in lockstep
+    and return whether they stay equal - tiles, hashes, states,
+    victory and possible actions.
+    """
+    rand = Random(seed)
+    name = board.level_name
+    board = board.clone()
+    packed = PackedBoard.from_board(board)
+    static = packed.static
+    correct = StaticMap.of(board) is static
+    seen = {}  # state -> packed board
+
+    for _ in range(steps):
+        state = board.get_positions()
+        if (
+            packed.to_board().tiles != board.tiles
+            or packed.to_state().positions != state
+            or PackedBoard.from_state(static, packed.to_state()) != packed
+            or hash(packed) != static.hash(packed.player, packed.boxes)
+            or packed.is_victory() != board.is_victory()
+        ):
+            correct = False
+            break
+        # equal states have equal packed boards, different ones differ
+        other = seen.setdefault(bytes(state), packed)
+        if other != packed or hash(other) != hash(packed):
+            correct = False
+            break
+
+        actions = [Move.or_push(board, d) for d in EDirection]
+        possible = [a.is_possible(board) for a in actions]
+        if possible != [packed.is_possible(a) for a in actions]:
+            correct = False
+            break
+        action = rand.choice([a for a, p in zip(actions, possible) if p])
+        action.perform(board)
+        packed = packed.perform(action)
+
+    if len(set(seen.values())) != len(seen):
+        correct = False
+    if verbose:
+        print(
+            "{}: {} ({} distinct states)".format(
+                name, "OK" if correct else "WRONG", len(seen)
+            )
+        )
+    return correct
+
+
+def compare_speed(board: Board, steps: int = 20_000) -> None:
+    """Print time of clone + perform + hash of Board and PackedBoard."""
+    dirs = list(EDirection)
+    rand = Random(0)
+    actions = [rand.choice(dirs) for _ in range(steps)]
+
+    start = perf_counter()
+    b = board
+    for d in actions:
+        action = Move.or_push(b, d)
+        if action.is_possible(b):
+            b = b.clone()
+            action.perform(b)
+            hash(b)
+    board_time = perf_counter() - start
+
+    start = perf_counter()
+    p = PackedBoard.from_board(board)
+    for d in actions:
+        if p.can_move(d):
+            action = Move.get_action(d)
+        else:
+            action = Push.get_action(d)
+        if p.is_possible(action):
+            p = p.perform(action)
+            hash(p)
+    packed_time = perf_counter() - start
+    print(
+        "Board {:.3f} s, PackedBoard {:.3f} s ({} steps)".format(
+            board_time, packed_time, steps
+        )
+    )
+
+
+def test(level_set: str = LEVEL_SET) -> None:
+    file = path_join(DIR, f"{level_set}.sok")
+    results = []
+    skip = 0
+    while True:
+        board, _, skip = Board.from_file(file, None, False, skip=skip)
+        if board is None:
+            break
+        results.append(check_level(board))
+    assert results and all(results)
+
+
+if __name__ == "__main__":
+    test()
+    board, _, _ = Board.from_file(path_join(DIR, f"{LEVEL_SET}.sok"), 10)
+    compare_speed(board)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+from game.board import Board, EDirection
+from game.packed_board import PackedBoard
+from dynamic_deadlocks import DynamicDeadlocks
+from collections import deque
+from os.path import dirname
+from typing import List, NamedTuple
+import sys
+
+# hack for importing from parent package
+sys.path.append(dirname(dirname(__file__)))
+from search_templates import HeuristicProblem
+
+# (direction, index of the direction, index of the opposite direction)
+DIRECTIONS = [(d, d.index, d.opposite().index) for d in EDirection]
+
+
+class BoxPush(NamedTuple):
+    """Push of the box at the cell, the player walks behind it first."""
+
+    box: int
+    dir: EDirection
+
+    def __str__(self) -> str:
+        return f"BoxPush[{self.box}, {self.dir}]"
+
+
+class PushProblem(HeuristicProblem):
+    """
+    HeuristicProblem of Sokoban on the level of pushes.
+
+    States are PackedBoards normalized by reachability of the player
+    (PackedBoard.normalized), so states differing only by walking
+    of the player are equal.
+    Actions are BoxPushes of boxes the player can walk behind,
+    pushes to deadlocks (DynamicDeadlocks) are not generated.
+    Every push costs 1, solutions have minimal number of pushes
+    (not moves).
+    Estimate is the sum of Manhattan distances of boxes
+    to their nearest targets.
+
+    Use expand_path to get moves of the solution.
+    """
+
+    def __init__(self, initial_board: Board) -> None:
+        self.initial_board = initial_board
+        self.start = PackedBoard.from_board(initial_board).normalized()
+        static = self.start.static
+        self.deadlocks = DynamicDeadlocks.of(initial_board)
+        targets = [static.pos(c) for c in static.target_cells]
+        # cell -> Manhattan distance to the nearest target
+        self.distances: List[int] = [
+            min(
+                (abs(x - tx) + abs(y - ty) for tx, ty in targets),
+                default=0,
+            )
+            for x, y in map(static.pos, range(static.size))
+        ]
+
+    def initial_state(self) -> PackedBoard:
+        return self.start
+
+    def actions(self, state: PackedBoard) -> List[BoxPush]:
+        neighbors = state.static.neighbors
+        boxes = state.boxes
+        is_deadlock = self.deadlocks.is_deadlock
+        actions = []
+        for box, dir in state.pushes():
+            target = neighbors[box][dir.index]
+            pushed = boxes ^ (1 << box) ^ (1 << target)
+            if not is_deadlock(box, pushed, target):
+                actions.append(BoxPush(box, dir))
+        return actions
+
+    def result(self, state: PackedBoard, action: BoxPush) -> PackedBoard:
+        return state.push_box(action.box, action.dir).normalized()
+
+    def is_goal(self, state: PackedBoard) -> bool:
+        return state.is_victory()
+
+    def cost(self, state: PackedBoard, action: BoxPush) -> float:
+        return 1
+
+    def estimate(self, state: PackedBoard) -> float:
+        distances = self.distances
+        return sum(distances[c] for c in state.box_cells())
+
+
+def walk(state: PackedBoard, goal: int) -> List[EDirection]:
+    """
+    Return the shortest walk of the player to the goal cell
+    without pushing (BFS), raise ValueError if it is not reachable.
+    """
+    neighbors = state.static.neighbors
+    # cell -> (previous cell, direction) of the shortest walk
+    parents = {state.player: None}
+    queue = deque([state.player])
+    while queue and goal not in parents:
+        cell = queue.popleft()
+        for dir, forward, _ in DIRECTIONS:
+            neighbor = neighbors[cell][forward]
+            if neighbor not in parents and state.is_free(neighbor):
+                parents[neighbor] = (cell, dir)
+                queue.append(neighbor)
+    if goal not in parents:
+        raise ValueError(f"cell {goal} is not reachable")
+    dirs = []
+    while parents[goal] is not None:
+        goal, dir = parents[goal]
+        dirs.append(dir)
+    dirs.reverse()
+    return dirs
+
+
+def expand_path(board: Board, pushes: List[BoxPush]) -> List[EDirection]:
+    """
+    Return directions of moves and pushes performing the pushes
+    from the board (with the actual position of the player),
+    as returned by ArtificialAgent.think.
+    """
+    state = PackedBoard.from_board(board)
+    neighbors = state.static.neighbors
+    dirs = []
+    for push in pushes:
+        behind = neighbors[push.box][push.dir.opposite().index]
+        dirs.extend(walk(state, behind))
+        dirs.append(push.dir)
+        state = state.push_box(push.box, push.dir)
+    return dirs
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+from game.action import Move
+from game.board import Board, EDirection
+from game.packed_board import PackedBoard
+from push_problem import PushProblem, expand_path
+from os.path import dirname
+from os.path import join as path_join
+import sys
+
+# hack for importing from parent package
+sys.path.append(dirname(dirname(__file__)))
+from anytime_astar import WeightedAStar
+
+LEVEL_SET = "easy"
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+def check_normalized(board: Board) -> bool:
+    """
+    Return whether walking of the player does not change
+    normalized board, while pushing does.
+    """
+    start = PackedBoard.from_board(board)
+    state = start
+    normal = start.normalized()
+    for _ in range(3):
+        for dir in EDirection:
+            if state.can_move(dir):
+                state = state.move(dir)
+    if state.normalized() != normal:
+        return False
+    if state.reachable() != start.reachable():
+        return False
+    pushed = [
+        start.push(d).normalized() for d in EDirection if start.can_push(d)
+    ]
+    return all(p != normal for p in pushed)
+
+
+def check_level(board: Board, verbose: bool = True) -> bool:
+    """
+    Return whether push-optimal solution of the level
+    expands to moves solving the level.
+    """
+    solution = WeightedAStar(PushProblem(board), 1.0)
+    correct = solution is not None
+    if correct:
+        dirs = expand_path(board, solution.actions)
+        played = board.clone()
+        for dir in dirs:
+            action = Move.or_push(played, dir)
+            if not action.is_possible(played):
+                correct = False
+                break
+            action.perform(played)
+        correct = correct and played.is_victory()
+    correct = correct and check_normalized(board)
+    if verbose:
+        print(
+            "{}: {}{}".format(
+                board.level_name,
+                "OK" if correct else "WRONG",
+                f" ({solution.path_cost} pushes, {len(dirs)} moves)"
+                if correct
+                else "",
+            )
+        )
+    return correct
+
+
+def test(level_set: str = LEVEL_SET) -> None:
+    file = path_join(DIR, f"{level_set}.sok")
+    results = []
+    skip = 0
+    while True:
+        board, _, skip = Board.from_file(file, None, False, skip=skip)
+        if board is None:
+            break
+        results.append(check_level(board))
+    assert results and all(results)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+from game.board import Board, EDirection
+from game.level_index import LevelIndex
+from game.packed_board import StaticMap
+from argparse import ArgumentParser
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from os import getpid, makedirs, replace
+from glob import glob
+from os.path import dirname, exists, join
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+import json
+
+LEVELS_DIR = join(dirname(__file__), "game", "levels")
+CACHE_DIR = join(LEVELS_DIR, "deadlocks")
+VERSION = 1
+
+UP, RIGHT, DOWN, LEFT = (d.index for d in EDirection)
+
+
+class StaticDeadlocks:
+    """
+    Deadlocks of a level that depend only on its walls and targets,
+    as bitsets of cells of StaticMap (cell = x * height + y):
+
+    - dead - floor cells from which a box cannot be pushed to any target
+      (cells not reachable by pulling a box from some target)
+    - blocked_h, blocked_v - cells with wall on the left or right
+      (above or below), box there cannot be pushed horizontally
+      (vertically) - freeze tables for dynamic deadlock detection
+    - squares - floor cells of 2x2 blocks, that are not dead already,
+      block is a deadlock when all its floor cells hold boxes
+      and some of them is not on target
+
+    Deadlocks are cached by static layout of the level, in the process
+    and in CACHE_DIR (filled by running this script on level sets).
+
+    Main methods:
+    - of - return deadlocks of the board (cached)
+    - compute - compute deadlocks of the static map
+    - is_deadlock - whether box pushed to the cell is in deadlock
+    - to_lists - dead squares in the format of dead_square_detector.detect
+    """
+
+    # layout -> deadlocks of this process
+    _loaded: Dict[bytes, "StaticDeadlocks"] = {}
+    # (cache directory, shard) -> records of the shard
+    _shards: Dict[Tuple[str, str], Dict[str, dict]] = {}
+
+    def __init__(
+        self,
+        static: StaticMap,
+        dead: int,
+        blocked_h: int,
+        blocked_v: int,
+        corners: List[int],
+    ) -> None:
+        self.static = static
+        self.dead = dead
+        self.blocked_h = blocked_h
+        self.blocked_v = blocked_v
+        # top left cells of squares (stored instead of their bitsets)
+        self.corners = corners
+        self.squares = [_square(static, c) for c in corners]
+        # cell -> squares containing it
+        self.squares_of: List[List[int]] = [[] for _ in range(static.size)]
+        for square in self.squares:
+            bits = square
+            while bits:
+                low = bits & -bits
+                self.squares_of[low.bit_length() - 1].append(square)
+                bits ^= low
+
+    @staticmethod
+    def of(
+        board: Board, cache_dir: Optional[str] = CACHE_DIR
+    ) -> "StaticDeadlocks":
+        """
+        Return deadlocks of the level of the board - loaded by this
+        process, from the cache directory, or computed.
+        """
+        static = StaticMap.of(board)
+        deadlocks = StaticDeadlocks._loaded.get(static.key)
+        if deadlocks is None:
+            record = None
+            if cache_dir is not None:
+                digest = layout_digest(static.key)
+                record = _shard(cache_dir, digest).get(digest)
+            if record is None:
+                deadlocks = StaticDeadlocks.compute(static)
+            else:
+                deadlocks = StaticDeadlocks.from_record(static, record)
+            StaticDeadlocks._loaded[static.key] = deadlocks
+        return deadlocks
+
+    @staticmethod
+    def compute(static: StaticMap) -> "StaticDeadlocks":
+        neighbors = static.neighbors
+        walls = static.walls
+
+        def floor(cell: int) -> bool:
+            return cell >= 0 and (walls >> cell) & 1 == 0
+
+        # pull boxes from targets: box moves to next cell,
+        # player stands one cell further in the same direction
+        live = static.targets
+        stack = list(static.target_cells)
+        while stack:
+            cell = stack.pop()
+            for d in range(4):
+                pulled = neighbors[cell][d]
+                if (
+                    floor(pulled)
+                    and floor(neighbors[pulled][d])
+                    and (live >> pulled) & 1 == 0
+                ):
+                    live |= 1 << pulled
+                    stack.append(pulled)
+
+        full = (1 << static.size) - 1
+        dead = full & ~walls & ~live
+
+        blocked_h = 0
+        blocked_v = 0
+        for cell in range(static.size):
+            if not floor(cell):
+                continue
+            n = neighbors[cell]
+            if not floor(n[LEFT]) or not floor(n[RIGHT]):
+                blocked_h |= 1 << cell
+            if not floor(n[UP]) or not floor(n[DOWN]):
+                blocked_v |= 1 << cell
+
+        corners = [
+            cell
+            for cell in range(static.size)
+            if _square(static, cell) & ~dead
+        ]
+        return StaticDeadlocks(static, dead, blocked_h, blocked_v, corners)
+
+    def to_record(self) -> dict:
+        """Return JSON-serializable record of the deadlocks."""
+        return {
+            "dead": hex(self.dead),
+            "blocked_h": hex(self.blocked_h),
+            "blocked_v": hex(self.blocked_v),
+            "corners": self.corners,
+        }
+
+    @staticmethod
+    def from_record(static: StaticMap, record: dict) -> "StaticDeadlocks":
+        return StaticDeadlocks(
+            static,
+            int(record["dead"], 16),
+            int(record["blocked_h"], 16),
+            int(record["blocked_v"], 16),
+            record["corners"],
+        )
+
+    def is_dead(self, cell: int) -> bool:
+        return (self.dead >> cell) & 1 == 1
+
+    def is_deadlock(self, boxes: int, cell: int) -> bool:
+        """
+        Return whether box at the cell (included in boxes bitset)
+        is on dead square or completes 2x2 block of boxes and walls
+        with a box not on target.
+        """
+        if (self.dead >> cell) & 1:
+            return True
+        targets = self.static.targets
+        for square in self.squares_of[cell]:
+            if boxes & square == square and square & ~targets:
+                return True
+        return False
+
+    def to_lists(self) -> List[List[bool]]:
+        """Return dead squares as [width] lists of [height] bools."""
+        static = self.static
+        return [
+            [
+                (self.dead >> static.cell(x, y)) & 1 == 1
+                for y in range(static.height)
+            ]
+            for x in range(static.width)
+        ]
+
+
+def _square(static: StaticMap, corner: int) -> int:
+    """Return bitset of floor cells of 2x2 block with the top left corner."""
+    neighbors = static.neighbors
+    right = neighbors[corner][RIGHT]
+    down = neighbors[corner][DOWN]
+    if right < 0 or down < 0:
+        return 0
+    return (
+        sum(1 << c for c in (corner, right, down, neighbors[right][DOWN]))
+        & ~static.walls
+    )
+
+
+def layout_digest(layout: bytes) -> str:
+    return sha1(layout).hexdigest()
+
+
+def _shard_name(cache_dir: str, digest: str) -> str:
+    return join(cache_dir, digest[:2] + ".json")
+
+
+def _shard(cache_dir: str, digest: str) -> Dict[str, dict]:
+    """
+    Return records of the shard of the digest (loaded once),
+    shard is given by the first two characters of the digest.
+    """
+    key = (cache_dir, digest[:2])
+    records = StaticDeadlocks._shards.get(key)
+    if records is None:
+        records = {}
+        file_name = _shard_name(cache_dir, digest)
+        if exists(file_name):
+            try:
+                with open(file_name) as file:
+                    data = json.load(file)
+                if data.get("version") == VERSION:
+                    records = data["records"]
+            except (OSError, ValueError, KeyError):
+                pass
+        StaticDeadlocks._shards[key] = records
+    return records
+
+
+def level_records(file_name: str) -> List[Tuple[str, dict]]:
+    """Return (layout digest, record) of every level of the .sok file."""
+    index = LevelIndex.load(file_name)
+    records = []
+    for entry in index.levels:
+        board, _, _ = Board.from_file(
+            file_name, entry.number, skip=entry.line - 1
+        )
+        static = StaticMap(board)
+        records.append(
+            (
+                layout_digest(static.key),
+                StaticDeadlocks.compute(static).to_record(),
+            )
+        )
+    return records
+
+
+def fill_cache(
+    file_names: List[str], cache_dir: str = CACHE_DIR, workers: int = 1
+) -> int:
+    """
+    Compute deadlocks of all levels of the files (in parallel by files)
+    and store them to the cache directory, return number of levels.
+    """
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(level_records, file_names))
+
+    by_shard = defaultdict(dict)
+    for records in results:
+        for digest, record in records:
+            by_shard[digest[:2]][digest] = record
+
+    makedirs(cache_dir, exist_ok=True)
+    for shard, records in by_shard.items():
+        file_name = _shard_name(cache_dir, shard)
+        stored = dict(_shard(cache_dir, shard))
+        stored.update(records)
+        tmp_name = f"{file_name}.{getpid()}.tmp"
+        with open(tmp_name, "w") as file:
+            json.dump(
+                {"version": VERSION, "records": stored},
+                file,
+                separators=(",", ":"),
+            )
+        replace(tmp_name, file_name)
+        StaticDeadlocks._shards[(cache_dir, shard)] = stored
+    return sum(len(records) for records in results)
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        description="Precompute static deadlocks of levels into the cache."
+    )
+    parser.add_argument(
+        "level_sets",
+        nargs="*",
+        help="Names of sets of levels (without .sok), all if omitted.",
+    )
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-o", "--cache_dir", default=CACHE_DIR)
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    if args.level_sets:
+        files = [join(LEVELS_DIR, f"{s}.sok") for s in args.level_sets]
+    else:
+        files = sorted(glob(join(LEVELS_DIR, "*.sok")))
+    start = perf_counter()
+    count = fill_cache(files, args.cache_dir, args.workers)
+    print(
+        "{} levels of {} files cached in {:.1f} s".format(
+            count, len(files), perf_counter() - start
+        )
+    )
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+from game.board import Board, ETile
+from game.packed_board import StaticMap
+from static_deadlocks import StaticDeadlocks, fill_cache
+from os.path import dirname
+from os.path import join as path_join
+from tempfile import TemporaryDirectory
+
+LEVEL_SET = "Aymeric_du_Peloux_1_Minicosmos"
+LIMIT = 10
+SOLUTION = "dead_squares_expected.txt"
+
+DIR = path_join(dirname(__file__), "game", "levels")
+
+
+def dead_lines(board: Board, dead) -> str:
+    """Return dead squares in the format of dead_square_test."""
+    return "\n".join(
+        "".join(
+            "#"
+            if ETile.is_wall(board.tile(x, y))
+            else "X"
+            if dead[x][y]
+            else "_"
+            for x in range(board.width)
+        )
+        for y in range(board.height)
+    )
+
+
+def check_dead_squares(
+    level_set: str = LEVEL_SET, expected: str = SOLUTION, verbose=True
+) -> bool:
+    """Return whether dead squares match the expected detections."""
+    with open(path_join(dirname(__file__), expected)) as file:
+        blocks = file.read().split("dead squares:\n")[1:]
+    file_name = path_join(DIR, f"{level_set}.sok")
+    correct = True
+    skip = 0
+    for block in blocks[:LIMIT]:
+        board, _, skip = Board.from_file(file_name, None, skip=skip)
+        deadlocks = StaticDeadlocks.of(board, None)
+        if dead_lines(board, deadlocks.to_lists()) != block.split("\n\n")[0]:
+            correct = False
+            if verbose:
+                print(f"{board.level_name}: wrong dead squares")
+    if verbose:
+        print("dead squares {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def check_square(verbose=True) -> bool:
+    """Return whether 2x2 block of boxes is detected (only off targets)."""
+    board = Board(8, 7)
+    for x in range(8):
+        for y in range(7):
+            if x in (0, 7) or y in (0, 6):
+                board.tiles[x][y] = ETile.WALL
+    board.tiles[1][1] |= ETile.SOKOBAN
+    board.sokoban = (1, 1)
+    block = [(2, 2), (3, 2), (2, 3), (3, 3)]
+    for x, y in block:
+        board.tiles[x][y] |= ETile.TARGET
+    deadlocks = StaticDeadlocks.compute(StaticMap(board))
+    static = deadlocks.static
+
+    def bits(cells) -> int:
+        return sum(1 << static.cell(x, y) for x, y in cells)
+
+    # block moved by one to the right is off two targets
+    shifted = [(x + 1, y) for x, y in block]
+    correct = (
+        not deadlocks.is_dead(static.cell(4, 2))
+        and deadlocks.is_dead(static.cell(1, 1))
+        and deadlocks.is_deadlock(bits(shifted), static.cell(4, 3))
+        and not deadlocks.is_deadlock(bits(shifted[:3]), static.cell(4, 2))
+        and not deadlocks.is_deadlock(bits(block), static.cell(3, 3))
+    )
+    if verbose:
+        print("2x2 blocks {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def check_cache(level_set: str = "easy", verbose=True) -> bool:
+    """Return whether deadlocks loaded from filled cache match computed."""
+    file_name = path_join(DIR, f"{level_set}.sok")
+    with TemporaryDirectory() as cache_dir:
+        count = fill_cache([file_name], cache_dir)
+        StaticDeadlocks._loaded.clear()
+        correct = count > 0
+        skip = 0
+        while True:
+            board, _, skip = Board.from_file(file_name, None, False, skip=skip)
+            if board is None:
+                break
+            cached = StaticDeadlocks.of(board, cache_dir)
+            computed = StaticDeadlocks.compute(StaticMap.of(board))
+            if cached.to_record() != computed.to_record():
+                correct = False
+        StaticDeadlocks._loaded.clear()
+    if verbose:
+        print("cache {}".format("OK" if correct else "WRONG"))
+    return correct
+
+
+def test() -> None:
+    assert all([check_dead_squares(), check_square(), check_cache()])
+
+
+if __name__ == "__main__":
+    test()
@@ -1,21 +1,26 @@
 #!/usr/bin/env python3
 from ucs import ucs
-from search_templates import Problem
+from search_templates import Problem, search_with_stats
 from problems import Empty, Unsolvable, Graph, Line, Grid
 from time import perf_counter
 from typing import Tuple, Union
 
 
 def run_test(
-    prob: Problem, *, verbose: bool = True
+    prob: Problem, *, verbose: bool = True, stats: bool = False
 ) -> Tuple[bool, float, Union[None, bool]]:
     """
     Run test and return validity, time and optimality (None for unknown).
 
-    Call with verbose=False to turn off prints.
+    Call with verbose=False to turn off prints,
+    with stats=True to print SearchStats of the run
+    (counting slows the search down a bit).
     """
     start = perf_counter()
-    solution = ucs(prob)
+    if stats:
+        solution, search_stats = search_with_stats(ucs, prob)
+    else:
+        solution = ucs(prob)
     elapsed = (perf_counter() - start) * 1000
 
     if solution is None:
@@ -31,9 +36,11 @@ def run_test(
     valid = None
     if verbose and (valid := solution.report(prob)):
         print("solved in {:.3f} ms".format(elapsed))
+        if stats:
+            search_stats.report()
 
     return (
-        valid if valid is not None else solution.is_valid(),
+        valid if valid is not None else solution.is_valid(prob),
         elapsed,
         solution.is_optimal(prob),
     )